@@ -1,27 +1,22 @@
-import io
 from pathlib import Path
 
 import pandas as pd
 import plotly.graph_objs as go
 import streamlit as st
 
-from alm_utils import summarize_balance_sheet, validate_balance_sheet
+from alm_utils import BALANCE_SENSITIVITY, summarize_balance_sheet
+from data_loader import (
+    SUPPORTED_SUFFIXES,
+    dataset_positions,
+    dataset_stats,
+    fingerprint_source,
+    load_balance_sheet,
+)
+from result_cache import get_result_cache
 from scenario_builder import scenario_builder
 
 SAMPLE_CSV_PATH = Path(__file__).resolve().parent / "data" / "sample_balance_sheet.csv"
 
-BALANCE_SENSITIVITY = {
-    "Fixed Mortgage": -0.01,
-    "HELOC": 0.005,
-    "Commercial Loan": -0.002,
-    "Investment Securities": 0.0,
-    "Core Checking": 0.001,
-    "Savings Account": 0.002,
-    "Time Deposits": 0.004,
-    "FHLB Advances": 0.0,
-    "Fed Funds Purchased": 0.0,
-}
-
 MODULES = [
     "Overview",
     "Liquidity Gap Table",
@@ -38,27 +33,31 @@ def load_sample_csv_text() -> str:
     return SAMPLE_CSV_PATH.read_text(encoding="utf-8")
 
 
-def load_balance_sheet_data(uploaded_file) -> pd.DataFrame:
-    sample_text = load_sample_csv_text()
+def _upload_fingerprint(uploaded_file) -> str:
+    """Hash an upload once per session rather than on every rerun."""
+    fingerprints = st.session_state.setdefault("upload_fingerprints", {})
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is None:
+        return fingerprint_source(uploaded_file)
+    if file_id not in fingerprints:
+        fingerprints.clear()
+        fingerprints[file_id] = fingerprint_source(uploaded_file)
+    return fingerprints[file_id]
 
-    if uploaded_file is not None:
-        raw_df = pd.read_csv(uploaded_file)
-        source = "Custom balance sheet loaded"
-    else:
-        raw_df = pd.read_csv(io.StringIO(sample_text))
-        source = "Using default sample balance sheet"
+
+def load_balance_sheet_data(uploaded_file) -> pd.DataFrame:
+    if uploaded_file is None:
+        st.sidebar.info("Using default sample balance sheet")
+        return load_balance_sheet(SAMPLE_CSV_PATH)
 
     try:
-        df = validate_balance_sheet(raw_df)
+        df = load_balance_sheet(uploaded_file, _upload_fingerprint(uploaded_file))
     except ValueError as exc:
-        st.sidebar.error(f"CSV validation failed: {exc}")
+        st.sidebar.error(f"Balance sheet validation failed: {exc}")
         st.sidebar.info("Falling back to default sample balance sheet.")
-        df = validate_balance_sheet(pd.read_csv(io.StringIO(sample_text)))
+        df = load_balance_sheet(SAMPLE_CSV_PATH)
     else:
-        if uploaded_file is not None:
-            st.sidebar.success(source)
-        else:
-            st.sidebar.info(source)
+        st.sidebar.success("Custom balance sheet loaded")
 
     return df
 
@@ -68,11 +67,11 @@ def render_overview(balance_sheet: pd.DataFrame) -> None:
     st.markdown(
         """
         Interactive Asset-Liability Management (ALM) overview of the current portfolio.
-        Upload a custom balance sheet CSV in the sidebar, or explore the default sample book.
+        Upload a custom balance sheet (CSV, Parquet or Feather) in the sidebar, or explore the default sample book.
         """
     )
 
-    kpis = summarize_balance_sheet(balance_sheet)
+    kpis = summarize_balance_sheet(dataset_stats(balance_sheet))
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Assets", f"${kpis['total_assets']:,.0f}")
@@ -124,8 +123,10 @@ def render_overview(balance_sheet: pd.DataFrame) -> None:
 def main() -> None:
     st.set_page_config(page_title="ALM Dashboard", layout="wide")
 
-    st.sidebar.markdown("## Upload Balance Sheet CSV")
-    uploaded_file = st.sidebar.file_uploader("Upload CSV file", type="csv")
+    st.sidebar.markdown("## Upload Balance Sheet")
+    uploaded_file = st.sidebar.file_uploader(
+        "Upload CSV, Parquet or Feather file", type=SUPPORTED_SUFFIXES
+    )
     st.sidebar.markdown("---")
     st.sidebar.markdown("## Sample Data")
     st.sidebar.download_button(
@@ -136,6 +137,12 @@ def main() -> None:
     )
 
     balance_sheet = load_balance_sheet_data(uploaded_file)
+    use_float32 = st.sidebar.checkbox(
+        "Compact float32 positions",
+        value=False,
+        help="Halve numeric memory for very large books at the cost of float32 precision.",
+    )
+    positions = dataset_positions(balance_sheet, float32=use_float32)
     selected_module = st.sidebar.selectbox("Choose Module", MODULES, index=0)
 
     st.title("ALM Dashboard")
@@ -148,29 +155,35 @@ def main() -> None:
     elif selected_module == "Liquidity Gap Table":
         import liquidity_gap
 
-        liquidity_gap.show(balance_sheet)
+        liquidity_gap.show(positions)
     elif selected_module == "Cash Flow Gap Analysis":
         import cash_flow_gap
 
-        cash_flow_gap.show(balance_sheet)
+        cash_flow_gap.show(positions)
     elif selected_module == "FTP (Funds Transfer Pricing)":
         import ftp
 
-        ftp.show(balance_sheet)
+        ftp.show(positions)
     elif selected_module == "Interest Rate Risk (IRR)":
         import irr
 
-        irr.show(balance_sheet, BALANCE_SENSITIVITY)
+        irr.show(positions, BALANCE_SENSITIVITY)
     elif selected_module == "Duration Gap Analysis":
         import duration_gap
 
-        duration_gap.show(balance_sheet)
+        duration_gap.show(positions)
     elif selected_module == "IRR/FX Derivatives Book":
         import derivatives_book
 
         derivatives_book.show()
     elif selected_module == "Scenario Builder":
-        scenario_builder()
+        scenario_builder(balance_sheet)
+
+    cache_stats = get_result_cache().stats()
+    st.sidebar.caption(
+        f"Result cache: {cache_stats['hits']:,} hits, {cache_stats['misses']:,} misses, "
+        f"{cache_stats['entries']:,} results ({cache_stats['bytes'] / 1024**2:,.1f} MB)"
+    )
 
 
 if __name__ == "__main__":
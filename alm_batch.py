@@ -0,0 +1,266 @@
+"""
+Headless batch runs of the ALM calculations over one or more balance sheets.
+
+    python alm_batch.py books/*.csv --output-dir results --format parquet
+
+Each book gets a directory of result tables (liquidity gap, cash flow gap,
+FTP by product, IRR scenarios and duration gap) under the output
+directory. Books run in parallel worker processes. Only the calculation
+modules are imported, never Streamlit or Plotly, so the command starts
+quickly on a headless host. With ``--cache-dir`` tables are reused from the
+on-disk result cache when neither the book nor the options changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from alm_utils import BALANCE_SENSITIVITY, calculate_duration_gap, estimate_eve_change_from_stats
+from cash_flow_gap import build_cash_flow_gap_table, build_runoff_gap_table
+from data_loader import dataset_positions, load_balance_sheet
+from ftp import FTP_METHODS, INTERPOLATION_MODES, build_ftp_table
+from irr import DEFAULT_SCENARIOS, EVE_METHODS, build_scenario_table
+from liquidity_gap import build_liquidity_gap_table
+from result_cache import DEFAULT_RESULT_CACHE_BYTES, ResultCache
+
+OUTPUT_FORMATS = ["parquet", "csv"]
+DURATION_SHOCKS_BPS = [-200, -100, 100, 200]
+
+
+@dataclass(frozen=True)
+class BatchOptions:
+    output_dir: str = "alm_results"
+    output_format: str = "parquet"
+    ftp_mode: str = "step"
+    ftp_method: str = "maturity"
+    eve_method: str = "duration"
+    behavioral_runoff: bool = False
+    cache_dir: str | None = None
+    cache_max_bytes: int = DEFAULT_RESULT_CACHE_BYTES
+
+
+@dataclass(frozen=True)
+class BookResult:
+    """Outcome of one book: the tables written, or the error that stopped it."""
+
+    book: str
+    positions: int = 0
+    tables: tuple[str, ...] = ()
+    cached: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+
+def duration_gap_table(stats) -> pd.DataFrame:
+    """Duration gap metrics plus the duration-approximated ΔEVE of standard parallel shocks."""
+    metrics = calculate_duration_gap(stats)
+    for shock_bps in DURATION_SHOCKS_BPS:
+        metrics[f"eve_change_{shock_bps:+d}bps"] = estimate_eve_change_from_stats(stats, shock_bps)
+    return pd.Series(metrics, name="Value").rename_axis("Metric").to_frame()
+
+
+def ftp_product_summary(ftp_df: pd.DataFrame) -> pd.DataFrame:
+    """FTP charge and net contribution summed by product and type."""
+    return ftp_df.groupby(["Product", "Type"], observed=True)[
+        ["Amount ($)", "FTP Charge ($)", "FTP Net ($)"]
+    ].sum()
+
+
+def write_table(table: pd.DataFrame, path: Path) -> None:
+    """Write *table* with its index levels as ordinary columns."""
+    table = table.reset_index()
+    if path.suffix == ".csv":
+        table.to_csv(path, index=False)
+    else:
+        table.to_parquet(path, index=False)
+
+
+def run_book(path, options: BatchOptions) -> BookResult:
+    """Load, validate and analyse one balance sheet, writing every result table."""
+    start = time.perf_counter()
+    positions = dataset_positions(load_balance_sheet(path))
+    cash_flow_gap = (
+        build_runoff_gap_table if options.behavioral_runoff else build_cash_flow_gap_table
+    )
+    # Each table with the options it depends on, which key its cached result.
+    builders = {
+        "liquidity_gap": (lambda: build_liquidity_gap_table(positions), {}),
+        "cash_flow_gap": (
+            lambda: cash_flow_gap(positions),
+            {"behavioral_runoff": options.behavioral_runoff},
+        ),
+        "ftp": (
+            lambda: ftp_product_summary(
+                build_ftp_table(positions, mode=options.ftp_mode, method=options.ftp_method)
+            ),
+            {"ftp_mode": options.ftp_mode, "ftp_method": options.ftp_method},
+        ),
+        "irr_scenarios": (
+            lambda: build_scenario_table(
+                positions, DEFAULT_SCENARIOS, BALANCE_SENSITIVITY, eve_method=options.eve_method
+            ),
+            {
+                "scenarios": DEFAULT_SCENARIOS,
+                "balance_sensitivity": BALANCE_SENSITIVITY,
+                "eve_method": options.eve_method,
+            },
+        ),
+        "duration_gap": (
+            lambda: duration_gap_table(positions.stats),
+            {"shocks_bps": DURATION_SHOCKS_BPS},
+        ),
+    }
+
+    cached = 0
+    if options.cache_dir is None:
+        tables = {name: build() for name, (build, _) in builders.items()}
+    else:
+        cache = ResultCache(options.cache_dir, options.cache_max_bytes)
+        tables = {
+            name: cache.fetch(f"batch_{name}", positions, build, **assumptions)
+            for name, (build, assumptions) in builders.items()
+        }
+        cached = cache.hits
+
+    output_dir = Path(options.output_dir) / Path(path).stem
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, table in tables.items():
+        write_table(table, output_dir / f"{name}.{options.output_format}")
+    return BookResult(
+        book=str(path),
+        positions=len(positions),
+        tables=tuple(tables),
+        cached=cached,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def _run_book_safely(path, options: BatchOptions) -> BookResult:
+    # One bad book must not stop the rest of the nightly run.
+    try:
+        return run_book(path, options)
+    except Exception as exc:
+        return BookResult(book=str(path), error=f"{type(exc).__name__}: {exc}")
+
+
+def run_books(
+    paths,
+    options: BatchOptions,
+    max_workers: int | None = None,
+    progress: Callable[[BookResult], None] | None = None,
+    mp_context=None,
+) -> list[BookResult]:
+    """
+    Run :func:`run_book` over *paths*, in input order.
+
+    Books are spread over up to *max_workers* processes (all cores by
+    default); with one worker or one book they run in-process. Failures are
+    returned as results with ``error`` set rather than raised.
+    """
+    for choice, allowed in (
+        (options.output_format, OUTPUT_FORMATS),
+        (options.ftp_mode, INTERPOLATION_MODES),
+        (options.ftp_method, FTP_METHODS),
+        (options.eve_method, EVE_METHODS),
+    ):
+        if choice not in allowed:
+            raise ValueError(f"Unknown option {choice!r}; expected one of {', '.join(allowed)}")
+    paths = [str(path) for path in paths]
+    stems = [Path(path).stem for path in paths]
+    duplicates = sorted({stem for stem in stems if stems.count(stem) > 1})
+    if duplicates:
+        raise ValueError(f"Books share an output directory name: {', '.join(duplicates)}")
+
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    results = []
+    if workers <= 1:
+        for path in paths:
+            results.append(_run_book_safely(path, options))
+            if progress is not None:
+                progress(results[-1])
+        return results
+
+    context = mp_context or multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(_run_book_safely, path, options) for path in paths]
+        for future in futures:
+            results.append(future.result())
+            if progress is not None:
+                progress(results[-1])
+    return results
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the ALM calculations over balance sheet files without the dashboard."
+    )
+    parser.add_argument("books", nargs="+", help="Balance sheet files (CSV, Parquet or Feather).")
+    parser.add_argument("-o", "--output-dir", default=BatchOptions.output_dir)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=BatchOptions.output_format)
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="Worker processes (default: all cores)."
+    )
+    parser.add_argument("--ftp-mode", choices=INTERPOLATION_MODES, default=BatchOptions.ftp_mode)
+    parser.add_argument("--ftp-method", choices=FTP_METHODS, default=BatchOptions.ftp_method)
+    parser.add_argument("--eve-method", choices=EVE_METHODS, default=BatchOptions.eve_method)
+    parser.add_argument(
+        "--behavioral-runoff",
+        action="store_true",
+        help="Run non-maturity deposits off behaviorally in the cash flow gap.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Reuse result tables from this on-disk result cache (default: no cache).",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_RESULT_CACHE_BYTES // 1024**2,
+        help="Size bound of the result cache in MB.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    options = BatchOptions(
+        output_dir=args.output_dir,
+        output_format=args.format,
+        ftp_mode=args.ftp_mode,
+        ftp_method=args.ftp_method,
+        eve_method=args.eve_method,
+        behavioral_runoff=args.behavioral_runoff,
+        cache_dir=args.cache_dir,
+        cache_max_bytes=args.cache_max_mb * 1024**2,
+    )
+
+    def _report(result: BookResult) -> None:
+        if result.error:
+            print(f"FAILED {result.book}: {result.error}", file=sys.stderr)
+        else:
+            print(
+                f"ok     {result.book}: {result.positions:,} positions in {result.seconds:.2f}s"
+                f" ({result.cached} of {len(result.tables)} tables cached)"
+            )
+
+    try:
+        results = run_books(args.books, options, max_workers=args.workers, progress=_report)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass, fields
 from typing import Iterable, Sequence
 
+import numpy as np
 import pandas as pd
 
 REQUIRED_COLUMNS = [
@@ -16,6 +18,7 @@ REQUIRED_COLUMNS = [
 ]
 
 NUMERIC_COLUMNS = ["Amount ($)", "Rate (%)", "Duration (Years)", "Maturity (Months)"]
+CATEGORICAL_COLUMNS = ["Product", "Type"]
 
 MATURITY_BINS_STANDARD = [0, 1, 3, 6, 12, 24, 36, 60, float("inf")]
 MATURITY_LABELS_STANDARD = ["0-1M", "1-3M", "3-6M", "6-12M", "1-2Y", "2-3Y", "3-5Y", ">5Y"]
@@ -33,42 +36,87 @@ MATURITY_LABELS_EXTENDED = [
     ">10Y",
 ]
 
+DAYS_PER_MONTH = 365.25 / 12
+
+BALANCE_TYPES = ["Asset", "Liability"]
+ALLOWED_TYPES = set(BALANCE_TYPES)
+
+# Balance change per 1% rate shift, by product.
+BALANCE_SENSITIVITY = {
+    "Fixed Mortgage": -0.01,
+    "HELOC": 0.005,
+    "Commercial Loan": -0.002,
+    "Investment Securities": 0.0,
+    "Core Checking": 0.001,
+    "Savings Account": 0.002,
+    "Time Deposits": 0.004,
+    "FHLB Advances": 0.0,
+    "Fed Funds Purchased": 0.0,
+}
+
+VALIDATION_MESSAGES = {
+    "non_numeric": "One or more numeric columns contains blank or non-numeric values.",
+    "invalid_type": "Type must be either 'Asset' or 'Liability'.",
+    "negative_amount": "Amount ($) values must be non-negative.",
+    "negative_maturity": "Maturity (Months) values must be non-negative.",
+    "negative_duration": "Duration (Years) values must be non-negative.",
+}
+
 CURRENCY_FORMAT = "${:,.0f}"
 PERCENT_FORMAT = "{:.2f}%"
 RATE_FORMAT = "{:.2f}"
 
 
+def _needs_numeric_coercion(series: pd.Series) -> bool:
+    return not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)
+
+
+def coerce_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce non-numeric ``NUMERIC_COLUMNS`` to numbers, leaving typed columns untouched."""
+    coerce_columns = [col for col in NUMERIC_COLUMNS if _needs_numeric_coercion(df[col])]
+    if not coerce_columns:
+        return df
+    return df.assign(
+        **{col: pd.to_numeric(df[col], errors="coerce") for col in coerce_columns}
+    )
+
+
 def validate_balance_sheet(df: pd.DataFrame) -> pd.DataFrame:
-    """Validate and coerce an uploaded or sample balance sheet dataframe."""
+    """
+    Validate and coerce an uploaded or sample balance sheet dataframe.
+
+    Numeric columns that already carry a numeric dtype (as Parquet and Arrow
+    inputs usually do) are checked in place rather than coerced and copied.
+    """
     missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
     if missing_columns:
         raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
 
-    validated_df = df[REQUIRED_COLUMNS].copy()
-
-    for col in NUMERIC_COLUMNS:
-        validated_df[col] = pd.to_numeric(validated_df[col], errors="coerce")
+    validated_df = coerce_numeric_columns(df[REQUIRED_COLUMNS])
 
     if validated_df[NUMERIC_COLUMNS].isna().any().any():
-        raise ValueError("One or more numeric columns contains blank or non-numeric values.")
+        raise ValueError(VALIDATION_MESSAGES["non_numeric"])
 
-    allowed_types = {"Asset", "Liability"}
-    invalid_types = sorted(set(validated_df["Type"]) - allowed_types)
-    if invalid_types:
-        raise ValueError("Type must be either 'Asset' or 'Liability'.")
+    if set(validated_df["Type"].unique()) - ALLOWED_TYPES:
+        raise ValueError(VALIDATION_MESSAGES["invalid_type"])
 
     if (validated_df["Amount ($)"] < 0).any():
-        raise ValueError("Amount ($) values must be non-negative.")
+        raise ValueError(VALIDATION_MESSAGES["negative_amount"])
 
     if (validated_df["Maturity (Months)"] < 0).any():
-        raise ValueError("Maturity (Months) values must be non-negative.")
+        raise ValueError(VALIDATION_MESSAGES["negative_maturity"])
 
     if (validated_df["Duration (Years)"] < 0).any():
-        raise ValueError("Duration (Years) values must be non-negative.")
+        raise ValueError(VALIDATION_MESSAGES["negative_duration"])
 
     return validated_df
 
 
+def compact_balance_sheet(df: pd.DataFrame) -> pd.DataFrame:
+    """Store the low-cardinality text columns of a validated frame as categoricals."""
+    return df.astype({col: "category" for col in CATEGORICAL_COLUMNS})
+
+
 def assign_maturity_bucket(
     series: pd.Series,
     bins: Sequence[float] | None = None,
@@ -100,37 +148,272 @@ def format_currency_columns(df: pd.DataFrame, columns: Iterable[str]):
     return df.style.format(fmt)
 
 
-def summarize_balance_sheet(df: pd.DataFrame) -> dict:
-    """Compute high-level balance sheet KPIs used on the Overview page."""
-    assets = df.loc[df["Type"] == "Asset"]
-    liabilities = df.loc[df["Type"] == "Liability"]
-
-    total_assets = float(assets["Amount ($)"].sum())
-    total_liabilities = float(liabilities["Amount ($)"].sum())
-    equity = total_assets - total_liabilities
-
-    asset_yield = weighted_average(assets["Rate (%)"], assets["Amount ($)"])
-    liability_cost = weighted_average(liabilities["Rate (%)"], liabilities["Amount ($)"])
-    asset_duration = weighted_average(assets["Duration (Years)"], assets["Amount ($)"])
-    liability_duration = weighted_average(
-        liabilities["Duration (Years)"], liabilities["Amount ($)"]
+@dataclass(frozen=True)
+class MaturityLadder:
+    """
+    A maturity bucket scheme: right-closed bin edges in months plus labels.
+
+    Edges may be fractional months, so day-level buckets are just edges of
+    ``days / DAYS_PER_MONTH``.
+    """
+
+    bins: tuple[float, ...]
+    labels: tuple[str, ...]
+
+    def __post_init__(self):
+        object.__setattr__(self, "bins", tuple(float(edge) for edge in self.bins))
+        object.__setattr__(self, "labels", tuple(str(label) for label in self.labels))
+        if len(self.bins) != len(self.labels) + 1:
+            raise ValueError("A bucket scheme needs one more bin edge than labels.")
+        if np.any(np.diff(self.bins) <= 0):
+            raise ValueError("Bucket edges must be strictly increasing.")
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+def _month_band_label(lower: float, upper: float) -> str:
+    if np.isinf(upper):
+        return f">{lower:g}M"
+    return f"{lower:.3g}-{upper:g}M"
+
+
+def liquidity_ladder(
+    daily_days: int = 30,
+    weekly_until_months: float = 3,
+    tail_bins: Sequence[float] = MATURITY_BINS_STANDARD,
+    tail_labels: Sequence[str] = MATURITY_LABELS_STANDARD,
+) -> MaturityLadder:
+    """
+    Daily buckets to *daily_days*, weekly buckets to *weekly_until_months*, then *tail_bins*.
+
+    Weekly buckets only run past the daily section, never into it. Tail
+    bands that start inside the daily/weekly section are cut at its end and
+    relabelled; the rest keep *tail_labels*.
+    """
+    weekly_end_days = weekly_until_months * DAYS_PER_MONTH
+    # The daily section is always kept; weekly buckets only run on past it.
+    end_days = max(weekly_end_days, daily_days)
+    daily_edges = np.arange(0, min(daily_days, np.floor(end_days)) + 1)
+    weekly_edges = np.arange(daily_edges[-1] + 7, end_days, 7)
+    day_edges = np.concatenate([daily_edges, weekly_edges]).astype(float)
+    # A trailing remainder shorter than a week (or, after the daily section,
+    # shorter than a day) joins the last bucket instead of forming a sliver.
+    remainder = end_days - day_edges[-1]
+    if len(day_edges) > 1 and (remainder < 1 or (len(weekly_edges) and remainder < 7)):
+        day_edges[-1] = end_days
+    elif remainder > 0:
+        day_edges = np.append(day_edges, end_days)
+
+    lower, upper = np.floor(day_edges[:-1]).astype(int) + 1, np.floor(day_edges[1:]).astype(int)
+    labels = np.where(lower == upper, np.char.add("Day ", lower.astype(str)), "")
+    ranged = lower != upper
+    labels[ranged] = [f"Days {low}-{high}" for low, high in zip(lower[ranged], upper[ranged])]
+
+    bins = list(day_edges / DAYS_PER_MONTH)
+    if len(bins) > 1 and end_days == weekly_end_days:
+        bins[-1] = float(weekly_until_months)
+    labels = list(labels)
+    for edge, upper_edge, label in zip(tail_bins[:-1], tail_bins[1:], tail_labels):
+        if upper_edge <= bins[-1]:
+            continue
+        if edge < bins[-1] and len(bins) > 1 and (upper_edge - bins[-1]) * DAYS_PER_MONTH < 1:
+            # Less than a day to the tail edge: extend the last day bucket to it.
+            bins[-1] = float(upper_edge)
+            continue
+        labels.append(label if edge >= bins[-1] else _month_band_label(bins[-1], upper_edge))
+        bins.append(upper_edge)
+    return MaturityLadder(tuple(bins), tuple(labels))
+
+
+STANDARD_LADDER = MaturityLadder(tuple(MATURITY_BINS_STANDARD), tuple(MATURITY_LABELS_STANDARD))
+EXTENDED_LADDER = MaturityLadder(tuple(MATURITY_BINS_EXTENDED), tuple(MATURITY_LABELS_EXTENDED))
+MATURITY_LADDERS = {
+    "Standard": STANDARD_LADDER,
+    "Extended": EXTENDED_LADDER,
+    "Daily / Weekly": liquidity_ladder(),
+}
+
+
+def maturity_bucket_codes(maturity, bins: Sequence[float] | None = None) -> np.ndarray:
+    """
+    Integer bucket index per maturity, matching :func:`assign_maturity_bucket`.
+
+    Buckets are right-closed with the lowest edge included; values outside
+    the bins get -1.
+    """
+    edges = np.asarray(MATURITY_BINS_STANDARD if bins is None else bins, dtype=float)
+    maturity = np.asarray(maturity, dtype=float)
+    codes = np.searchsorted(edges, maturity, side="left") - 1
+    codes[maturity == edges[0]] = 0
+    codes[(maturity < edges[0]) | (maturity > edges[-1]) | np.isnan(maturity)] = -1
+    return codes
+
+
+def bucket_type_slots(bucket_codes, type_codes, n_buckets: int) -> np.ndarray:
+    """
+    Flat (bucket, type) slot per position for :func:`sum_by_bucket_type`.
+
+    Positions with no bucket or a type outside ``BALANCE_TYPES`` share a
+    trailing overflow slot that is dropped when summing.
+    """
+    n_types = len(BALANCE_TYPES)
+    bucket_codes = np.asarray(bucket_codes, dtype=np.int64)
+    type_codes = np.asarray(type_codes, dtype=np.int64)
+    valid = (bucket_codes >= 0) & (type_codes >= 0) & (type_codes < n_types)
+    return np.where(valid, bucket_codes * n_types + type_codes, n_buckets * n_types)
+
+
+def sum_by_bucket_type(values, slots: np.ndarray, labels: Sequence[str]) -> pd.DataFrame:
+    """Sum *values* by bucket (rows, *labels*) and ``BALANCE_TYPES`` (columns) in one bincount."""
+    n_types = len(BALANCE_TYPES)
+    sums = np.bincount(
+        slots,
+        weights=np.asarray(values, dtype=float),
+        minlength=(len(labels) + 1) * n_types,
+    )
+    return pd.DataFrame(
+        sums[: len(labels) * n_types].reshape(len(labels), n_types),
+        index=pd.CategoricalIndex(labels, categories=labels, ordered=True, name="Bucket"),
+        columns=pd.Index(BALANCE_TYPES, name="Type"),
+    )
+
+
+def bucket_type_sums(
+    values,
+    maturity,
+    types,
+    bins: Sequence[float] | None = None,
+    labels: Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """Sum *values* by maturity bucket (rows) and ``BALANCE_TYPES`` (columns)."""
+    use_labels = list(labels) if labels is not None else MATURITY_LABELS_STANDARD
+    slots = bucket_type_slots(
+        maturity_bucket_codes(maturity, bins), balance_sheet_type_codes(types), len(use_labels)
+    )
+    return sum_by_bucket_type(values, slots, use_labels)
+
+
+@dataclass(frozen=True)
+class BalanceSheetStats:
+    """
+    Per-Type sums from which every balance-sheet KPI is derived.
+
+    Stats are additive, so chunk or delta results can be combined with ``+``.
+    """
+
+    asset_amount: float = 0.0
+    asset_rate_amount: float = 0.0
+    asset_duration_amount: float = 0.0
+    liability_amount: float = 0.0
+    liability_rate_amount: float = 0.0
+    liability_duration_amount: float = 0.0
+
+    def __add__(self, other: "BalanceSheetStats") -> "BalanceSheetStats":
+        return BalanceSheetStats(
+            *(getattr(self, f.name) + getattr(other, f.name) for f in fields(self))
+        )
+
+    def __sub__(self, other: "BalanceSheetStats") -> "BalanceSheetStats":
+        return BalanceSheetStats(
+            *(getattr(self, f.name) - getattr(other, f.name) for f in fields(self))
+        )
+
+    @staticmethod
+    def _ratio(numerator: float, denominator: float) -> float:
+        return numerator / denominator if denominator else 0.0
+
+    @property
+    def asset_yield(self) -> float:
+        return self._ratio(self.asset_rate_amount, self.asset_amount)
+
+    @property
+    def liability_cost(self) -> float:
+        return self._ratio(self.liability_rate_amount, self.liability_amount)
+
+    @property
+    def asset_duration(self) -> float:
+        return self._ratio(self.asset_duration_amount, self.asset_amount)
+
+    @property
+    def liability_duration(self) -> float:
+        return self._ratio(self.liability_duration_amount, self.liability_amount)
+
+
+def stats_from_arrays(
+    type_codes: np.ndarray,
+    amount: np.ndarray,
+    rate: np.ndarray,
+    duration: np.ndarray,
+) -> BalanceSheetStats:
+    """
+    Aggregation kernel behind :class:`BalanceSheetStats`.
+
+    *type_codes* index ``BALANCE_TYPES``; any other code (e.g. -1) is ignored.
+    All six sums come out of one weighted bincount over (type, measure) slots.
+    """
+    n_types = len(BALANCE_TYPES)
+    codes = np.asarray(type_codes, dtype=np.int64)
+    # Unknown types land in a trailing overflow group that is dropped below.
+    codes = np.where((codes >= 0) & (codes < n_types), codes, n_types)
+    amount = np.asarray(amount, dtype=float)
+    weighted = np.stack([amount, np.asarray(rate) * amount, np.asarray(duration) * amount])
+    slots = codes * 3 + np.arange(3)[:, None]
+    sums = np.bincount(slots.ravel(), weights=weighted.ravel(), minlength=3 * (n_types + 1))
+    return BalanceSheetStats(*(float(value) for value in sums[: 3 * n_types]))
+
+
+def balance_sheet_type_codes(types) -> np.ndarray:
+    """Encode a Type column as ``BALANCE_TYPES`` indices (-1 for anything else)."""
+    types = pd.Series(types)
+    type_index = pd.Index(BALANCE_TYPES)
+    if isinstance(types.dtype, pd.CategoricalDtype):
+        # Map the handful of categories, then gather; code -1 hits the trailing -1.
+        lookup = np.append(type_index.get_indexer(types.cat.categories), -1)
+        return lookup[types.cat.codes.to_numpy()]
+    return type_index.get_indexer(types)
+
+
+def balance_sheet_stats(df: pd.DataFrame) -> BalanceSheetStats:
+    """Compute every per-Type sum in a single grouped pass over *df*."""
+    return stats_from_arrays(
+        balance_sheet_type_codes(df["Type"]),
+        df["Amount ($)"].to_numpy(dtype=float),
+        df["Rate (%)"].to_numpy(dtype=float),
+        df["Duration (Years)"].to_numpy(dtype=float),
     )
 
+
+def _as_stats(data) -> BalanceSheetStats:
+    if isinstance(data, BalanceSheetStats):
+        return data
+    if isinstance(data, pd.DataFrame):
+        return balance_sheet_stats(data)
+    # Array-backed containers such as positions.PositionStore cache their own stats.
+    return data.stats
+
+
+def summarize_balance_sheet(df: pd.DataFrame | BalanceSheetStats) -> dict:
+    """Compute high-level balance sheet KPIs used on the Overview page."""
+    stats = _as_stats(df)
+    total_assets = stats.asset_amount
+    equity = total_assets - stats.liability_amount
+
     return {
         "total_assets": total_assets,
-        "total_liabilities": total_liabilities,
+        "total_liabilities": stats.liability_amount,
         "equity": equity,
         "equity_ratio": (equity / total_assets * 100) if total_assets else 0.0,
-        "asset_yield": asset_yield,
-        "liability_cost": liability_cost,
-        "net_interest_spread": asset_yield - liability_cost,
-        "asset_duration": asset_duration,
-        "liability_duration": liability_duration,
-        "simple_duration_gap": asset_duration - liability_duration,
+        "asset_yield": stats.asset_yield,
+        "liability_cost": stats.liability_cost,
+        "net_interest_spread": stats.asset_yield - stats.liability_cost,
+        "asset_duration": stats.asset_duration,
+        "liability_duration": stats.liability_duration,
+        "simple_duration_gap": stats.asset_duration - stats.liability_duration,
     }
 
 
-def calculate_duration_gap(df: pd.DataFrame) -> dict:
+def calculate_duration_gap(df: pd.DataFrame | BalanceSheetStats) -> dict:
     """
     Calculate classic ALM duration gap metrics.
 
@@ -139,19 +422,17 @@ def calculate_duration_gap(df: pd.DataFrame) -> dict:
     where DA and DL are market-value-weighted average durations of assets
     and liabilities, A is total assets, and L is total liabilities.
     """
-    assets = df.loc[df["Type"] == "Asset"]
-    liabilities = df.loc[df["Type"] == "Liability"]
-
-    total_assets = float(assets["Amount ($)"].sum())
-    total_liabilities = float(liabilities["Amount ($)"].sum())
+    stats = _as_stats(df)
+    total_assets = stats.asset_amount
+    total_liabilities = stats.liability_amount
 
     if total_assets == 0:
         raise ValueError("Total assets are zero; cannot calculate duration gap.")
     if total_liabilities == 0:
         raise ValueError("Total liabilities are zero; cannot calculate duration gap.")
 
-    da = weighted_average(assets["Duration (Years)"], assets["Amount ($)"])
-    dl = weighted_average(liabilities["Duration (Years)"], liabilities["Amount ($)"])
+    da = stats.asset_duration
+    dl = stats.liability_duration
     leverage = total_liabilities / total_assets
     duration_gap = da - leverage * dl
 
@@ -168,3 +449,9 @@ def calculate_duration_gap(df: pd.DataFrame) -> dict:
 def estimate_eve_change(duration_gap: float, total_assets: float, rate_shock_bps: float) -> float:
     """Approximate ΔEVE ≈ -Duration Gap × A × Δr for a parallel rate shock."""
     return -duration_gap * total_assets * (rate_shock_bps / 10000.0)
+
+
+def estimate_eve_change_from_stats(stats: BalanceSheetStats, rate_shock_bps: float) -> float:
+    """Duration-gap ΔEVE read straight from cached :class:`BalanceSheetStats`."""
+    metrics = calculate_duration_gap(stats)
+    return estimate_eve_change(metrics["duration_gap"], metrics["total_assets"], rate_shock_bps)
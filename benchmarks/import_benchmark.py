@@ -0,0 +1,95 @@
+"""
+Cold-import benchmark for the calculation layer.
+
+Each run imports every calculation module in a fresh interpreter and times
+it. The run fails if the median exceeds the budget or if any UI package
+(Streamlit, Plotly) was loaded on the way, since page modules only import
+those inside their ``show`` functions.
+
+    python benchmarks/import_benchmark.py --repeat 5 --budget 1.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CALC_MODULES = [
+    "alm_utils",
+    "positions",
+    "data_loader",
+    "result_cache",
+    "cash_flows",
+    "runoff",
+    "liquidity_gap",
+    "cash_flow_gap",
+    "ftp",
+    "irr",
+    "yield_curve",
+    "incremental",
+    "nii_projection",
+    "revaluation",
+    "scenario_engine",
+    "monte_carlo",
+    "duration_gap",
+    "derivatives_pricing",
+    "derivatives_book",
+    "scenario_builder",
+    "scenario_store",
+    "alm_batch",
+]
+UI_PACKAGES = ["streamlit", "plotly"]
+DEFAULT_BUDGET_SECONDS = 1.5
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({ui!r}))
+print(json.dumps({{"seconds": elapsed, "ui_packages": loaded}}))
+"""
+
+
+def measure_import(modules=None) -> dict:
+    """Time one cold import of *modules* (``CALC_MODULES`` by default) in a new interpreter."""
+    code = _CHILD.format(modules=list(modules or CALC_MODULES), ui=UI_PACKAGES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS)
+    args = parser.parse_args()
+
+    runs = [measure_import() for _ in range(args.repeat)]
+    seconds = [run["seconds"] for run in runs]
+    ui_packages = sorted({name for run in runs for name in run["ui_packages"]})
+    median = statistics.median(seconds)
+    print(f"{len(CALC_MODULES)} modules, {args.repeat} cold imports")
+    print(f"min {min(seconds):.3f}s  median {median:.3f}s  max {max(seconds):.3f}s")
+    print(f"budget {args.budget:.3f}s")
+
+    if ui_packages:
+        print(f"FAIL: calculation layer imported {', '.join(ui_packages)}")
+        return 1
+    if median > args.budget:
+        print("FAIL: median cold import is over budget")
+        return 1
+    print("ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
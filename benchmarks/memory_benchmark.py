@@ -0,0 +1,104 @@
+"""
+Peak-RSS benchmark for the calculation layer.
+
+Each configuration runs in a fresh interpreter so ``ru_maxrss`` reflects only
+that run. The reported figure is the peak RSS growth after the book and its
+position store are built, i.e. the working memory of the analytics alone.
+It should stay roughly flat as module and scenario counts grow.
+
+    python benchmarks/memory_benchmark.py --rows 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+MODULE_ORDER = ["liquidity", "cash_flow", "ftp", "irr", "duration"]
+
+
+def synthetic_book(rows: int, seed: int = 7):
+    import numpy as np
+    import pandas as pd
+
+    sample = pd.read_csv(ROOT / "data" / "sample_balance_sheet.csv")
+    rng = np.random.default_rng(seed)
+    book = sample.iloc[rng.integers(0, len(sample), rows)].reset_index(drop=True)
+    book["Amount ($)"] = book["Amount ($)"] * rng.uniform(0.5, 1.5, rows) / 1_000
+    book["Maturity (Months)"] = rng.integers(0, 361, rows).astype(float)
+    return book.astype({"Product": "category", "Type": "category"})
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_once(rows: int, modules: int, scenarios: int) -> dict:
+    import numpy as np
+
+    sys.path.insert(0, str(ROOT))
+    from alm_utils import calculate_duration_gap
+    from cash_flow_gap import build_cash_flow_gap_table
+    from ftp import build_ftp_table
+    from irr import calc_scenarios
+    from liquidity_gap import build_liquidity_gap_table
+    from positions import PositionStore
+
+    book = synthetic_book(rows)
+    positions = PositionStore.from_frame(book)
+    shifts = np.linspace(-3.0, 3.0, scenarios)
+    runners = {
+        "liquidity": lambda: build_liquidity_gap_table(positions),
+        "cash_flow": lambda: build_cash_flow_gap_table(positions),
+        "ftp": lambda: build_ftp_table(book),
+        "irr": lambda: calc_scenarios(positions, shifts, {"Fixed Mortgage": -0.01}),
+        "duration": lambda: calculate_duration_gap(positions),
+    }
+
+    baseline = _peak_rss_bytes()
+    for name in MODULE_ORDER[:modules]:
+        runners[name]()
+    return {
+        "rows": rows,
+        "modules": modules,
+        "scenarios": scenarios,
+        "book_mb": book.memory_usage(deep=True).sum() / 1e6,
+        "peak_growth_mb": (_peak_rss_bytes() - baseline) / 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--child", nargs=2, type=int, metavar=("MODULES", "SCENARIOS"))
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(args.rows, *args.child)))
+        return
+
+    print(f"{'modules':>8} {'scenarios':>10} {'book MB':>9} {'peak growth MB':>15}")
+    for modules in (1, len(MODULE_ORDER)):
+        for scenarios in (6, 60, 600):
+            command = [sys.executable, __file__, "--rows", str(args.rows)]
+            output = subprocess.run(
+                [*command, "--child", str(modules), str(scenarios)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            print(
+                f"{modules:>8} {scenarios:>10} {result['book_mb']:>9.1f} "
+                f"{result['peak_growth_mb']:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
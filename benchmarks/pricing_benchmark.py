@@ -0,0 +1,80 @@
+"""
+Wall-clock benchmark for the vectorized derivatives pricer.
+
+A random book of swaps, caps/floors, swaptions and FX forwards is priced
+on the base curve several times. The run fails if the median exceeds the
+budget.
+
+    python benchmarks/pricing_benchmark.py --trades 10000 --budget 2.0
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_TRADES = 10_000
+DEFAULT_BUDGET_SECONDS = 2.0
+
+
+def random_trade_book(n: int = DEFAULT_TRADES, seed: int = 0):
+    """A validated book of *n* random trades across every instrument."""
+    import numpy as np
+    import pandas as pd
+
+    from derivatives_pricing import TRADE_INSTRUMENTS, validate_trades
+
+    rng = np.random.default_rng(seed)
+    instruments = rng.choice(TRADE_INSTRUMENTS, n)
+    fx = instruments == "FX Forward"
+    return validate_trades(
+        pd.DataFrame(
+            {
+                "Instrument": instruments,
+                "Side": rng.choice(["Long", "Short"], n),
+                "Notional ($)": rng.uniform(1e5, 1e7, n),
+                # Swaption expiries (up to 3Y) always fall before maturity.
+                "Maturity (Months)": rng.integers(42, 121, n),
+                "Expiry (Months)": rng.integers(0, 36, n),
+                "Strike": np.where(fx, 1.1, rng.uniform(1.0, 5.0, n)),
+                "Volatility (%)": rng.uniform(10, 40, n),
+                "Currency": np.where(fx, "EUR", "USD"),
+            }
+        )
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trades", type=int, default=DEFAULT_TRADES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    from derivatives_pricing import price_trades
+
+    book = random_trade_book(args.trades)
+    seconds = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        price_trades(book)
+        seconds.append(time.perf_counter() - start)
+    median = statistics.median(seconds)
+    print(f"{args.trades:,} trades, {args.repeat} runs")
+    print(f"min {min(seconds):.3f}s  median {median:.3f}s  max {max(seconds):.3f}s")
+    print(f"budget {args.budget:.3f}s")
+
+    if median > args.budget:
+        print("FAIL: median pricing time is over budget")
+        return 1
+    print("ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,173 @@
+import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
-import streamlit as st
 
 from alm_utils import (
+    BALANCE_TYPES,
     MATURITY_BINS_EXTENDED,
     MATURITY_LABELS_EXTENDED,
-    assign_maturity_bucket,
+    bucket_type_slots,
     format_currency_columns,
+    maturity_bucket_codes,
+    sum_by_bucket_type,
+)
+from positions import as_positions
+from runoff import (
+    DEFAULT_BEHAVIORAL_RUNOFF,
+    DEFAULT_RUNOFF_HORIZON,
+    RUNOFF_PROFILES,
+    CoreVolatileSplit,
+    ExponentialDecay,
+    decay_tables_from_frame,
+    runoff_matrix,
 )
 
+RUNOFF_MODELS = ["Contractual", "Behavioral"]
 
-def show(balance_sheet):
-    st.header("Cash Flow Gap Analysis")
-    st.caption(
-        "Estimated monthly cash-flow run-off by maturity bucket for assets and liabilities."
-    )
 
-    cashflow_df = balance_sheet.copy()
-    cashflow_df["Monthly Flow"] = cashflow_df["Amount ($)"] / cashflow_df[
-        "Maturity (Months)"
-    ].replace(0, 1)
+def build_cash_flow_gap_table(balance_sheet, bins=None, labels=None) -> pd.DataFrame:
+    """
+    Straight-line monthly run-off by maturity bucket, without copying the book.
+
+    Uses the extended bucket scheme unless *bins*/*labels* are given.
+    """
+    positions = as_positions(balance_sheet)
+    if bins is None:
+        bins, labels = MATURITY_BINS_EXTENDED, MATURITY_LABELS_EXTENDED
+    maturity = np.where(positions.maturity == 0, 1, positions.maturity)
+    sums = positions.bucket_type_sums(positions.amount / maturity, bins=bins, labels=labels)
+    return cash_flow_gap_from_sums(sums)
 
-    cashflow_df["Bucket"] = assign_maturity_bucket(
-        cashflow_df["Maturity (Months)"],
-        bins=MATURITY_BINS_EXTENDED,
-        labels=MATURITY_LABELS_EXTENDED,
-    )
 
-    inflows = (
-        cashflow_df.loc[cashflow_df["Type"] == "Asset"]
-        .groupby("Bucket", observed=False)["Monthly Flow"]
-        .sum()
+def build_runoff_gap_table(
+    balance_sheet,
+    profiles: dict | None = None,
+    horizon: int = DEFAULT_RUNOFF_HORIZON,
+    bins=None,
+    labels=None,
+) -> pd.DataFrame:
+    """
+    Average monthly runoff by time bucket from the sparse runoff matrix.
+
+    Unlike :func:`build_cash_flow_gap_table`, flows are placed in the months
+    they occur: behavioral *profiles* (see :mod:`runoff`) for non-maturity
+    products, straight-line over the contractual term otherwise. Each
+    bucket reports its total runoff divided by the months it spans within
+    *horizon*.
+    """
+    positions = as_positions(balance_sheet)
+    if bins is None:
+        bins, labels = MATURITY_BINS_EXTENDED, MATURITY_LABELS_EXTENDED
+    matrix = runoff_matrix(positions, profiles, horizon)
+    flows = np.concatenate(
+        [matrix.monthly_totals(positions.type_mask(kind)) for kind in BALANCE_TYPES]
     )
-    outflows = (
-        cashflow_df.loc[cashflow_df["Type"] == "Liability"]
-        .groupby("Bucket", observed=False)["Monthly Flow"]
-        .sum()
+    month_codes = maturity_bucket_codes(np.arange(1, matrix.horizon + 1), bins)
+    slots = bucket_type_slots(
+        np.tile(month_codes, len(BALANCE_TYPES)),
+        np.repeat(np.arange(len(BALANCE_TYPES)), matrix.horizon),
+        len(labels),
     )
+    months_per_bucket = np.bincount(month_codes[month_codes >= 0], minlength=len(labels))
+    sums = sum_by_bucket_type(flows, slots, labels)
+    return cash_flow_gap_from_sums(sums.div(np.maximum(months_per_bucket, 1), axis=0))
+
 
+def cash_flow_gap_from_sums(sums: pd.DataFrame) -> pd.DataFrame:
+    """Gap table from bucket × ``BALANCE_TYPES`` monthly run-off sums."""
     gap_cf_df = pd.DataFrame(
         {
-            "Monthly Inflows ($)": inflows,
-            "Monthly Outflows ($)": outflows,
+            "Monthly Inflows ($)": sums["Asset"],
+            "Monthly Outflows ($)": sums["Liability"],
         }
     ).fillna(0)
     gap_cf_df["Net Cash Flow ($)"] = (
         gap_cf_df["Monthly Inflows ($)"] - gap_cf_df["Monthly Outflows ($)"]
     )
+    return gap_cf_df
+
+
+def _profile_row(product, profile) -> dict:
+    row = {
+        "Product": product,
+        "Profile": "Contractual",
+        "Monthly Decay (%)": 3.0,
+        "Core Share (%)": 70.0,
+        "Core Months": 84,
+    }
+    if isinstance(profile, ExponentialDecay):
+        row.update(
+            {"Profile": "Exponential Decay", "Monthly Decay (%)": profile.monthly_rate * 100}
+        )
+    elif isinstance(profile, CoreVolatileSplit):
+        row.update(
+            {
+                "Profile": "Core / Volatile",
+                "Core Share (%)": profile.core_share * 100,
+                "Core Months": profile.core_months,
+            }
+        )
+    return row
+
+
+def _edit_runoff_profiles(balance_sheet) -> dict:
+    import streamlit as st
+
+    products = list(as_positions(balance_sheet).product_labels)
+    rows = [_profile_row(product, DEFAULT_BEHAVIORAL_RUNOFF.get(product)) for product in products]
+    with st.expander("Behavioral Runoff Assumptions", expanded=True):
+        edited = st.data_editor(
+            pd.DataFrame(rows),
+            column_config={
+                "Profile": st.column_config.SelectboxColumn(
+                    options=["Contractual", "Exponential Decay", "Core / Volatile"], required=True
+                ),
+            },
+            disabled=["Product"],
+            hide_index=True,
+            use_container_width=True,
+            key="runoff_profile_editor",
+        )
+        uploaded = st.file_uploader(
+            "Decay tables (CSV with Product, Month, Runoff (%) columns)", type=["csv"]
+        )
+
+    profiles = {}
+    try:
+        for row in edited.to_dict("records"):
+            if row["Profile"] == "Exponential Decay":
+                profiles[row["Product"]] = ExponentialDecay(row["Monthly Decay (%)"] / 100)
+            elif row["Profile"] == "Core / Volatile":
+                profiles[row["Product"]] = CoreVolatileSplit(
+                    row["Core Share (%)"] / 100, core_months=int(row["Core Months"])
+                )
+        if uploaded is not None:
+            profiles.update(decay_tables_from_frame(pd.read_csv(uploaded)))
+    except ValueError as exc:
+        st.error(f"Invalid runoff assumptions: {exc}")
+        return dict(DEFAULT_BEHAVIORAL_RUNOFF)
+    return profiles
+
+
+def show(balance_sheet):
+    import plotly.graph_objs as go
+    import streamlit as st
+
+    st.header("Cash Flow Gap Analysis")
+    st.caption(
+        "Estimated monthly cash-flow run-off by maturity bucket for assets and liabilities."
+    )
+
+    runoff_model = st.radio(
+        "Runoff Model",
+        RUNOFF_MODELS,
+        horizontal=True,
+        help="Behavioral runs non-maturity deposits off by profile "
+        f"({', '.join(RUNOFF_PROFILES)}) and buckets flows by the month they occur.",
+    )
+    if runoff_model == "Behavioral":
+        gap_cf_df = build_runoff_gap_table(balance_sheet, _edit_runoff_profiles(balance_sheet))
+    else:
+        gap_cf_df = build_cash_flow_gap_table(balance_sheet)
 
     st.dataframe(
         format_currency_columns(
@@ -0,0 +1,177 @@
+"""Vectorized contractual cash flow schedules for balance sheet positions."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from positions import PositionStore, as_positions
+
+BULLET = "bullet"
+LEVEL_PAY = "level"
+LINEAR = "linear"
+AMORTIZATION_TYPES = [BULLET, LEVEL_PAY, LINEAR]
+
+DEFAULT_AMORTIZATION = {
+    "Fixed Mortgage": LEVEL_PAY,
+    "Commercial Loan": LINEAR,
+}
+
+# Upper bound on positions × months cells materialized per schedule block.
+DEFAULT_BLOCK_CELLS = 4_000_000
+
+
+def amortization_codes(positions: PositionStore, amortization: dict | None = None) -> np.ndarray:
+    """Map each position's product to an index into ``AMORTIZATION_TYPES`` (bullet by default)."""
+    mapping = DEFAULT_AMORTIZATION if amortization is None else amortization
+    codes = {product: AMORTIZATION_TYPES.index(kind) for product, kind in mapping.items()}
+    return positions.map_products(codes, default=AMORTIZATION_TYPES.index(BULLET)).astype(np.int8)
+
+
+def contract_terms(maturity: np.ndarray) -> np.ndarray:
+    """Whole-month payment terms; zero-maturity balances settle in month one."""
+    return np.maximum(np.ceil(np.asarray(maturity, dtype=float)), 1).astype(np.int64)
+
+
+def _iter_blocks(amount, monthly_rate, terms, codes, horizon, max_cells):
+    """
+    Time-step the schedules of all positions together, one month at a time.
+
+    Positions are ordered by descending term, so the loans still outstanding
+    in any month are a prefix of that order and each step only touches live
+    rows. Each month costs a handful of vector operations; months are
+    gathered into blocks for callers that want matrix-shaped output.
+    """
+    order = np.argsort(-terms, kind="stable")
+    terms = terms[order]
+    rate = np.asarray(monthly_rate, dtype=float)[order]
+    balance = np.asarray(amount, dtype=float)[order].copy()
+    codes = codes[order]
+
+    # Level-pay loans pay a fixed annuity; linear loans a fixed principal slice.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = balance * rate / -np.expm1(-terms * np.log1p(rate))
+    is_level = codes == AMORTIZATION_TYPES.index(LEVEL_PAY)
+    is_linear = (codes == AMORTIZATION_TYPES.index(LINEAR)) | (is_level & (rate <= 0))
+    payment = np.where(is_level & ~is_linear, annuity, 0.0)
+    fixed_principal = np.where(is_linear, balance / terms, 0.0)
+    pays_annuity = (payment > 0).astype(float)
+
+    last_month = int(terms.max(initial=0)) if horizon is None else int(horizon)
+    live_counts = np.searchsorted(-terms, -np.arange(last_month + 2), side="right")
+
+    start = 1
+    while start <= last_month and live_counts[start]:
+        live = live_counts[start]
+        width = max(1, min(max_cells // live, last_month - start + 1))
+        months = np.arange(start, start + width)
+        # Column-major, so each month's writes are contiguous.
+        principal = np.zeros((live, width), order="F")
+        interest = np.zeros((live, width), order="F")
+        for column, month in enumerate(months):
+            n, maturing = live_counts[month], live_counts[month + 1]
+            outstanding = balance[:n]
+            month_interest = interest[:n, column]
+            month_principal = principal[:n, column]
+            np.multiply(outstanding, rate[:n], out=month_interest)
+            np.subtract(payment[:n], month_interest, out=month_principal)
+            month_principal *= pays_annuity[:n]
+            month_principal += fixed_principal[:n]
+            # Loans maturing this month are the tail of the live prefix; they repay in full.
+            month_principal[maturing:] = outstanding[maturing:]
+            outstanding -= month_principal
+        yield order[:live], months, principal, interest
+        start += width
+
+
+def iter_cash_flow_blocks(
+    balance_sheet,
+    amortization: dict | None = None,
+    horizon: int | None = None,
+    max_cells: int = DEFAULT_BLOCK_CELLS,
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Yield ``(rows, months, principal, interest)`` blocks of the schedule.
+
+    *rows* indexes the positions still outstanding at the block's first
+    month; *principal* and *interest* are ``len(rows) × len(months)``.
+    Blocks are sized so no more than *max_cells* cells exist at once, which
+    keeps memory bounded on million-position books with 30-year terms.
+    """
+    positions = as_positions(balance_sheet)
+    yield from _iter_blocks(
+        positions.amount,
+        positions.rate / 1200.0,
+        contract_terms(positions.maturity),
+        amortization_codes(positions, amortization),
+        horizon,
+        max_cells,
+    )
+
+
+@dataclass(frozen=True)
+class ScheduleGroups:
+    """
+    Distinct (amortization, rate, term) schedule shapes in a book.
+
+    A position's cash flows are its amount times the unit schedule of its
+    shape, so anything linear in cash flows can be computed once per shape
+    and gathered back through ``inverse``. Mortgage books with millions of
+    loans typically have only thousands of shapes.
+    """
+
+    inverse: np.ndarray
+    monthly_rate: np.ndarray
+    terms: np.ndarray
+    codes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def iter_unit_blocks(self, horizon: int | None = None, max_cells: int = DEFAULT_BLOCK_CELLS):
+        """:func:`iter_cash_flow_blocks` over one unit of each shape."""
+        yield from _iter_blocks(
+            np.ones(len(self)), self.monthly_rate, self.terms, self.codes, horizon, max_cells
+        )
+
+
+def schedule_groups(balance_sheet, amortization: dict | None = None) -> ScheduleGroups:
+    """Factorize positions into their distinct unit cash flow schedules."""
+    positions = as_positions(balance_sheet)
+    terms = contract_terms(positions.maturity)
+    codes = amortization_codes(positions, amortization)
+    rate_codes, rates = pd.factorize(positions.rate)
+    key = (rate_codes.astype(np.int64) * (int(terms.max(initial=0)) + 1) + terms) * len(
+        AMORTIZATION_TYPES
+    ) + codes
+    inverse, unique_keys = pd.factorize(key)
+    first = np.zeros(len(unique_keys), dtype=np.int64)
+    first[inverse[::-1]] = np.arange(len(inverse))[::-1]
+    return ScheduleGroups(
+        inverse=inverse,
+        monthly_rate=np.asarray(rates, dtype=float)[rate_codes[first]] / 1200.0,
+        terms=terms[first],
+        codes=codes[first],
+    )
+
+
+def cash_flow_matrix(
+    balance_sheet,
+    amortization: dict | None = None,
+    horizon: int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Dense positions × months principal and interest arrays (for modest books)."""
+    positions = as_positions(balance_sheet)
+    if horizon is None:
+        horizon = int(contract_terms(positions.maturity).max(initial=0))
+    principal = np.zeros((len(positions), horizon))
+    interest = np.zeros((len(positions), horizon))
+    for rows, months, block_principal, block_interest in iter_cash_flow_blocks(
+        positions, amortization, horizon=horizon
+    ):
+        principal[rows, months[0] - 1 : months[-1]] = block_principal
+        interest[rows, months[0] - 1 : months[-1]] = block_interest
+    return principal, interest
@@ -0,0 +1,490 @@
+"""Fingerprinted, cached loading of balance sheet files.
+
+Parsed and validated frames are kept in a process-wide LRU cache keyed by a
+content fingerprint, so every Streamlit session on the server reuses the same
+frame for the same file. Cached frames are shared and must be treated as
+read-only by callers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from alm_utils import (
+    CATEGORICAL_COLUMNS,
+    NUMERIC_COLUMNS,
+    REQUIRED_COLUMNS,
+    VALIDATION_MESSAGES,
+    BalanceSheetStats,
+    balance_sheet_stats,
+    balance_sheet_type_codes,
+    coerce_numeric_columns,
+    compact_balance_sheet,
+    stats_from_arrays,
+    summarize_balance_sheet,
+)
+from positions import PositionStore
+
+DEFAULT_CACHE_BYTES = 1024**3
+MAX_CACHED_ERRORS = 32
+HASH_BLOCK_BYTES = 8 * 1024**2
+PARQUET_MAGIC = b"PAR1"
+ARROW_MAGIC = b"ARROW1"
+SUPPORTED_SUFFIXES = ["csv", "parquet", "feather", "arrow"]
+DEFAULT_CHUNK_ROWS = 250_000
+DEFAULT_MAX_EXAMPLES = 5
+
+
+class BalanceSheetValidationError(ValueError):
+    """Validation failure carrying the row-level :class:`ValidationReport`."""
+
+    def __init__(self, report: "ValidationReport"):
+        super().__init__(report.describe())
+        self.report = report
+
+
+@dataclass
+class Dataset:
+    """A validated balance sheet plus artifacts derived from it."""
+
+    fingerprint: str
+    frame: pd.DataFrame
+    nbytes: int
+    derived: dict[str, Any] = field(default_factory=dict)
+
+    def memo(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Return the artifact stored under *key*, building it on first use."""
+        if key not in self.derived:
+            self.derived[key] = factory()
+        return self.derived[key]
+
+
+class BalanceSheetCache:
+    """Thread-safe LRU of :class:`Dataset` objects bounded by frame memory."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: OrderedDict[str, Dataset] = OrderedDict()
+        self._errors: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._entries
+
+    def get(self, fingerprint: str) -> Dataset | None:
+        with self._lock:
+            dataset = self._entries.get(fingerprint)
+            if dataset is not None:
+                self._entries.move_to_end(fingerprint)
+            return dataset
+
+    def put(self, dataset: Dataset) -> Dataset:
+        """Insert *dataset*, keeping an existing entry if another session won the race."""
+        with self._lock:
+            existing = self._entries.get(dataset.fingerprint)
+            if existing is not None:
+                self._entries.move_to_end(dataset.fingerprint)
+                return existing
+            self._entries[dataset.fingerprint] = dataset
+            self.total_bytes += dataset.nbytes
+            # Always keep the newest entry, even if it alone exceeds the budget.
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+            return dataset
+
+    def find_frame(self, frame: pd.DataFrame) -> Dataset | None:
+        with self._lock:
+            for dataset in self._entries.values():
+                if dataset.frame is frame:
+                    return dataset
+        return None
+
+    def error_for(self, fingerprint: str) -> str | None:
+        with self._lock:
+            return self._errors.get(fingerprint)
+
+    def record_error(self, fingerprint: str, message: str) -> None:
+        with self._lock:
+            self._errors[fingerprint] = message
+            while len(self._errors) > MAX_CACHED_ERRORS:
+                self._errors.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._errors.clear()
+            self.total_bytes = 0
+
+
+_CACHE = BalanceSheetCache()
+
+
+def get_cache() -> BalanceSheetCache:
+    """Return the process-wide cache shared by all dashboard sessions."""
+    return _CACHE
+
+
+def fingerprint_source(source) -> str:
+    """
+    Fingerprint raw bytes, a binary file object, or a filesystem path.
+
+    Bytes and file objects are hashed by content. Paths are keyed by resolved
+    location, size and modification time so large files are not re-read.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = Path(source).resolve()
+        stat = path.stat()
+        key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")
+        return "path-" + hashlib.blake2b(key, digest_size=16).hexdigest()
+
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif hasattr(source, "getbuffer"):
+        digest.update(source.getbuffer())
+    else:
+        position = source.tell()
+        for block in iter(lambda: source.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+def sniff_format(source) -> str:
+    """Return ``"parquet"``, ``"feather"`` or ``"csv"`` from the leading magic bytes."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as handle:
+            head = handle.read(len(ARROW_MAGIC))
+    else:
+        position = source.tell()
+        head = source.read(len(ARROW_MAGIC))
+        source.seek(position)
+    if head.startswith(PARQUET_MAGIC):
+        return "parquet"
+    if head.startswith(ARROW_MAGIC):
+        return "feather"
+    return "csv"
+
+
+def _read_parquet(source) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source, read_dictionary=CATEGORICAL_COLUMNS)
+    columns = [col for col in REQUIRED_COLUMNS if col in parquet_file.schema_arrow.names]
+    return parquet_file.read(columns=columns).to_pandas()
+
+
+def _read_feather(source) -> pd.DataFrame:
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+
+    schema = ipc.open_file(source).schema
+    if hasattr(source, "seek"):
+        source.seek(0)
+    columns = [col for col in REQUIRED_COLUMNS if col in schema.names]
+    table = feather.read_table(source, columns=columns)
+    for col in CATEGORICAL_COLUMNS:
+        if col in columns:
+            index = table.schema.get_field_index(col)
+            table = table.set_column(index, col, table.column(col).dictionary_encode())
+    return table.to_pandas()
+
+
+def read_balance_sheet(source, file_format: str | None = None) -> pd.DataFrame:
+    """
+    Parse *source* into a raw (unvalidated) dataframe.
+
+    CSV, Parquet and Arrow IPC (Feather) inputs are supported; the format is
+    sniffed from the file header unless *file_format* is given. Only
+    ``REQUIRED_COLUMNS`` are read, with ``Product``/``Type`` as categoricals.
+    Parquet and Feather need ``pyarrow``.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+
+    file_format = file_format or sniff_format(source)
+    if file_format == "parquet":
+        return _read_parquet(source)
+    if file_format == "feather":
+        return _read_feather(source)
+    if file_format != "csv":
+        raise ValueError(f"Unsupported balance sheet format: {file_format}")
+    return pd.read_csv(
+        source,
+        usecols=lambda col: col in REQUIRED_COLUMNS,
+        dtype={col: "category" for col in CATEGORICAL_COLUMNS},
+    )
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of a chunked validation pass over a balance sheet file."""
+
+    rows: int = 0
+    missing_columns: list[str] = field(default_factory=list)
+    violations: dict[str, list[int]] = field(
+        default_factory=lambda: {rule: [] for rule in VALIDATION_MESSAGES}
+    )
+    counts: dict[str, int] = field(default_factory=lambda: dict.fromkeys(VALIDATION_MESSAGES, 0))
+    stats: BalanceSheetStats = field(default_factory=BalanceSheetStats)
+    frame: pd.DataFrame | None = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing_columns and not any(self.counts.values())
+
+    def summary(self) -> dict:
+        """Overview KPIs accumulated from the valid rows of the same pass."""
+        return summarize_balance_sheet(self.stats)
+
+    def describe(self) -> str:
+        if self.missing_columns:
+            return f"Missing required columns: {', '.join(self.missing_columns)}"
+        problems = []
+        for rule, count in self.counts.items():
+            if count:
+                rows = ", ".join(str(row) for row in self.violations[rule])
+                more = ", ..." if count > len(self.violations[rule]) else ""
+                problems.append(
+                    f"{VALIDATION_MESSAGES[rule]} ({count:,} rows; first at rows {rows}{more})"
+                )
+        return " ".join(problems)
+
+    def raise_for_errors(self) -> None:
+        if not self.ok:
+            raise BalanceSheetValidationError(self)
+
+
+def iter_balance_sheet_chunks(
+    source,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    file_format: str | None = None,
+):
+    """Yield projected raw chunks of at most *chunk_rows* rows from *source*."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+
+    file_format = file_format or sniff_format(source)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source, read_dictionary=CATEGORICAL_COLUMNS)
+        columns = [col for col in REQUIRED_COLUMNS if col in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    elif file_format == "feather":
+        import pyarrow.ipc as ipc
+
+        reader = ipc.open_file(source)
+        columns = [col for col in REQUIRED_COLUMNS if col in reader.schema.names]
+        for index in range(reader.num_record_batches):
+            batch = reader.get_batch(index).select(columns)
+            for start in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(start, chunk_rows).to_pandas()
+    elif file_format == "csv":
+        yield from pd.read_csv(
+            source,
+            usecols=lambda col: col in REQUIRED_COLUMNS,
+            dtype={col: "category" for col in CATEGORICAL_COLUMNS},
+            chunksize=chunk_rows,
+        )
+    else:
+        raise ValueError(f"Unsupported balance sheet format: {file_format}")
+
+
+def _record(
+    report: ValidationReport,
+    rule: str,
+    mask: np.ndarray,
+    offset: int,
+    max_examples: int,
+) -> None:
+    count = int(np.count_nonzero(mask))
+    if not count:
+        return
+    report.counts[rule] += count
+    examples = report.violations[rule]
+    if len(examples) < max_examples:
+        rows = np.flatnonzero(mask)[: max_examples - len(examples)] + offset
+        examples.extend(int(row) for row in rows)
+
+
+def validate_balance_sheet_file(
+    source,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    max_examples: int = DEFAULT_MAX_EXAMPLES,
+    collect: bool = False,
+    file_format: str | None = None,
+) -> ValidationReport:
+    """
+    Validate a CSV, Parquet or Feather balance sheet in bounded-memory chunks.
+
+    Every rule of :func:`alm_utils.validate_balance_sheet` is evaluated on
+    each chunk's arrays in one pass. The report keeps per-rule counts and the
+    first *max_examples* offending zero-based row numbers, plus the running
+    :class:`BalanceSheetStats` behind the Overview KPIs. With *collect*, validated chunks are also
+    compacted and concatenated into ``report.frame``. Collection stops at the
+    first invalid row, and ``report.frame`` stays ``None`` for a file that
+    fails validation.
+    """
+    report = ValidationReport()
+    chunks = []
+
+    for chunk in iter_balance_sheet_chunks(source, chunk_rows, file_format):
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+        if missing_columns:
+            report.missing_columns = missing_columns
+            return report
+
+        chunk = coerce_numeric_columns(chunk[REQUIRED_COLUMNS])
+        amount, rate, duration, maturity = (
+            chunk[col].to_numpy(dtype=float, na_value=np.nan) for col in NUMERIC_COLUMNS
+        )
+        type_codes = balance_sheet_type_codes(chunk["Type"])
+
+        rule_masks = {
+            "non_numeric": (
+                np.isnan(amount) | np.isnan(rate) | np.isnan(duration) | np.isnan(maturity)
+            ),
+            "invalid_type": type_codes < 0,
+            "negative_amount": amount < 0,
+            "negative_maturity": maturity < 0,
+            "negative_duration": duration < 0,
+        }
+        invalid = np.zeros(len(chunk), dtype=bool)
+        for rule, mask in rule_masks.items():
+            _record(report, rule, mask, report.rows, max_examples)
+            invalid |= mask
+
+        valid_codes = np.where(invalid, -1, type_codes)
+        report.stats = report.stats + stats_from_arrays(valid_codes, amount, rate, duration)
+
+        report.rows += len(chunk)
+        if collect and report.ok:
+            chunks.append(compact_balance_sheet(chunk))
+        elif chunks:
+            # A file with errors is rejected, so its collected rows are released.
+            chunks.clear()
+
+    if collect and report.ok:
+        report.frame = _concat_chunks(chunks)
+    return report
+
+
+def _concat_chunks(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compacted chunks, keeping text columns categorical across chunks."""
+    if not chunks:
+        return pd.DataFrame(columns=REQUIRED_COLUMNS)
+    # Plain concat falls back to object columns when chunk categories differ.
+    frame = pd.concat([chunk[NUMERIC_COLUMNS] for chunk in chunks], ignore_index=True)
+    for column in CATEGORICAL_COLUMNS:
+        frame[column] = union_categoricals(
+            [chunk[column] for chunk in chunks], sort_categories=True
+        )
+    return frame[REQUIRED_COLUMNS]
+
+
+def load_dataset(
+    source,
+    fingerprint: str | None = None,
+    cache: BalanceSheetCache | None = None,
+) -> Dataset:
+    """
+    Return the validated, compacted dataset for *source*.
+
+    The file is read and validated in one chunked pass, whose running stats
+    seed the dataset's cached KPI aggregates. Pass a precomputed *fingerprint*
+    to skip hashing on repeat calls. Raises
+    :class:`BalanceSheetValidationError` (a ``ValueError``) for files that
+    fail validation; failures are remembered so a bad upload is not re-parsed
+    on every rerun.
+    """
+    cache = cache or _CACHE
+    fingerprint = fingerprint or fingerprint_source(source)
+
+    dataset = cache.get(fingerprint)
+    if dataset is not None:
+        return dataset
+    message = cache.error_for(fingerprint)
+    if message is not None:
+        raise ValueError(message)
+
+    try:
+        report = validate_balance_sheet_file(source, collect=True)
+        report.raise_for_errors()
+    except ValueError as exc:
+        cache.record_error(fingerprint, str(exc))
+        raise
+
+    frame = report.frame
+    nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+    dataset = Dataset(fingerprint=fingerprint, frame=frame, nbytes=nbytes)
+    dataset.derived["stats"] = report.stats
+    return cache.put(dataset)
+
+
+def load_balance_sheet(source, fingerprint: str | None = None) -> pd.DataFrame:
+    """Return the cached, validated frame for *source* (see :func:`load_dataset`)."""
+    return load_dataset(source, fingerprint).frame
+
+
+def dataset_stats(frame: pd.DataFrame) -> BalanceSheetStats:
+    """Return the KPI aggregates for *frame*, cached with its dataset."""
+    return memoize_for_frame(frame, "stats", lambda: balance_sheet_stats(frame))
+
+
+def dataset_positions(frame: pd.DataFrame, float32: bool = False) -> PositionStore:
+    """Return the compact :class:`PositionStore` for *frame*, cached with its dataset."""
+    key = "positions-float32" if float32 else "positions"
+    return memoize_for_frame(frame, key, lambda: PositionStore.from_frame(frame, float32=float32))
+
+
+def dataset_fingerprint(data) -> str:
+    """
+    Content fingerprint of a balance sheet frame or ``PositionStore``.
+
+    Loader frames reuse their dataset's fingerprint; stores and other
+    frames are hashed by content.
+    """
+    if isinstance(data, PositionStore):
+        return data.fingerprint
+    dataset = _CACHE.find_frame(data)
+    if dataset is not None:
+        return dataset.fingerprint
+    hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    digest = hashlib.blake2b(hashed, digest_size=16)
+    digest.update("\x1f".join(map(str, data.columns)).encode("utf-8"))
+    return "frame-" + digest.hexdigest()
+
+
+def memoize_for_frame(frame: pd.DataFrame, key: str, factory: Callable[[], Any]) -> Any:
+    """
+    Cache *factory()* alongside *frame* when it came from the dataset cache.
+
+    Frames that were not produced by the loader are computed fresh each call,
+    since nothing guarantees they are not mutated between calls.
+    """
+    dataset = _CACHE.find_frame(frame)
+    if dataset is None:
+        return factory()
+    return dataset.memo(key, factory)
@@ -1,31 +1,97 @@
+import time
+
 import pandas as pd
-import plotly.graph_objs as go
-import streamlit as st
 
+from derivatives_pricing import (
+    DEFAULT_FX_MARKET,
+    TRADE_COLUMNS,
+    TRADE_DEFAULTS,
+    price_trades,
+    read_trades,
+    validate_trades,
+)
 
 SAMPLE_DERIVATIVES = {
-    "Instrument": ["IRS", "Caps", "Swaptions", "FX Forward", "FX Swap"],
+    "Trade ID": ["IRS-1", "CAP-1", "SWPN-1", "FXF-1", "FXF-2"],
+    "Instrument": ["Swap", "Cap", "Payer Swaption", "FX Forward", "FX Forward"],
+    "Side": ["Long", "Long", "Long", "Long", "Short"],
     "Notional ($)": [10_000_000, 5_000_000, 2_000_000, 3_000_000, 4_000_000],
-    "Maturity (Months)": [60, 36, 24, 12, 6],
-    "Type": ["Interest Rate", "Interest Rate", "Interest Rate", "FX", "FX"],
-    "MTM ($)": [250_000, 50_000, 30_000, 15_000, 20_000],
-    "Delta": [0.8, 0.5, 0.6, 0.7, 0.65],
+    "Maturity (Months)": [60, 36, 84, 12, 6],
+    "Expiry (Months)": [0, 0, 24, 0, 0],
+    "Strike": [2.5, 3.0, 2.8, 1.0750, 1.2650],
+    "Volatility (%)": [0.0, 22.0, 25.0, 0.0, 0.0],
+    "Currency": ["USD", "USD", "USD", "EUR", "GBP"],
 }
 
 
-def build_derivatives_book(data: dict | None = None) -> pd.DataFrame:
-    df = pd.DataFrame(data or SAMPLE_DERIVATIVES)
-    df["Delta Notional ($)"] = df["Notional ($)"] * df["Delta"]
-    return df
+def build_derivatives_book(
+    data: dict | pd.DataFrame | None = None,
+    fx_market: pd.DataFrame | None = None,
+    rate_shift_pct=0.0,
+) -> pd.DataFrame:
+    """Validate a trade book (the sample by default) and price it on the shifted base curve."""
+    fx_market = DEFAULT_FX_MARKET if fx_market is None else fx_market
+    trades = validate_trades(
+        pd.DataFrame(SAMPLE_DERIVATIVES if data is None else data), fx_market
+    )
+    return price_trades(trades, rate_shift_pct, fx_market=fx_market)
+
+
+def session_trades():
+    """
+    The trade book and FX market last priced on the derivatives page.
+
+    Other pages revalue these hedges; before the page has priced a book they
+    are the sample book and default FX market.
+    """
+    import streamlit as st
+
+    if "derivative_trades" not in st.session_state:
+        st.session_state.derivative_trades = validate_trades(pd.DataFrame(SAMPLE_DERIVATIVES))
+    return st.session_state.derivative_trades, st.session_state.get(
+        "derivative_fx_market", DEFAULT_FX_MARKET
+    )
 
 
 def show():
+    import plotly.graph_objs as go
+    import streamlit as st
+
     st.header("IRR/FX Derivatives Book")
     st.caption(
-        "Sample interest-rate and FX derivative exposures with mark-to-market and delta notional."
+        "Swaps, caps/floors, swaptions and FX forwards valued off the base curve and FX "
+        "forward points, with delta, DV01 and vega."
+    )
+
+    uploaded = st.file_uploader(
+        "Upload trade file (CSV, Parquet or Feather)",
+        type=["csv", "parquet", "feather", "arrow"],
+        help=f"Required columns: {', '.join(TRADE_COLUMNS)}. "
+        f"Optional: {', '.join(TRADE_DEFAULTS)}.",
     )
+    with st.expander("FX Spot and Forward Points"):
+        fx_market = st.data_editor(DEFAULT_FX_MARKET, use_container_width=True, key="fx_market")
+    shift_bps = st.slider("Parallel curve shift (bps)", -300, 300, 0, 25)
+
+    trades = None
+    if uploaded is not None:
+        try:
+            trades = read_trades(uploaded, fx_market)
+        except ValueError as exc:
+            st.error(f"{exc} Showing the sample book instead.")
 
-    df = build_derivatives_book()
+    start = time.perf_counter()
+    try:
+        if trades is None:
+            trades = validate_trades(pd.DataFrame(SAMPLE_DERIVATIVES), fx_market)
+        df = price_trades(trades, shift_bps / 100, fx_market=fx_market)
+    except ValueError as exc:
+        st.error(str(exc))
+        return
+    # Other pages revalue the session book, so only a book that prices is shared.
+    st.session_state.derivative_trades = trades
+    st.session_state.derivative_fx_market = fx_market
+    st.caption(f"Priced {len(df):,} trades in {(time.perf_counter() - start) * 1000:,.0f} ms.")
 
     st.dataframe(
         df.style.format(
@@ -34,27 +100,27 @@ def show():
                 "MTM ($)": "${:,.0f}",
                 "Delta": "{:.2f}",
                 "Delta Notional ($)": "${:,.0f}",
+                "DV01 ($)": "${:,.0f}",
+                "Vega ($)": "${:,.0f}",
             }
         ),
         use_container_width=True,
     )
 
-    total_notional = float(df["Notional ($)"].sum())
-    total_mtm = float(df["MTM ($)"].sum())
-    total_delta_notional = float(df["Delta Notional ($)"].sum())
-
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total Notional", f"${total_notional:,.0f}")
-    col2.metric("Total MTM", f"${total_mtm:,.0f}")
-    col3.metric("Delta Notional", f"${total_delta_notional:,.0f}")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Notional", f"${float(df['Notional ($)'].sum()):,.0f}")
+    col2.metric("Total MTM", f"${float(df['MTM ($)'].sum()):,.0f}")
+    col3.metric("DV01 (+1bp)", f"${float(df['DV01 ($)'].sum()):,.0f}")
+    col4.metric("Vega (+1 vol pt)", f"${float(df['Vega ($)'].sum()):,.0f}")
 
+    by_instrument = df.groupby("Instrument", observed=True)["MTM ($)"].sum()
     mtm_fig = go.Figure(
         data=[
             go.Bar(
-                x=df["Instrument"],
-                y=df["MTM ($)"],
+                x=by_instrument.index,
+                y=by_instrument.values,
                 marker_color=[
-                    "#2E86AB" if t == "Interest Rate" else "#F6AE2D" for t in df["Type"]
+                    "#F6AE2D" if name == "FX Forward" else "#2E86AB" for name in by_instrument.index
                 ],
                 name="MTM",
             )
@@ -79,5 +145,6 @@ def show():
     st.plotly_chart(type_fig, use_container_width=True)
 
     st.markdown(
-        "Illustrative book only — valuations and Greeks are placeholders for portfolio demonstration."
+        "Rate trades pay quarterly off the base zero curve; options use Black-76 with the "
+        "trade's lognormal volatility. FX notionals are USD at the contract rate."
     )
@@ -1,21 +1,27 @@
-import plotly.graph_objs as go
-import streamlit as st
+import pandas as pd
 
-from alm_utils import calculate_duration_gap, estimate_eve_change
+from alm_utils import calculate_duration_gap, estimate_eve_change_from_stats
+from data_loader import dataset_stats
 
 
 def show(balance_sheet):
+    import plotly.graph_objs as go
+    import streamlit as st
+
     st.header("Duration Gap Analysis")
     st.caption(
         "Classic ALM duration gap: DA − (L/A) × DL, with approximate equity-value sensitivity."
     )
 
-    if "Duration (Years)" not in balance_sheet.columns:
-        st.error("Duration column missing from balance sheet data.")
-        return
-
+    if isinstance(balance_sheet, pd.DataFrame):
+        if "Duration (Years)" not in balance_sheet.columns:
+            st.error("Duration column missing from balance sheet data.")
+            return
+        stats = dataset_stats(balance_sheet)
+    else:
+        stats = balance_sheet.stats
     try:
-        metrics = calculate_duration_gap(balance_sheet)
+        metrics = calculate_duration_gap(stats)
     except ValueError as exc:
         st.error(str(exc))
         return
@@ -33,11 +39,7 @@ def show(balance_sheet):
     col4.metric("Duration Gap", f"{metrics['duration_gap']:.2f} yrs")
 
     shock_bps = st.slider("Parallel rate shock (bps)", -300, 300, 100, 25)
-    eve_change = estimate_eve_change(
-        metrics["duration_gap"],
-        metrics["total_assets"],
-        shock_bps,
-    )
+    eve_change = estimate_eve_change_from_stats(stats, shock_bps)
     st.metric(
         f"Estimated ΔEVE at {shock_bps:+d} bps",
         f"${eve_change:,.0f}",
@@ -1,6 +1,9 @@
+import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
-import streamlit as st
+
+from cash_flows import schedule_groups
+from positions import PositionStore, as_positions
+from yield_curve import YieldCurve
 
 
 DEFAULT_FTP_CURVE = {
@@ -13,33 +16,155 @@ DEFAULT_FTP_CURVE = {
 }
 
 
+INTERPOLATION_MODES = ["step", "linear", "monotone"]
+FTP_METHODS = ["maturity", "cash_flow"]
+
+
+class FTPCurve:
+    """
+    Vectorized FTP curve built once from a ``{months: rate}`` mapping.
+
+    ``step`` reproduces :func:`map_ftp_rate`: the rate of the first tenor at
+    or beyond the maturity, and the curve's maximum rate past the last tenor.
+    ``linear`` and ``monotone`` (Fritsch–Carlson cubic) interpolate between
+    tenors and hold the end rates flat outside them, through the shared
+    :class:`yield_curve.YieldCurve` with the same method.
+    """
+
+    def __init__(self, curve: dict | None = None, mode: str = "step"):
+        if mode not in INTERPOLATION_MODES:
+            raise ValueError(f"Unknown FTP interpolation mode: {mode}")
+        items = sorted((curve or DEFAULT_FTP_CURVE).items())
+        self.mode = mode
+        self.tenors = np.array([months for months, _ in items], dtype=float)
+        self.rates = np.array([rate for _, rate in items], dtype=float)
+        self.max_rate = float(self.rates.max())
+        self._curve = None if mode == "step" else YieldCurve(self.tenors / 12, self.rates, mode)
+
+    def __call__(self, months) -> np.ndarray:
+        months = np.asarray(months, dtype=float)
+        if self._curve is not None:
+            return self._curve.zero_rates(months / 12)
+        index = np.searchsorted(self.tenors, months, side="left")
+        rates = np.append(self.rates, self.max_rate)
+        return rates[index]
+
+
+_DEFAULT_STEP_CURVE = FTPCurve()
+
+
+def as_ftp_curve(ftp_curve: dict | FTPCurve | None = None, mode: str = "step") -> FTPCurve:
+    if isinstance(ftp_curve, FTPCurve):
+        return ftp_curve
+    if ftp_curve is None and mode == "step":
+        return _DEFAULT_STEP_CURVE
+    return FTPCurve(ftp_curve, mode)
+
+
 def map_ftp_rate(months: float, ftp_curve: dict | None = None) -> float:
-    curve = ftp_curve or DEFAULT_FTP_CURVE
-    for maturity, rate in sorted(curve.items()):
-        if months <= maturity:
-            return rate
-    return max(curve.values())
+    return float(as_ftp_curve(ftp_curve)(months))
 
 
-def build_ftp_table(balance_sheet: pd.DataFrame, ftp_curve: dict | None = None) -> pd.DataFrame:
-    ftp_df = balance_sheet.copy()
-    ftp_df["FTP Rate (%)"] = ftp_df["Maturity (Months)"].apply(
-        lambda m: map_ftp_rate(m, ftp_curve)
-    )
-    ftp_df["FTP Charge ($)"] = ftp_df["Amount ($)"] * ftp_df["FTP Rate (%)"] / 100
-    ftp_df["FTP Net ($)"] = (
-        ftp_df["Amount ($)"] * (ftp_df["Rate (%)"] - ftp_df["FTP Rate (%)"]) / 100
+def cash_flow_ftp_rates(
+    balance_sheet,
+    ftp_curve: dict | FTPCurve | None = None,
+    mode: str = "step",
+    amortization: dict | None = None,
+) -> np.ndarray:
+    """
+    Matched-maturity FTP rate per position from its principal cash flows.
+
+    Each principal flow is weighted by its present value on the FTP curve
+    times its timing, so the transfer rate is the duration-weighted average
+    of the curve over the position's amortization schedule. Bullets reduce to
+    the contractual-maturity rate. Schedules are built once per distinct
+    (amortization, rate, term) shape rather than once per position.
+    """
+    positions = as_positions(balance_sheet)
+    curve = as_ftp_curve(ftp_curve, mode)
+    groups = schedule_groups(positions, amortization)
+    numerator = np.zeros(len(groups))
+    denominator = np.zeros(len(groups))
+
+    for rows, months, principal, _ in groups.iter_unit_blocks():
+        curve_rates = curve(months)
+        discount = np.power(1.0 + curve_rates / 100, -months / 12)
+        weights = principal * (months * discount)
+        numerator[rows] += weights @ curve_rates
+        denominator[rows] += weights.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        group_rates = numerator / denominator
+    rates = group_rates[groups.inverse]
+    return np.where(np.isfinite(rates), rates, curve(positions.maturity))
+
+
+def build_ftp_table(
+    balance_sheet: pd.DataFrame | PositionStore,
+    ftp_curve: dict | FTPCurve | None = None,
+    mode: str = "step",
+    method: str = "maturity",
+    amortization: dict | None = None,
+) -> pd.DataFrame:
+    """
+    Return the balance sheet with FTP rate, charge and net columns added.
+
+    ``method="maturity"`` prices each position at its contractual maturity;
+    ``"cash_flow"`` uses :func:`cash_flow_ftp_rates` over the amortization
+    schedule. Either way the whole book is priced in array calls. The result
+    is assembled from the input's own columns plus the derived ones, without
+    copying the book on any pandas version or copy-on-write setting.
+    """
+    if method not in FTP_METHODS:
+        raise ValueError(f"Unknown FTP method: {method}")
+    positions = as_positions(balance_sheet)
+    if isinstance(balance_sheet, PositionStore):
+        balance_sheet = balance_sheet.to_frame()
+
+    curve = as_ftp_curve(ftp_curve, mode)
+    if method == "cash_flow":
+        rates = cash_flow_ftp_rates(positions, curve, amortization=amortization)
+    else:
+        rates = curve(positions.maturity)
+
+    amount = balance_sheet["Amount ($)"]
+    ftp_rate = pd.Series(rates, index=balance_sheet.index)
+    return pd.DataFrame(
+        {
+            **{column: balance_sheet[column] for column in balance_sheet.columns},
+            "FTP Rate (%)": ftp_rate,
+            "FTP Charge ($)": amount * ftp_rate / 100,
+            "FTP Net ($)": amount * (balance_sheet["Rate (%)"] - ftp_rate) / 100,
+        },
+        copy=False,
     )
-    return ftp_df
 
 
 def show(balance_sheet):
+    import plotly.graph_objs as go
+    import streamlit as st
+
     st.header("Funds Transfer Pricing")
     st.caption(
         "Match-funded FTP rates by maturity with product-level net interest contribution."
     )
 
-    ftp_df = build_ftp_table(balance_sheet)
+    mode = st.selectbox(
+        "FTP curve interpolation",
+        INTERPOLATION_MODES,
+        index=0,
+        help="Step matches each maturity to the next curve tenor; linear and "
+        "monotone cubic interpolate between tenors.",
+    )
+    method = st.radio(
+        "FTP method",
+        FTP_METHODS,
+        format_func=lambda m: "Contractual maturity" if m == "maturity" else "Cash-flow matched",
+        horizontal=True,
+        help="Cash-flow matched FTP weights the curve over each position's "
+        "amortization schedule (level-pay mortgages, linear commercial loans).",
+    )
+    ftp_df = build_ftp_table(balance_sheet, mode=mode, method=method)
 
     st.dataframe(
         ftp_df[
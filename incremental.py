@@ -0,0 +1,330 @@
+"""Dependency-tracked analytics that apply delta updates for single edits."""
+
+from __future__ import annotations
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from alm_utils import (
+    BALANCE_TYPES,
+    MATURITY_BINS_EXTENDED,
+    MATURITY_BINS_STANDARD,
+    MATURITY_LABELS_EXTENDED,
+    MATURITY_LABELS_STANDARD,
+    BalanceSheetStats,
+    bucket_type_slots,
+    maturity_bucket_codes,
+    stats_from_arrays,
+    sum_by_bucket_type,
+    summarize_balance_sheet,
+)
+from cash_flow_gap import cash_flow_gap_from_sums
+from ftp import as_ftp_curve
+from irr import ScenarioMoments, scenario_result_table
+from liquidity_gap import liquidity_gap_from_sums
+from positions import TYPE_SIGNS, PositionStore, as_positions
+
+# Each node and the inputs or nodes it is derived from.
+NODE_INPUTS = {
+    "stats": {"positions"},
+    "liquidity_gap": {"positions"},
+    "cash_flow_gap": {"positions"},
+    "ftp_rates": {"positions", "ftp_curve"},
+    "ftp_totals": {"positions", "ftp_curve"},
+    "product_moments": {"positions"},
+    "scenario_moments": {"product_moments", "balance_sensitivity"},
+}
+
+# Nodes that absorb a single-row edit as a delta instead of recomputing.
+ROW_DELTA_NODES = [
+    "stats",
+    "liquidity_gap",
+    "cash_flow_gap",
+    "ftp_rates",
+    "ftp_totals",
+    "product_moments",
+]
+
+# ``PositionStore`` arrays that edits can change.
+POSITION_ARRAYS = ["product_codes", "type_codes", "amount", "rate", "duration", "maturity"]
+
+EDITABLE_COLUMNS = {
+    "Amount ($)": "amount",
+    "Rate (%)": "rate",
+    "Duration (Years)": "duration",
+    "Maturity (Months)": "maturity",
+}
+
+
+def _bucket_table(sums: np.ndarray, labels) -> pd.DataFrame:
+    index = pd.CategoricalIndex(labels, categories=labels, ordered=True, name="Bucket")
+    return pd.DataFrame(sums, index=index, columns=pd.Index(BALANCE_TYPES, name="Type"))
+
+
+class IncrementalAnalytics:
+    """
+    Additive aggregates of one balance sheet kept current under edits.
+
+    The position arrays stay those of the shared, read-only store; edited
+    rows are held in a small per-column overlay, so a graph kept per session
+    costs only its edits, not a copy of the book. Gap sums, KPI stats, FTP
+    totals and per-product scenario moments are sums of per-row terms, so a
+    row edit subtracts the row's old contribution and adds the new one in
+    O(1). An assumption change invalidates only the nodes that depend on
+    it (see ``NODE_INPUTS``); those are rebuilt lazily on next access.
+    ``recomputed`` counts full rebuilds per node.
+    """
+
+    def __init__(
+        self,
+        balance_sheet,
+        balance_sensitivity: dict | None = None,
+        ftp_curve=None,
+        ftp_mode: str = "step",
+    ):
+        positions = as_positions(balance_sheet)
+        self._product_labels = list(positions.product_labels)
+        self._product_index = {label: code for code, label in enumerate(self._product_labels)}
+        self._base = positions
+        self._edits: dict[str, dict] = {name: {} for name in POSITION_ARRAYS}
+        self._sensitivity = dict(balance_sensitivity or {})
+        self._curve = as_ftp_curve(ftp_curve, ftp_mode)
+        self._values: dict = {}
+        self._dirty = set(NODE_INPUTS)
+        self.recomputed: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+    # -- positions ----------------------------------------------------------
+
+    def _column(self, name: str) -> np.ndarray:
+        """Column *name* with the edits applied; the shared array itself when unedited."""
+        base = getattr(self._base, name)
+        codes = name.endswith("codes")
+        edits = self._edits[name]
+        if not edits:
+            return base if codes else base.astype(float, copy=False)
+        column = base.astype(np.int64 if codes else float)
+        column[list(edits)] = list(edits.values())
+        return column
+
+    def _at(self, name: str, row: int):
+        edits = self._edits[name]
+        value = edits[row] if row in edits else getattr(self._base, name)[row]
+        return int(value) if name.endswith("codes") else float(value)
+
+    # -- graph ------------------------------------------------------------
+
+    def _invalidate(self, name: str) -> None:
+        for node, inputs in NODE_INPUTS.items():
+            if name in inputs and node not in self._dirty:
+                self._dirty.add(node)
+                self._invalidate(node)
+
+    def _get(self, node: str):
+        if node in self._dirty:
+            self._values[node] = getattr(self, f"_compute_{node}")()
+            self._dirty.discard(node)
+            self.recomputed[node] += 1
+        return self._values[node]
+
+    # -- full computations --------------------------------------------------
+
+    def _bucket_sums(self, values, bins, labels) -> np.ndarray:
+        slots = bucket_type_slots(
+            maturity_bucket_codes(self._column("maturity"), bins),
+            self._column("type_codes"),
+            len(labels),
+        )
+        return sum_by_bucket_type(values, slots, labels).to_numpy(copy=True)
+
+    def _runoff(self) -> np.ndarray:
+        maturity = self._column("maturity")
+        return self._column("amount") / np.where(maturity == 0, 1, maturity)
+
+    def _compute_stats(self) -> BalanceSheetStats:
+        return stats_from_arrays(
+            *(self._column(name) for name in ("type_codes", "amount", "rate", "duration"))
+        )
+
+    def _compute_liquidity_gap(self) -> np.ndarray:
+        return self._bucket_sums(
+            self._column("amount"), MATURITY_BINS_STANDARD, MATURITY_LABELS_STANDARD
+        )
+
+    def _compute_cash_flow_gap(self) -> np.ndarray:
+        return self._bucket_sums(self._runoff(), MATURITY_BINS_EXTENDED, MATURITY_LABELS_EXTENDED)
+
+    def _compute_ftp_rates(self) -> np.ndarray:
+        return np.array(self._curve(self._column("maturity")), dtype=float)
+
+    def _by_product(self, terms: np.ndarray) -> np.ndarray:
+        codes = self._column("product_codes")
+        return np.stack(
+            [
+                np.bincount(codes, weights=row, minlength=len(self._product_labels))
+                for row in terms
+            ]
+        )
+
+    def _compute_ftp_totals(self) -> np.ndarray:
+        amount, rate = self._column("amount"), self._column("rate")
+        ftp = self._curve(self._column("maturity"))
+        return self._by_product(np.stack([amount * ftp / 100, amount * (rate - ftp) / 100]))
+
+    @staticmethod
+    def _signed_terms(type_codes, amount, rate, duration) -> np.ndarray:
+        signed = amount * TYPE_SIGNS[type_codes]
+        return np.stack([signed, signed * rate, signed * duration])
+
+    def _compute_product_moments(self) -> np.ndarray:
+        return self._by_product(
+            self._signed_terms(
+                *(self._column(name) for name in ("type_codes", "amount", "rate", "duration"))
+            )
+        )
+
+    def _compute_scenario_moments(self) -> ScenarioMoments:
+        amount, rate_amount, duration_amount = self._get("product_moments")
+        sensitivity = np.array(
+            [self._sensitivity.get(label, 0.0) for label in self._product_labels]
+        )
+        return ScenarioMoments(
+            base_nii=float(rate_amount.sum()),
+            nii_linear=np.atleast_1d(amount.sum() + sensitivity @ rate_amount),
+            nii_quadratic=np.atleast_2d(sensitivity @ amount),
+            base_eve=float(amount.sum()),
+            eve_linear=np.atleast_1d(duration_amount.sum()),
+        )
+
+    # -- row deltas ---------------------------------------------------------
+
+    def _apply_row(self, node: str, row: int, sign: float) -> None:
+        type_code = self._at("type_codes", row)
+        amount, rate = self._at("amount", row), self._at("rate", row)
+        duration, maturity = self._at("duration", row), self._at("maturity", row)
+        if node == "stats":
+            delta = stats_from_arrays(
+                np.array([type_code]), np.array([amount]), np.array([rate]), np.array([duration])
+            )
+            stats = self._values["stats"]
+            self._values["stats"] = stats + delta if sign > 0 else stats - delta
+        elif node in ("liquidity_gap", "cash_flow_gap"):
+            if node == "liquidity_gap":
+                bins, value = MATURITY_BINS_STANDARD, amount
+            else:
+                bins, value = MATURITY_BINS_EXTENDED, amount / (1 if maturity == 0 else maturity)
+            bucket = maturity_bucket_codes(np.array([maturity]), bins)[0]
+            if 0 <= type_code < len(BALANCE_TYPES) and bucket >= 0:
+                self._values[node][bucket, type_code] += sign * value
+        elif node == "ftp_rates":
+            if sign > 0:
+                self._values[node][row] = self._curve(maturity)
+        elif node == "ftp_totals":
+            ftp = float(self._curve(maturity))
+            self._values[node][:, self._at("product_codes", row)] += sign * np.array(
+                [amount * ftp / 100, amount * (rate - ftp) / 100]
+            )
+        elif node == "product_moments":
+            self._values[node][:, self._at("product_codes", row)] += sign * self._signed_terms(
+                type_code, amount, rate, duration
+            )
+
+    def _product_code(self, label) -> int:
+        if label not in self._product_index:
+            self._product_index[label] = len(self._product_labels)
+            self._product_labels.append(label)
+            for node in ("ftp_totals", "product_moments"):
+                if node not in self._dirty:
+                    values = self._values[node]
+                    self._values[node] = np.hstack([values, np.zeros((len(values), 1))])
+        return self._product_index[label]
+
+    # -- edits --------------------------------------------------------------
+
+    def update_row(self, row: int, changes: dict) -> None:
+        """
+        Edit one position; *changes* maps ``REQUIRED_COLUMNS`` names to new values.
+
+        Clean aggregates take the edit as an O(1) delta; nodes derived from
+        them (scenario moments) are invalidated.
+        """
+        unknown = set(changes) - set(EDITABLE_COLUMNS) - {"Product", "Type"}
+        if unknown:
+            raise KeyError(f"Not an editable column: {', '.join(sorted(unknown))}")
+
+        clean = [node for node in ROW_DELTA_NODES if node not in self._dirty]
+        for node in clean:
+            self._apply_row(node, row, -1.0)
+        if "Product" in changes:
+            self._edits["product_codes"][row] = self._product_code(changes["Product"])
+        if "Type" in changes:
+            kind = changes["Type"]
+            self._edits["type_codes"][row] = (
+                BALANCE_TYPES.index(kind) if kind in BALANCE_TYPES else -1
+            )
+        for column, attribute in EDITABLE_COLUMNS.items():
+            if column in changes:
+                self._edits[attribute][row] = float(changes[column])
+        for node in clean:
+            self._apply_row(node, row, 1.0)
+            self._invalidate(node)
+
+    def set_sensitivity(self, product: str, value: float) -> None:
+        """Change one product's balance sensitivity; only scenario moments are rebuilt."""
+        if self._sensitivity.get(product, 0.0) != value:
+            self._sensitivity[product] = value
+            self._invalidate("balance_sensitivity")
+
+    def set_ftp_curve(self, ftp_curve=None, ftp_mode: str = "step") -> None:
+        self._curve = as_ftp_curve(ftp_curve, ftp_mode)
+        self._invalidate("ftp_curve")
+
+    # -- results ------------------------------------------------------------
+
+    @property
+    def balance_sensitivity(self) -> dict:
+        return dict(self._sensitivity)
+
+    @property
+    def stats(self) -> BalanceSheetStats:
+        return self._get("stats")
+
+    def kpis(self) -> dict:
+        return summarize_balance_sheet(self.stats)
+
+    def liquidity_gap_table(self) -> pd.DataFrame:
+        sums = _bucket_table(self._get("liquidity_gap"), MATURITY_LABELS_STANDARD)
+        return liquidity_gap_from_sums(sums)
+
+    def cash_flow_gap_table(self) -> pd.DataFrame:
+        sums = _bucket_table(self._get("cash_flow_gap"), MATURITY_LABELS_EXTENDED)
+        return cash_flow_gap_from_sums(sums)
+
+    def ftp_rates(self) -> np.ndarray:
+        return self._get("ftp_rates").copy()
+
+    def ftp_totals(self) -> pd.DataFrame:
+        """FTP charge and net contribution summed by product."""
+        charge, net = self._get("ftp_totals")
+        return pd.DataFrame(
+            {"FTP Charge ($)": charge, "FTP Net ($)": net},
+            index=pd.Index(self._product_labels, name="Product"),
+        )
+
+    def scenario_table(self, scenarios: dict) -> pd.DataFrame:
+        """``irr.build_scenario_table`` (duration EVE) from the cached moments."""
+        moments = self._get("scenario_moments")
+        shifts = np.array([0.0, *scenarios.values()])[:, None]
+        batch = pd.DataFrame({"NII ($)": moments.nii(shifts), "EVE ($)": moments.eve(shifts)})
+        return scenario_result_table(scenarios, batch)
+
+    def positions(self) -> PositionStore:
+        """Snapshot of the edited book; unedited columns share the original arrays."""
+        return PositionStore(
+            product_labels=np.array(self._product_labels, dtype=object),
+            **{name: self._column(name) for name in POSITION_ARRAYS},
+        )
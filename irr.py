@@ -1,13 +1,24 @@
-import streamlit as st
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
+
+from derivatives_pricing import price_trades, scenario_revaluation, trade_schedules
+from positions import as_positions
+from revaluation import full_revaluation_eve
+from yield_curve import tenor_weights
 
 
 def show(balance_sheet, balance_sensitivity):
+    import plotly.graph_objs as go
+    import streamlit as st
+
+    from result_cache import get_result_cache
+
     st.header("Interest Rate Risk (IRR) Simulation")
 
     st.subheader("Balance Sheet Preview")
-    st.dataframe(balance_sheet, use_container_width=True)
+    st.dataframe(as_positions(balance_sheet).to_frame(), use_container_width=True)
 
     st.subheader("Scenario Definitions")
     base_shift = st.slider("Base Case Rate Shift (%)", -2.0, 2.0, 0.0, 0.25)
@@ -23,23 +34,46 @@ def show(balance_sheet, balance_sensitivity):
         "-50bps Bull Steepener": -0.5,
     }
 
-    base_nii = calc_nii(balance_sheet, 0.0, balance_sensitivity)
-    base_eve = calc_eve(balance_sheet, 0.0)
+    eve_method = st.radio(
+        "EVE method",
+        EVE_METHODS,
+        format_func={
+            "duration": "Duration approximation",
+            "full": "Full revaluation (discounted cash flows)",
+        }.get,
+        horizontal=True,
+        help="Full revaluation discounts contractual cash flows off the base "
+        "and shocked zero curves, capturing convexity.",
+    )
+    analytics = _edit_balance_sensitivity(balance_sheet, balance_sensitivity)
+    balance_sensitivity = analytics.balance_sensitivity
+    hedges = None
+    if st.checkbox(
+        "Include derivatives hedges",
+        value=True,
+        help="Revalue the IRR/FX Derivatives Book under every scenario and add it to "
+        "the balance sheet. Trades uploaded on that page are used when present.",
+    ):
+        hedges = _derivatives_hedges()
 
-    results = []
-    for name, shift_pct in scenarios.items():
-        nii = calc_nii(balance_sheet, shift_pct, balance_sensitivity)
-        eve = calc_eve(balance_sheet, shift_pct)
-        results.append({
-            "Scenario": name,
-            "Rate Shift (%)": shift_pct,
-            "NII ($)": nii,
-            "Δ NII ($)": nii - base_nii,
-            "EVE ($)": eve,
-            "Δ EVE ($)": eve - base_eve,
-        })
+    def _scenario_results():
+        if eve_method == "duration":
+            table = analytics.scenario_table(scenarios)
+        else:
+            table = build_scenario_table(
+                balance_sheet, scenarios, balance_sensitivity, eve_method=eve_method
+            )
+        return table if hedges is None else hedged_scenario_table(table, **hedges)
 
-    result_df = pd.DataFrame(results).set_index("Scenario")
+    result_df = get_result_cache().fetch(
+        "irr_scenarios",
+        balance_sheet,
+        _scenario_results,
+        scenarios=scenarios,
+        balance_sensitivity=balance_sensitivity,
+        eve_method=eve_method,
+        hedges=_hedge_assumptions(hedges),
+    )
 
     st.subheader("Scenario Results")
     st.dataframe(
@@ -49,28 +83,37 @@ def show(balance_sheet, balance_sensitivity):
             "Δ NII ($)": "${:,.0f}",
             "EVE ($)": "${:,.0f}",
             "Δ EVE ($)": "${:,.0f}",
+            **{column: "${:,.0f}" for column in HEDGE_RESULT_COLUMNS if hedges},
         }),
         use_container_width=True,
     )
 
     col_a, col_b = st.columns(2)
-    with col_a:
-        st.subheader("NII Sensitivity")
-        fig_nii = go.Figure()
-        fig_nii.add_trace(
-            go.Bar(x=result_df.index, y=result_df["Δ NII ($)"], name="Change in NII")
-        )
-        fig_nii.update_layout(yaxis_title="Δ NII ($)", xaxis_title="Scenario")
-        st.plotly_chart(fig_nii, use_container_width=True)
-
-    with col_b:
-        st.subheader("EVE Sensitivity")
-        fig_eve = go.Figure()
-        fig_eve.add_trace(
-            go.Bar(x=result_df.index, y=result_df["Δ EVE ($)"], name="Change in EVE")
-        )
-        fig_eve.update_layout(yaxis_title="Δ EVE ($)", xaxis_title="Scenario")
-        st.plotly_chart(fig_eve, use_container_width=True)
+    for col, measure in ((col_a, "NII"), (col_b, "EVE")):
+        with col:
+            st.subheader(f"{measure} Sensitivity")
+            fig = go.Figure()
+            fig.add_trace(
+                go.Bar(
+                    x=result_df.index,
+                    y=result_df[f"Δ {measure} ($)"],
+                    name="Unhedged" if hedges else f"Change in {measure}",
+                )
+            )
+            if hedges:
+                fig.add_trace(
+                    go.Bar(
+                        x=result_df.index, y=result_df[f"Hedged Δ {measure} ($)"], name="Hedged"
+                    )
+                )
+            fig.update_layout(
+                barmode="group", yaxis_title=f"Δ {measure} ($)", xaxis_title="Scenario"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+    _show_nii_projection(balance_sheet, scenarios, balance_sensitivity)
+    _show_scenario_grid(balance_sheet, balance_sensitivity, eve_method, hedges)
+    _show_monte_carlo(balance_sheet, balance_sensitivity, eve_method)
 
     st.caption(
         "This module uses simplified rate-shock and duration assumptions for demonstration purposes. "
@@ -78,29 +121,451 @@ def show(balance_sheet, balance_sensitivity):
     )
 
 
-def calc_nii(df, rate_shift_pct, balance_sensitivity):
-    scenario_df = df.copy()
-    rate_shift_bps = rate_shift_pct * 100
-    scenario_df["Adj Balance ($)"] = scenario_df.apply(
-        lambda row: row["Amount ($)"] * (
-            1 + balance_sensitivity.get(row["Product"], 0.0) * rate_shift_bps / 100
-        ),
-        axis=1,
+def _derivatives_hedges():
+    """
+    The derivatives page's trade book, FX market and trade schedules for revaluation.
+
+    Returns ``None``, with a warning, when the book does not price against
+    its FX market, so the page falls back to the unhedged results.
+    """
+    import streamlit as st
+
+    # Imported here: the trade book is held by the derivatives page.
+    from derivatives_book import session_trades
+
+    trades, fx_market = session_trades()
+    # Schedules depend only on the trades, so they are built and checked once per book.
+    cached = st.session_state.get("hedge_schedules")
+    if cached is None or cached[0] is not trades or cached[1] is not fx_market:
+        try:
+            schedules = trade_schedules(trades)
+            price_trades(trades, fx_market=fx_market, schedules=schedules)
+        except ValueError as exc:
+            st.warning(f"Derivatives hedges left out: {exc}")
+            return None
+        cached = (trades, fx_market, schedules)
+        st.session_state.hedge_schedules = cached
+    return {"trades": trades, "fx_market": fx_market, "schedules": cached[2]}
+
+
+def _hedge_assumptions(hedges):
+    """The inputs behind *hedges* that a cached result depends on (schedules are derived)."""
+    if hedges is None:
+        return None
+    return {"trades": hedges["trades"], "fx_market": hedges["fx_market"]}
+
+
+def _edit_balance_sensitivity(balance_sheet, balance_sensitivity):
+    import streamlit as st
+
+    # Imported here: incremental builds on this module's scenario moments.
+    from incremental import IncrementalAnalytics
+
+    # One graph per session and dataset, so edits never leak between sessions.
+    cached = st.session_state.get("irr_analytics")
+    if cached is None or cached[0] is not balance_sheet:
+        cached = (balance_sheet, IncrementalAnalytics(balance_sheet, balance_sensitivity))
+        st.session_state.irr_analytics = cached
+    analytics = cached[1]
+
+    products = list(as_positions(balance_sheet).product_labels)
+    current = analytics.balance_sensitivity
+    with st.expander("Balance Sensitivity Assumptions"):
+        edited = st.data_editor(
+            pd.DataFrame(
+                {
+                    "Product": products,
+                    "Balance Sensitivity": [current.get(product, 0.0) for product in products],
+                }
+            ),
+            disabled=["Product"],
+            hide_index=True,
+            use_container_width=True,
+            key="balance_sensitivity_editor",
+        )
+    for product, value in zip(edited["Product"], edited["Balance Sensitivity"]):
+        analytics.set_sensitivity(product, float(value))
+    return analytics
+
+
+def _show_nii_projection(balance_sheet, scenarios, balance_sensitivity):
+    import plotly.graph_objs as go
+    import streamlit as st
+
+    from nii_projection import annual_nii_summary, project_nii
+    from result_cache import get_result_cache
+
+    with st.expander("Multi-Period NII Projection"):
+        col_horizon, col_ramp = st.columns(2)
+        horizon = col_horizon.select_slider("Horizon (Months)", [12, 24, 36, 48, 60], value=60)
+        ramp = col_ramp.select_slider(
+            "Shock Ramp (Months)",
+            [0, 3, 6, 12, 24],
+            value=0,
+            help="0 applies each shock immediately; otherwise it is phased in linearly.",
+        )
+        projection = get_result_cache().fetch(
+            "nii_projection",
+            balance_sheet,
+            lambda: project_nii(
+                balance_sheet,
+                {"Zero Shift": 0.0, **scenarios},
+                balance_sensitivity,
+                horizon_months=horizon,
+                ramp_months=ramp,
+            ),
+            scenarios=scenarios,
+            balance_sensitivity=balance_sensitivity,
+            horizon_months=horizon,
+            ramp_months=ramp,
+        )
+        fig = go.Figure()
+        for scenario in scenarios:
+            fig.add_trace(
+                go.Scatter(
+                    x=projection.index,
+                    y=projection[scenario].cumsum(),
+                    name=scenario,
+                    mode="lines",
+                )
+            )
+        fig.update_layout(xaxis_title="Month", yaxis_title="Cumulative NII ($)")
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("**Δ NII by Year vs. Zero Shift**")
+        st.dataframe(
+            annual_nii_summary(projection, "Zero Shift")
+            .drop(columns="Zero Shift")
+            .style.format("${:,.0f}"),
+            use_container_width=True,
+        )
+        st.caption(
+            "Constant balance sheet: maturing positions roll into the same term at the "
+            "scenario rate in force on the roll date, keeping their original margin."
+        )
+
+
+def _show_scenario_grid(balance_sheet, balance_sensitivity, eve_method, hedges=None):
+    import streamlit as st
+
+    from result_cache import get_result_cache, result_key
+
+    # Imported here: scenario_engine builds on this module's calculations.
+    from scenario_engine import (
+        CURVE_SHAPES,
+        DEFAULT_MAGNITUDES_BPS,
+        DEFAULT_SENSITIVITY_MULTIPLIERS,
+        build_scenario_grid,
+        run_scenario_grid,
+    )
+
+    with st.expander("Scenario Grid"):
+        shapes = st.multiselect("Curve Shapes", list(CURVE_SHAPES), default=list(CURVE_SHAPES))
+        magnitudes = st.multiselect(
+            "Shock Magnitudes (bps)",
+            [-400, -300, -200, -100, -50, 50, 100, 200, 300, 400],
+            default=DEFAULT_MAGNITUDES_BPS,
+        )
+        multipliers = st.multiselect(
+            "Balance Sensitivity Multipliers",
+            [0.0, 0.5, 1.0, 1.5, 2.0],
+            default=DEFAULT_SENSITIVITY_MULTIPLIERS,
+        )
+        if not (shapes and magnitudes and multipliers):
+            st.info("Select at least one curve shape, magnitude and multiplier.")
+            return
+        grid = build_scenario_grid(shapes, magnitudes, multipliers)
+        cache = get_result_cache()
+        key = result_key(
+            "scenario_grid",
+            balance_sheet,
+            shifts_pct=grid.shifts_pct,
+            definitions=grid.definitions,
+            balance_sensitivity=balance_sensitivity,
+            eve_method=eve_method,
+            hedges=_hedge_assumptions(hedges),
+        )
+        # A grid already run with these inputs is shown without re-running it.
+        grid_df = cache.get(key) if key in cache else None
+        if grid_df is None:
+            if not st.button(f"Run {len(grid)} Scenarios"):
+                return
+            progress_bar = st.progress(0.0, text="Running scenario grid...")
+            grid_df = run_scenario_grid(
+                balance_sheet,
+                grid,
+                balance_sensitivity,
+                eve_method=eve_method,
+                progress=lambda done, total: progress_bar.progress(
+                    done / total, text=f"{done:,} of {total:,} scenarios"
+                ),
+            )
+            progress_bar.empty()
+            if hedges:
+                grid_df = hedged_scenario_table(
+                    grid_df, shifts_pct=grid.shifts_pct, tenors=grid.tenors, **hedges
+                )
+            cache.put(key, grid_df)
+        else:
+            st.caption(f"{len(grid):,} scenarios loaded from the result cache.")
+        st.dataframe(
+            grid_df.style.format({
+                "Rate Shift (%)": "{:+.2f}%",
+                "NII ($)": "${:,.0f}",
+                "Δ NII ($)": "${:,.0f}",
+                "EVE ($)": "${:,.0f}",
+                "Δ EVE ($)": "${:,.0f}",
+                **{column: "${:,.0f}" for column in HEDGE_RESULT_COLUMNS if hedges},
+            }),
+            use_container_width=True,
+        )
+
+
+def _show_monte_carlo(balance_sheet, balance_sensitivity, eve_method):
+    import plotly.graph_objs as go
+    import streamlit as st
+
+    # Imported here: monte_carlo builds on this module's scenario moments.
+    from monte_carlo import RATE_MODELS, run_monte_carlo
+
+    with st.expander("Stochastic Simulation (Monte Carlo)"):
+        col_model, col_paths, col_horizon, col_seed = st.columns(4)
+        model = col_model.selectbox(
+            "Rate Model",
+            RATE_MODELS,
+            format_func={"pca": "PCA curve factors", "hull_white": "Hull-White short rate"}.get,
+        )
+        n_paths = col_paths.select_slider(
+            "Paths", [1_000, 2_000, 5_000, 10_000, 20_000], value=10_000
+        )
+        horizon = col_horizon.select_slider("Horizon (Months)", [12, 24, 36, 60, 120], value=12)
+        seed = col_seed.number_input("Seed", min_value=0, value=0, step=1)
+        if not st.button("Run Simulation"):
+            return
+
+        progress_bar = st.progress(0.0, text="Simulating rate paths...")
+        result = run_monte_carlo(
+            balance_sheet,
+            balance_sensitivity,
+            n_paths=n_paths,
+            horizon_months=horizon,
+            model=model,
+            seed=int(seed),
+            eve_method=eve_method,
+            progress=lambda done, total: progress_bar.progress(
+                done / total, text=f"{done:,} of {total:,} paths"
+            ),
+        )
+        progress_bar.empty()
+
+        summary = result.summary()
+        st.dataframe(summary.style.format("${:,.0f}"), use_container_width=True)
+        fig = go.Figure()
+        fig.add_trace(go.Histogram(x=result.nii - result.base_nii, name="Δ NII", opacity=0.6))
+        fig.add_trace(go.Histogram(x=result.eve - result.base_eve, name="Δ EVE", opacity=0.6))
+        fig.update_layout(barmode="overlay", xaxis_title="Change vs. Base ($)", yaxis_title="Paths")
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(
+            f"Δ NII is earnings over {horizon} months against the unshocked curve; "
+            "Δ EVE is revalued on each path's curve at the horizon. VaR and ES are losses."
+        )
+
+
+SCENARIO_RESULT_COLUMNS = ["Rate Shift (%)", "NII ($)", "Δ NII ($)", "EVE ($)", "Δ EVE ($)"]
+HEDGE_RESULT_COLUMNS = [
+    "Hedge Δ NII ($)",
+    "Hedge Δ EVE ($)",
+    "Hedged Δ NII ($)",
+    "Hedged Δ EVE ($)",
+]
+EVE_METHODS = ["duration", "full"]
+
+# The page's scenario set at its default slider positions (percent).
+DEFAULT_SCENARIOS = {
+    "Base": 0.0,
+    "+100bps Shock": 1.0,
+    "-100bps Shock": -1.0,
+    "Stable Rates": 0.0,
+    "+50bps Bear Flattener": 0.5,
+    "-50bps Bull Steepener": -0.5,
+}
+
+
+@dataclass(frozen=True)
+class ScenarioMoments:
+    """
+    Amount-weighted moments of a book that price any rate shift in O(T²).
+
+    Per position, interest is A·(1 + s·x)·(r + x) and value is A·(1 − D·x),
+    so annual NII is ``base_nii + x·nii_linear + xᵀ·nii_quadratic·x`` and
+    duration EVE is ``base_eve − x·eve_linear`` for a shift vector *x*
+    (percent) at the moment tenors.
+    """
+
+    base_nii: float
+    nii_linear: np.ndarray
+    nii_quadratic: np.ndarray
+    base_eve: float
+    eve_linear: np.ndarray
+
+    def nii(self, shifts: np.ndarray) -> np.ndarray:
+        return (
+            self.base_nii
+            + shifts @ self.nii_linear
+            + np.einsum("nt,ts,ns->n", shifts, self.nii_quadratic, shifts)
+        ) / 100
+
+    def eve(self, shifts: np.ndarray) -> np.ndarray:
+        return self.base_eve - shifts @ self.eve_linear / 100
+
+
+def scenario_moments(df, balance_sensitivity, tenors=None) -> ScenarioMoments:
+    """
+    Project the book onto *tenors* (years) once; ``None`` means parallel shifts.
+
+    Each position's shift is interpolated at its maturity, so the moments
+    are T-vectors and a T × T matrix however large the book is.
+    """
+    positions = as_positions(df)
+    amount = positions.amount * positions.signs
+    rate = positions.rate
+    duration = positions.duration
+    sensitivity = positions.map_products(balance_sensitivity)
+
+    if tenors is None:
+        # Parallel shifts: a single "tenor" whose weight is one for every position.
+        linear = np.atleast_1d(amount @ (1.0 + sensitivity * rate))
+        quadratic = np.atleast_2d(amount @ sensitivity)
+        duration_linear = np.atleast_1d(amount @ duration)
+    else:
+        weights = tenor_weights(positions.maturity / 12.0, tenors)
+        linear = weights.T @ (amount * (1.0 + sensitivity * rate))
+        quadratic = weights.T @ (weights * (amount * sensitivity)[:, None])
+        duration_linear = weights.T @ (amount * duration)
+
+    return ScenarioMoments(
+        base_nii=float(amount @ rate),
+        nii_linear=linear,
+        nii_quadratic=quadratic,
+        base_eve=float(amount.sum()),
+        eve_linear=duration_linear,
+    )
+
+
+def calc_scenarios(
+    df, rate_shifts_pct, balance_sensitivity, tenors=None, eve_method="duration", cash_flows=None
+) -> pd.DataFrame:
+    """
+    Return NII and EVE for every scenario in one pass over the positions.
+
+    *df* may be a balance sheet frame or a ``positions.PositionStore``.
+    *rate_shifts_pct* is either a length-N vector of parallel shifts or an
+    N × T matrix of shifts at *tenors* (years). In the matrix case each
+    position picks up the shift interpolated at its maturity.
+
+    The book is reduced to :class:`ScenarioMoments` once, after which each
+    scenario costs O(T²) regardless of book size.
+
+    ``eve_method="full"`` replaces the duration approximation with a present
+    value revaluation of contractual cash flows (see
+    ``revaluation.full_revaluation_eve``); pass the book's precomputed
+    *cash_flows* when evaluating it in several batches.
+    """
+    if eve_method not in EVE_METHODS:
+        raise ValueError(f"Unknown EVE method: {eve_method}")
+    positions = as_positions(df)
+    shifts = np.asarray(rate_shifts_pct, dtype=float)
+    if shifts.ndim == 1:
+        shifts = shifts[:, None]
+        moment_tenors = None
+    elif shifts.ndim == 2:
+        if tenors is None or len(tenors) != shifts.shape[1]:
+            raise ValueError("A scenario matrix needs one tenor per column.")
+        moment_tenors = tenors
+    else:
+        raise ValueError("Rate shifts must be a vector or a scenarios × tenors matrix.")
+
+    moments = scenario_moments(positions, balance_sensitivity, moment_tenors)
+    nii = moments.nii(shifts)
+    if eve_method == "full":
+        eve = full_revaluation_eve(positions, rate_shifts_pct, tenors, cash_flows=cash_flows)
+    else:
+        eve = moments.eve(shifts)
+    return pd.DataFrame({"NII ($)": nii, "EVE ($)": eve})
+
+
+def build_scenario_table(
+    df, scenarios: dict, balance_sensitivity, eve_method="duration"
+) -> pd.DataFrame:
+    """Evaluate named parallel shifts (percent) against the zero-shift base."""
+    shifts = [0.0, *scenarios.values()]
+    batch = calc_scenarios(df, shifts, balance_sensitivity, eve_method=eve_method)
+    return scenario_result_table(scenarios, batch)
+
+
+def scenario_result_table(scenarios: dict, batch: pd.DataFrame) -> pd.DataFrame:
+    """Shape NII/EVE results whose first row is the zero shift into the scenario table."""
+    base_nii, base_eve = batch.iloc[0]
+    result_df = pd.DataFrame(
+        {
+            "Rate Shift (%)": list(scenarios.values()),
+            "NII ($)": batch["NII ($)"].to_numpy()[1:],
+            "EVE ($)": batch["EVE ($)"].to_numpy()[1:],
+        },
+        index=pd.Index(list(scenarios.keys()), name="Scenario"),
     )
-    scenario_df["Shifted Rate"] = scenario_df["Rate (%)"] + rate_shift_pct
-    scenario_df["Annual Interest"] = scenario_df["Adj Balance ($)"] * scenario_df["Shifted Rate"] / 100
+    result_df["Δ NII ($)"] = result_df["NII ($)"] - base_nii
+    result_df["Δ EVE ($)"] = result_df["EVE ($)"] - base_eve
+    return result_df[SCENARIO_RESULT_COLUMNS]
+
 
-    asset_interest = scenario_df.loc[scenario_df["Type"] == "Asset", "Annual Interest"].sum()
-    liability_interest = scenario_df.loc[scenario_df["Type"] == "Liability", "Annual Interest"].sum()
-    return asset_interest - liability_interest
+def hedged_scenario_table(
+    result_df: pd.DataFrame,
+    trades: pd.DataFrame,
+    shifts_pct=None,
+    tenors=None,
+    fx_market=None,
+    schedules=None,
+) -> pd.DataFrame:
+    """
+    Add the derivatives book's ΔNII/ΔEVE and the hedged totals to a scenario table.
+
+    *result_df* is an unhedged table from :func:`build_scenario_table` or
+    ``scenario_engine.run_scenario_grid``. Its scenarios are parallel
+    ``Rate Shift (%)`` moves unless *shifts_pct* gives the scenarios ×
+    *tenors* matrix behind it. Each distinct curve is revalued once, so a
+    grid that repeats curves across sensitivity multipliers costs no more;
+    pass *schedules* (``derivatives_pricing.trade_schedules``) to reuse
+    trade schedules across calls.
+    """
+    if shifts_pct is None:
+        shifts = result_df["Rate Shift (%)"].to_numpy(dtype=float)[:, None]
+        tenors = None
+    else:
+        shifts = np.asarray(shifts_pct, dtype=float)
+    base = np.zeros((1, shifts.shape[1]))
+    curves, scenario_curve = np.unique(shifts, axis=0, return_inverse=True)
+    hedges = scenario_revaluation(
+        trades,
+        np.vstack([base, curves]) if tenors is not None else np.concatenate([[0.0], curves[:, 0]]),
+        tenors,
+        fx_market=fx_market,
+        schedules=schedules,
+    ).to_numpy()
+    changes = hedges[1:][scenario_curve.ravel()] - hedges[0]
+
+    hedged = result_df.copy()
+    hedged["Hedge Δ NII ($)"] = changes[:, 0]
+    hedged["Hedge Δ EVE ($)"] = changes[:, 1]
+    hedged["Hedged Δ NII ($)"] = hedged["Δ NII ($)"] + changes[:, 0]
+    hedged["Hedged Δ EVE ($)"] = hedged["Δ EVE ($)"] + changes[:, 1]
+    return hedged
+
+
+def calc_nii(df, rate_shift_pct, balance_sensitivity):
+    return float(calc_scenarios(df, [rate_shift_pct], balance_sensitivity)["NII ($)"].iloc[0])
 
 
-def calc_eve(df, rate_shift_pct):
-    scenario_df = df.copy()
-    rate_shift_decimal = rate_shift_pct / 100
-    scenario_df["Shifted Value"] = scenario_df["Amount ($)"] * (
-        1 - scenario_df["Duration (Years)"] * rate_shift_decimal
+def calc_eve(df, rate_shift_pct, eve_method="duration"):
+    return float(
+        calc_scenarios(df, [rate_shift_pct], {}, eve_method=eve_method)["EVE ($)"].iloc[0]
     )
-    asset_value = scenario_df.loc[scenario_df["Type"] == "Asset", "Shifted Value"].sum()
-    liability_value = scenario_df.loc[scenario_df["Type"] == "Liability", "Shifted Value"].sum()
-    return asset_value - liability_value
@@ -1,33 +1,55 @@
 import pandas as pd
-import plotly.graph_objs as go
-import streamlit as st
 
-from alm_utils import assign_maturity_bucket, format_currency_columns
+from alm_utils import MATURITY_LADDERS, format_currency_columns, liquidity_ladder
+from positions import as_positions
+
+
+def build_liquidity_gap_table(balance_sheet, bins=None, labels=None) -> pd.DataFrame:
+    """
+    Inflows, outflows and (cumulative) gap by maturity bucket, without copying the book.
+
+    *bins*/*labels* select a bucket scheme (standard by default); the
+    bucket index is cached on the position store per scheme.
+    """
+    positions = as_positions(balance_sheet)
+    return liquidity_gap_from_sums(
+        positions.bucket_type_sums(positions.amount, bins=bins, labels=labels)
+    )
+
+
+def liquidity_gap_from_sums(sums: pd.DataFrame) -> pd.DataFrame:
+    """Gap table from bucket × ``BALANCE_TYPES`` amount sums."""
+    gap_df = pd.DataFrame(
+        {"Inflows ($)": sums["Asset"], "Outflows ($)": sums["Liability"]}
+    ).fillna(0)
+    gap_df["Gap ($)"] = gap_df["Inflows ($)"] - gap_df["Outflows ($)"]
+    gap_df["Cumulative Gap ($)"] = gap_df["Gap ($)"].cumsum()
+    return gap_df
 
 
 def show(balance_sheet):
+    import plotly.graph_objs as go
+    import streamlit as st
+
     st.header("Liquidity Gap Table")
     st.caption(
         "Maturity-bucketed asset inflows versus liability outflows, with cumulative funding gap."
     )
 
-    gap_source = balance_sheet.copy()
-    gap_source["Bucket"] = assign_maturity_bucket(gap_source["Maturity (Months)"])
-
-    inflows = (
-        gap_source.loc[gap_source["Type"] == "Asset"]
-        .groupby("Bucket", observed=False)["Amount ($)"]
-        .sum()
-    )
-    outflows = (
-        gap_source.loc[gap_source["Type"] == "Liability"]
-        .groupby("Bucket", observed=False)["Amount ($)"]
-        .sum()
-    )
+    ladder_name = st.selectbox("Maturity Ladder", [*MATURITY_LADDERS, "Custom"], index=0)
+    if ladder_name == "Custom":
+        col_daily, col_weekly = st.columns(2)
+        daily_days = col_daily.number_input(
+            "Daily buckets through (days)", min_value=0, max_value=365, value=30, step=1
+        )
+        weekly_months = col_weekly.number_input(
+            "Weekly buckets through (months)", min_value=0, max_value=24, value=3, step=1
+        )
+        ladder = liquidity_ladder(int(daily_days), weekly_months)
+    else:
+        ladder = MATURITY_LADDERS[ladder_name]
 
-    gap_df = pd.DataFrame({"Inflows ($)": inflows, "Outflows ($)": outflows}).fillna(0)
-    gap_df["Gap ($)"] = gap_df["Inflows ($)"] - gap_df["Outflows ($)"]
-    gap_df["Cumulative Gap ($)"] = gap_df["Gap ($)"].cumsum()
+    gap_df = build_liquidity_gap_table(balance_sheet, bins=ladder.bins, labels=ladder.labels)
 
     st.dataframe(
         format_currency_columns(
@@ -47,7 +69,9 @@ def show(balance_sheet):
             name="Cumulative Gap",
         )
     )
-    fig.update_layout(title="Liquidity Gap by Maturity Bucket", yaxis_title="USD")
+    fig.update_layout(
+        title=f"Liquidity Gap by Maturity Bucket ({len(ladder)} buckets)", yaxis_title="USD"
+    )
     st.plotly_chart(fig, use_container_width=True)
 
     min_cum = float(gap_df["Cumulative Gap ($)"].min())
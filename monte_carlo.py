@@ -0,0 +1,233 @@
+"""Monte Carlo rate paths for NII-at-risk and EVE-at-risk."""
+
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from irr import EVE_METHODS, ScenarioMoments, scenario_moments
+from positions import as_positions
+from revaluation import curve_discount_factors, net_cash_flows
+from yield_curve import KEY_TENORS
+
+RATE_MODELS = ["pca", "hull_white"]
+
+# Annual volatility (bps) of each key tenor and the tenor-correlation length
+# (years) of the covariance the PCA factors are extracted from.
+TENOR_VOLS_BPS = [110.0, 105.0, 95.0, 85.0, 75.0]
+CORRELATION_YEARS = 8.0
+PCA_FACTORS = 3
+
+# Hull-White mean reversion (per year) and short-rate volatility (bps per year).
+HULL_WHITE_REVERSION = 0.10
+HULL_WHITE_VOL_BPS = 100.0
+
+DEFAULT_PATHS = 10_000
+DEFAULT_HORIZON_MONTHS = 12
+DEFAULT_CHUNK_PATHS = 1_000
+AT_RISK_LEVELS = [0.95, 0.99]
+PERCENTILES = [1, 5, 50, 95, 99]
+
+
+def pca_loadings(tenors=None, n_factors: int = PCA_FACTORS) -> np.ndarray:
+    """
+    Leading principal components of the annual key-rate covariance (factors × tenors, percent).
+
+    Each loading is scaled by the square root of its eigenvalue, so unit
+    normal factor draws reproduce the retained part of the covariance.
+    """
+    tenors = np.asarray(tenors or KEY_TENORS, dtype=float)
+    vols = np.interp(tenors, KEY_TENORS, TENOR_VOLS_BPS) / 100
+    correlation = np.exp(-np.abs(tenors[:, None] - tenors[None, :]) / CORRELATION_YEARS)
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation * np.outer(vols, vols))
+    top = np.argsort(eigenvalues)[::-1][:n_factors]
+    return (eigenvectors[:, top] * np.sqrt(np.maximum(eigenvalues[top], 0.0))).T
+
+
+def hull_white_loadings(tenors=None) -> np.ndarray:
+    """Zero-rate response B(τ)/τ of each tenor to a unit short-rate move (1 × tenors)."""
+    tenors = np.asarray(tenors or KEY_TENORS, dtype=float)
+    a = HULL_WHITE_REVERSION
+    return (-np.expm1(-a * tenors) / (a * tenors))[None, :]
+
+
+def simulate_rate_paths(
+    n_paths: int,
+    horizon_months: int,
+    model: str = "pca",
+    seed: int | np.random.SeedSequence = 0,
+    tenors=None,
+) -> np.ndarray:
+    """
+    Simulate key-rate shifts from today's curve (paths × months × tenors, percent).
+
+    ``"pca"`` drives the curve with independent Gaussian increments of the
+    leading covariance factors; ``"hull_white"`` evolves an Ornstein-Uhlenbeck
+    short-rate deviation with exact monthly transitions and maps it onto the
+    curve through the Hull-White affine loadings.
+    """
+    if model not in RATE_MODELS:
+        raise ValueError(f"Unknown rate model: {model}")
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / 12
+
+    if model == "pca":
+        loadings = pca_loadings(tenors)
+        draws = rng.standard_normal((n_paths, horizon_months, len(loadings)))
+        factors = np.cumsum(draws, axis=1) * np.sqrt(dt)
+        return factors @ loadings
+
+    a = HULL_WHITE_REVERSION
+    decay = np.exp(-a * dt)
+    step_vol = HULL_WHITE_VOL_BPS / 100 * np.sqrt(-np.expm1(-2 * a * dt) / (2 * a))
+    shocks = rng.standard_normal((n_paths, horizon_months)) * step_vol
+    # One vectorized step per month across all paths.
+    short_rate = np.empty_like(shocks)
+    state = np.zeros(n_paths)
+    for month in range(horizon_months):
+        state = state * decay + shocks[:, month]
+        short_rate[:, month] = state
+    return short_rate[:, :, None] * hull_white_loadings(tenors)[None, :, :]
+
+
+@dataclass(frozen=True)
+class _Pricer:
+    """Everything a worker needs to reprice paths; small enough to pickle per task."""
+
+    moments: ScenarioMoments
+    cash_flows: np.ndarray | None
+    tenors: tuple[float, ...]
+    horizon_months: int
+    model: str
+
+    def price(self, n_paths: int, seed: np.random.SeedSequence) -> np.ndarray:
+        paths = simulate_rate_paths(n_paths, self.horizon_months, self.model, seed, self.tenors)
+        monthly = paths.reshape(-1, len(self.tenors))
+        nii = self.moments.nii(monthly).reshape(n_paths, self.horizon_months).sum(axis=1) / 12
+        terminal = paths[:, -1, :]
+        if self.cash_flows is None:
+            eve = self.moments.eve(terminal)
+        else:
+            eve = (
+                curve_discount_factors(terminal, len(self.cash_flows), self.tenors)
+                @ self.cash_flows
+            )
+        return np.column_stack([nii, eve])
+
+
+def _price_chunk(pricer: _Pricer, n_paths: int, seed: np.random.SeedSequence) -> np.ndarray:
+    return pricer.price(n_paths, seed)
+
+
+@dataclass(frozen=True)
+class MonteCarloResult:
+    """Per-path horizon NII and horizon EVE alongside their unshocked values."""
+
+    nii: np.ndarray
+    eve: np.ndarray
+    base_nii: float
+    base_eve: float
+
+    def summary(self, levels=None) -> pd.DataFrame:
+        """Percentiles, value-at-risk and expected shortfall of ΔNII and ΔEVE."""
+        rows = {
+            "NII": self.nii - self.base_nii,
+            "EVE": self.eve - self.base_eve,
+        }
+        return pd.DataFrame(
+            {measure: at_risk_summary(delta, levels) for measure, delta in rows.items()}
+        ).T.rename_axis("Measure")
+
+
+def at_risk_summary(delta: np.ndarray, levels=None) -> pd.Series:
+    """
+    Summarize simulated changes; at-risk figures are reported as positive losses.
+
+    VaR at level α is the loss at the (1 − α) quantile and expected shortfall
+    the mean loss of the paths at or beyond it.
+    """
+    delta = np.asarray(delta, dtype=float)
+    summary = {"Mean Δ ($)": delta.mean()}
+    for percentile, value in zip(PERCENTILES, np.percentile(delta, PERCENTILES)):
+        summary[f"P{percentile} Δ ($)"] = value
+    for level in levels or AT_RISK_LEVELS:
+        cutoff = np.quantile(delta, 1 - level)
+        summary[f"VaR {level:.0%} ($)"] = -cutoff
+        summary[f"ES {level:.0%} ($)"] = -delta[delta <= cutoff].mean()
+    return pd.Series(summary)
+
+
+def run_monte_carlo(
+    balance_sheet,
+    balance_sensitivity: dict,
+    n_paths: int = DEFAULT_PATHS,
+    horizon_months: int = DEFAULT_HORIZON_MONTHS,
+    model: str = "pca",
+    seed: int = 0,
+    eve_method: str = "full",
+    chunk_paths: int = DEFAULT_CHUNK_PATHS,
+    max_workers: int = 1,
+    progress: Callable[[int, int], None] | None = None,
+    mp_context=None,
+) -> MonteCarloResult:
+    """
+    Reprice NII and EVE along simulated curve paths.
+
+    NII is earned month by month on each path's curve over *horizon_months*
+    (static balance sheet); EVE is revalued on the curve at the horizon.
+    The book is reduced to scenario moments and netted cash flows once, so
+    each chunk of paths costs O(paths × months × T²) whatever the book size.
+    Every chunk draws from its own child of ``SeedSequence(seed)``, so for a
+    given *chunk_paths* results are identical for any worker count.
+    """
+    if eve_method not in EVE_METHODS:
+        raise ValueError(f"Unknown EVE method: {eve_method}")
+    positions = as_positions(balance_sheet)
+    tenors = tuple(float(tenor) for tenor in KEY_TENORS)
+    pricer = _Pricer(
+        moments=scenario_moments(positions, balance_sensitivity, tenors),
+        cash_flows=net_cash_flows(positions) if eve_method == "full" else None,
+        tenors=tenors,
+        horizon_months=int(horizon_months),
+        model=model,
+    )
+
+    sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    results = np.empty((n_paths, 2))
+
+    def _record(index, values):
+        results[offsets[index] : offsets[index + 1]] = values
+        if progress is not None:
+            progress(int(offsets[index + 1]), n_paths)
+
+    if max_workers == 1 or len(sizes) <= 1:
+        for index, (size, chunk_seed) in enumerate(zip(sizes, seeds)):
+            _record(index, pricer.price(size, chunk_seed))
+    else:
+        context = mp_context or multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_price_chunk, pricer, size, chunk_seed)
+                for size, chunk_seed in zip(sizes, seeds)
+            ]
+            for index, future in enumerate(futures):
+                _record(index, future.result())
+
+    zero = np.zeros((1, len(tenors)))
+    base_nii = float(pricer.moments.nii(zero)[0]) * horizon_months / 12
+    if pricer.cash_flows is None:
+        base_eve = float(pricer.moments.eve(zero)[0])
+    else:
+        base_eve = float(
+            curve_discount_factors(zero, len(pricer.cash_flows), tenors)[0] @ pricer.cash_flows
+        )
+    return MonteCarloResult(
+        nii=results[:, 0], eve=results[:, 1], base_nii=base_nii, base_eve=base_eve
+    )
@@ -0,0 +1,211 @@
+"""Compact, array-backed storage for balance sheet positions."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from alm_utils import (
+    BALANCE_TYPES,
+    MATURITY_BINS_STANDARD,
+    MATURITY_LABELS_STANDARD,
+    REQUIRED_COLUMNS,
+    BalanceSheetStats,
+    balance_sheet_type_codes,
+    bucket_type_slots,
+    maturity_bucket_codes,
+    stats_from_arrays,
+    sum_by_bucket_type,
+)
+
+# Index -1 (unknown type) falls through to the trailing zero.
+TYPE_SIGNS = np.array([1.0, -1.0, 0.0])
+
+
+def _smallest_code_dtype(n_labels: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_labels <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _encode_labels(series: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, labels = series.cat.codes.to_numpy(), series.cat.categories.to_numpy(dtype=object)
+    else:
+        codes, labels = pd.factorize(series)
+        labels = np.asarray(labels, dtype=object)
+    return codes.astype(_smallest_code_dtype(len(labels)), copy=False), labels
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array = np.asarray(array)
+    if array.flags.writeable:
+        array = array.view()
+        array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True, eq=False)
+class PositionStore:
+    """
+    Balance sheet positions as contiguous NumPy arrays.
+
+    ``Product`` and ``Type`` are held as small integer codes plus a label
+    table; ``type_codes`` index ``BALANCE_TYPES`` (-1 for anything else).
+    Numeric columns are float64 by default or float32 when requested. All
+    arrays are read-only, so a store can be shared between sessions and
+    modules without defensive copies.
+    """
+
+    product_codes: np.ndarray
+    product_labels: np.ndarray
+    type_codes: np.ndarray
+    amount: np.ndarray
+    rate: np.ndarray
+    duration: np.ndarray
+    maturity: np.ndarray
+    _bucket_slots: dict = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        for name in ("product_codes", "type_codes", "amount", "rate", "duration", "maturity"):
+            object.__setattr__(self, name, _read_only(getattr(self, name)))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, float32: bool = False) -> "PositionStore":
+        """Build a store from a validated frame, reusing its float64 buffers where possible."""
+        dtype = np.float32 if float32 else np.float64
+        product_codes, product_labels = _encode_labels(df["Product"])
+        type_codes = balance_sheet_type_codes(df["Type"]).astype(np.int8, copy=False)
+        return cls(
+            product_codes=product_codes,
+            product_labels=product_labels,
+            type_codes=type_codes,
+            amount=df["Amount ($)"].to_numpy(dtype=dtype),
+            rate=df["Rate (%)"].to_numpy(dtype=dtype),
+            duration=df["Duration (Years)"].to_numpy(dtype=dtype),
+            maturity=df["Maturity (Months)"].to_numpy(dtype=dtype),
+        )
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (
+            self.product_codes,
+            self.type_codes,
+            self.amount,
+            self.rate,
+            self.duration,
+            self.maturity,
+        )
+        return sum(array.nbytes for array in arrays) + sum(
+            len(str(label)) for label in self.product_labels
+        )
+
+    @property
+    def products(self) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.product_codes, categories=self.product_labels)
+
+    @property
+    def types(self) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.type_codes, categories=BALANCE_TYPES)
+
+    @cached_property
+    def signs(self) -> np.ndarray:
+        """+1 for assets, -1 for liabilities and 0 for anything else."""
+        return TYPE_SIGNS[self.type_codes]
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """
+        Content hash of the positions; the arrays are read-only, so it is computed once.
+
+        Product codes are hashed against the sorted label table, so stores
+        built from the same rows in any label order hash alike.
+        """
+        labels = np.asarray(self.product_labels, dtype=str)
+        order = np.argsort(labels, kind="stable")
+        rank = np.empty(len(labels) + 1, dtype=np.int32)
+        rank[order] = np.arange(len(labels), dtype=np.int32)
+        rank[-1] = -1
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\x1f".join(labels[order]).encode("utf-8"))
+        arrays = {
+            "product": rank[self.product_codes],
+            "type": self.type_codes.astype(np.int8),
+            "amount": self.amount,
+            "rate": self.rate,
+            "duration": self.duration,
+            "maturity": self.maturity,
+        }
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            digest.update(f"{name}:{array.dtype.str}:".encode("ascii"))
+            digest.update(array.data)
+        return digest.hexdigest()
+
+    @cached_property
+    def stats(self) -> BalanceSheetStats:
+        return stats_from_arrays(self.type_codes, self.amount, self.rate, self.duration)
+
+    def bucket_slots(self, bins=None) -> np.ndarray:
+        """
+        (maturity bucket, type) slot per position for a bucket scheme.
+
+        Computed once per store and scheme, so every gap table over the same
+        dataset and bins reuses the same integer index.
+        """
+        edges = tuple(MATURITY_BINS_STANDARD if bins is None else bins)
+        slots = self._bucket_slots.get(edges)
+        if slots is None:
+            slots = bucket_type_slots(
+                maturity_bucket_codes(self.maturity, edges), self.type_codes, len(edges) - 1
+            )
+            slots.flags.writeable = False
+            self._bucket_slots[edges] = slots
+        return slots
+
+    def bucket_type_sums(self, values, bins=None, labels=None) -> pd.DataFrame:
+        """Sum *values* by maturity bucket and type through the cached slot index."""
+        labels = MATURITY_LABELS_STANDARD if labels is None else list(labels)
+        if bins is not None and len(bins) != len(labels) + 1:
+            raise ValueError("A bucket scheme needs one more bin edge than labels.")
+        return sum_by_bucket_type(values, self.bucket_slots(bins), labels)
+
+    def type_mask(self, balance_type: str) -> np.ndarray:
+        return self.type_codes == BALANCE_TYPES.index(balance_type)
+
+    def map_products(self, mapping: dict, default: float = 0.0) -> np.ndarray:
+        """Look up a per-product value for every position via the label table."""
+        lookup = np.array(
+            [mapping.get(label, default) for label in self.product_labels] + [default],
+            dtype=float,
+        )
+        return lookup[self.product_codes]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild a ``REQUIRED_COLUMNS`` frame with categorical text columns."""
+        return pd.DataFrame(
+            {
+                "Product": self.products,
+                "Type": self.types,
+                "Amount ($)": self.amount,
+                "Rate (%)": self.rate,
+                "Duration (Years)": self.duration,
+                "Maturity (Months)": self.maturity,
+            },
+            columns=REQUIRED_COLUMNS,
+        )
+
+
+def as_positions(data, float32: bool = False) -> PositionStore:
+    """Return *data* if it is already a :class:`PositionStore`, else build one."""
+    if isinstance(data, PositionStore):
+        return data
+    return PositionStore.from_frame(data, float32=float32)
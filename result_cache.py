@@ -0,0 +1,218 @@
+"""Content-addressed on-disk cache of result tables.
+
+A result is keyed by a hash of the dataset's content fingerprint, the kind
+of result and every assumption that produced it (scenarios, sensitivities,
+method choices), and stored as one Parquet file. The cache therefore
+survives restarts and is shared by the dashboard and the nightly batch;
+any change to the data or the assumptions simply misses. The directory is
+kept under a byte budget by evicting the least recently used files.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from data_loader import dataset_fingerprint
+
+APP_DIR = Path(__file__).resolve().parent
+# Anchored to the app directory, not the working directory; ALM_RESULT_CACHE_DIR overrides it.
+DEFAULT_RESULT_CACHE_DIR = Path(
+    os.environ.get("ALM_RESULT_CACHE_DIR", APP_DIR / ".alm_cache" / "results")
+)
+DEFAULT_RESULT_CACHE_BYTES = 512 * 1024**2
+# Part of every key: bump when a calculation changes so stale results miss.
+RESULT_CACHE_VERSION = 1
+
+
+def _canonical(value):
+    """A JSON-serializable stand-in for *value* that is equal for equal content."""
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {type(value).__name__: _canonical(dataclasses.asdict(value))}
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hashed = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        columns = list(value.columns) if isinstance(value, pd.DataFrame) else [value.name]
+        return {"frame": _canonical(columns), "hash": hashlib.blake2b(hashed).hexdigest()}
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        return {"array": [array.dtype.str, list(array.shape)], "hash": _digest(array.data)}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def result_key(kind: str, data, **assumptions) -> str:
+    """
+    Cache key of result *kind* computed from *data* under *assumptions*.
+
+    *data* is a balance sheet frame or ``PositionStore`` (hashed by content)
+    or ``None`` for results that do not depend on a balance sheet.
+    """
+    payload = {
+        "version": RESULT_CACHE_VERSION,
+        "kind": kind,
+        "dataset": None if data is None else dataset_fingerprint(data),
+        "assumptions": _canonical(assumptions),
+    }
+    return _digest(json.dumps(payload, sort_keys=True, default=str).encode("utf-8"))
+
+
+class ResultCache:
+    """
+    Parquet result tables in *directory*, bounded by *max_bytes* on disk.
+
+    Reads refresh a file's modification time, so eviction drops the least
+    recently used results first. Writes go through a temporary file and an
+    atomic rename, so concurrent processes never see partial tables.
+    ``hits`` and ``misses`` count lookups made through this instance.
+    """
+
+    def __init__(
+        self,
+        directory=DEFAULT_RESULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_RESULT_CACHE_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.parquet"
+
+    def _files(self) -> list[os.DirEntry]:
+        try:
+            return [
+                entry
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".parquet") and entry.is_file()
+            ]
+        except FileNotFoundError:
+            return []
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._file_size(entry) for entry in self._files())
+
+    @staticmethod
+    def _file_size(entry: os.DirEntry) -> int:
+        try:
+            return entry.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        """The table stored under *key*, or ``None``; unreadable files count as misses."""
+        path = self._path(key)
+        try:
+            table = pd.read_parquet(path)
+            os.utime(path)
+        except FileNotFoundError:
+            table = None
+        except Exception:
+            # A truncated or foreign file is dropped and recomputed.
+            path.unlink(missing_ok=True)
+            table = None
+        self._count(table is not None)
+        return table
+
+    def put(self, key: str, table: pd.DataFrame) -> None:
+        """Store *table* under *key*, then evict old results beyond the byte budget."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        scratch = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            table.to_parquet(scratch)
+            os.replace(scratch, path)
+        finally:
+            scratch.unlink(missing_ok=True)
+        self.evict(keep=path.name)
+
+    def evict(self, keep: str | None = None) -> int:
+        """Delete least recently used files until the cache fits; returns files removed."""
+        files = []
+        for entry in self._files():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, entry))
+        files.sort(key=lambda item: item[0])
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, entry in files:
+            if total <= self.max_bytes:
+                break
+            # The newest result is always kept, even if it alone exceeds the budget.
+            if entry.name == keep:
+                continue
+            Path(entry.path).unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def fetch(
+        self, kind: str, data, compute: Callable[[], pd.DataFrame], **assumptions
+    ) -> pd.DataFrame:
+        """Return the cached result for :func:`result_key` inputs, computing and storing a miss."""
+        key = result_key(kind, data, **assumptions)
+        table = self.get(key)
+        if table is None:
+            table = compute()
+            self.put(key, table)
+        return table
+
+    def stats(self) -> dict:
+        files = self._files()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(files),
+            "bytes": sum(self._file_size(entry) for entry in files),
+        }
+
+    def clear(self) -> None:
+        for entry in self._files():
+            Path(entry.path).unlink(missing_ok=True)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+_RESULT_CACHE = ResultCache()
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache used by the dashboard pages."""
+    return _RESULT_CACHE
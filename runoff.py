@@ -0,0 +1,238 @@
+"""Behavioral runoff profiles and sparse monthly principal runoff matrices."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cash_flows import contract_terms
+from positions import as_positions
+
+DEFAULT_RUNOFF_HORIZON = 360
+
+
+def _fit_horizon(flows: np.ndarray, horizon: int) -> np.ndarray:
+    """Pad or cut unit runoff to *horizon* months; balance left at the horizon runs off then."""
+    fitted = np.zeros(horizon)
+    fitted[: min(len(flows), horizon)] = flows[:horizon]
+    fitted[-1] += max(1.0 - fitted.sum(), 0.0)
+    return fitted
+
+
+@dataclass(frozen=True)
+class ExponentialDecay:
+    """A constant fraction of the remaining balance runs off every month."""
+
+    monthly_rate: float
+
+    def __post_init__(self):
+        if not 0 < self.monthly_rate <= 1:
+            raise ValueError("Monthly decay rate must be in (0, 1].")
+
+    def unit_runoff(self, horizon: int) -> np.ndarray:
+        months = np.arange(horizon)
+        return _fit_horizon(self.monthly_rate * (1 - self.monthly_rate) ** months, horizon)
+
+
+@dataclass(frozen=True)
+class CoreVolatileSplit:
+    """
+    Volatile balances leave straight-line over *volatile_months*; the stable
+    core share runs off straight-line over *core_months*.
+    """
+
+    core_share: float
+    core_months: int = 60
+    volatile_months: int = 1
+
+    def __post_init__(self):
+        if not 0 <= self.core_share <= 1:
+            raise ValueError("Core share must be between 0 and 1.")
+        if self.core_months < 1 or self.volatile_months < 1:
+            raise ValueError("Core and volatile runoff periods must be at least one month.")
+
+    def unit_runoff(self, horizon: int) -> np.ndarray:
+        flows = np.zeros(max(self.core_months, self.volatile_months))
+        flows[: self.volatile_months] += (1 - self.core_share) / self.volatile_months
+        flows[: self.core_months] += self.core_share / self.core_months
+        return _fit_horizon(flows, horizon)
+
+
+@dataclass(frozen=True)
+class DecayTable:
+    """
+    User-supplied fraction of the original balance running off in each month.
+
+    Whatever the table leaves outstanding runs off in the month after it ends.
+    """
+
+    runoff: tuple[float, ...]
+
+    def __post_init__(self):
+        runoff = np.asarray(self.runoff, dtype=float)
+        if runoff.size == 0 or (runoff < 0).any() or runoff.sum() > 1 + 1e-9:
+            raise ValueError("Decay table runoff must be non-negative and sum to at most 100%.")
+
+    def unit_runoff(self, horizon: int) -> np.ndarray:
+        runoff = np.asarray(self.runoff, dtype=float)
+        return _fit_horizon(np.append(runoff, max(1.0 - runoff.sum(), 0.0)), horizon)
+
+
+RUNOFF_PROFILES = {
+    "Exponential Decay": ExponentialDecay,
+    "Core / Volatile": CoreVolatileSplit,
+    "Decay Table": DecayTable,
+}
+
+DEFAULT_BEHAVIORAL_RUNOFF = {
+    "Core Checking": CoreVolatileSplit(core_share=0.7, core_months=84),
+    "Savings Account": ExponentialDecay(monthly_rate=0.03),
+}
+
+
+def decay_tables_from_frame(df: pd.DataFrame) -> dict:
+    """
+    Read per-product decay tables from long-format rows.
+
+    Expects ``Product``, ``Month`` (1-based) and ``Runoff (%)`` columns, the
+    percentage of the original balance leaving in that month; months
+    missing from a product's table run off nothing.
+    """
+    required = ["Product", "Month", "Runoff (%)"]
+    missing = [column for column in required if column not in df.columns]
+    if missing:
+        raise ValueError(f"Decay table is missing columns: {', '.join(missing)}")
+    months = pd.to_numeric(df["Month"], errors="raise").astype(int)
+    if (months < 1).any():
+        raise ValueError("Decay table months must start at 1.")
+
+    tables = {}
+    for product, rows in df.assign(Month=months).groupby("Product", sort=False):
+        runoff = np.zeros(int(rows["Month"].max()))
+        np.add.at(runoff, rows["Month"].to_numpy() - 1, rows["Runoff (%)"].to_numpy() / 100)
+        tables[product] = DecayTable(tuple(runoff.tolist()))
+    return tables
+
+
+def _concat_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenated ``arange(start, start + count)`` ranges, built without a Python loop."""
+    ends = np.cumsum(counts)
+    offsets = np.repeat(ends - counts, counts)
+    return np.repeat(starts, counts) + np.arange(ends[-1] if len(ends) else 0) - offsets
+
+
+@dataclass(frozen=True)
+class RunoffMatrix:
+    """
+    Positions × months principal runoff, stored sparsely.
+
+    Row *i* is ``amount[i]`` times unit profile ``profile_codes[i]``. The
+    unit profiles are held in CSR form (``indptr``, 0-based ``months``,
+    ``weights``) with zero months dropped, so storage is one code per
+    position plus the nonzeros of each distinct profile rather than
+    positions × horizon cells.
+    """
+
+    amount: np.ndarray
+    profile_codes: np.ndarray
+    indptr: np.ndarray
+    months: np.ndarray
+    weights: np.ndarray
+    horizon: int
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self), self.horizon
+
+    @property
+    def n_profiles(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (self.amount, self.profile_codes, self.indptr, self.months, self.weights)
+        )
+
+    def monthly_totals(self, mask=None) -> np.ndarray:
+        """Column sums (runoff per month) over all positions or the *mask*-selected ones."""
+        amount = self.amount if mask is None else np.where(mask, self.amount, 0.0)
+        totals = np.bincount(self.profile_codes, weights=amount, minlength=self.n_profiles)
+        return np.bincount(
+            self.months,
+            weights=self.weights * np.repeat(totals, np.diff(self.indptr)),
+            minlength=self.horizon,
+        )
+
+    def rows(self, rows) -> np.ndarray:
+        """Materialize the selected rows as a dense ``len(rows) × horizon`` array."""
+        rows = np.arange(len(self))[rows]
+        codes = self.profile_codes[rows]
+        starts, counts = self.indptr[codes], np.diff(self.indptr)[codes]
+        cells = _concat_ranges(starts, counts)
+        dense = np.zeros((len(rows), self.horizon))
+        dense[np.repeat(np.arange(len(rows)), counts), self.months[cells]] = (
+            self.weights[cells] * np.repeat(self.amount[rows], counts)
+        )
+        return dense
+
+    def to_dense(self) -> np.ndarray:
+        return self.rows(slice(None))
+
+
+def runoff_matrix(
+    balance_sheet,
+    profiles: dict | None = None,
+    horizon: int = DEFAULT_RUNOFF_HORIZON,
+) -> RunoffMatrix:
+    """
+    Build the monthly principal runoff of every position.
+
+    Products in *profiles* (``DEFAULT_BEHAVIORAL_RUNOFF`` by default) follow
+    their behavioral profile; all others run off straight-line over their
+    contractual term. Balances still outstanding at *horizon* run off in
+    its last month, so every row sums to the position's amount.
+    """
+    profiles = DEFAULT_BEHAVIORAL_RUNOFF if profiles is None else profiles
+    horizon = int(horizon)
+    if horizon < 1:
+        raise ValueError("Runoff horizon must be at least one month.")
+    positions = as_positions(balance_sheet)
+
+    behavioral = [product for product in positions.product_labels if product in profiles]
+    behavioral_codes = positions.map_products(
+        {product: code for code, product in enumerate(behavioral)}, default=-1
+    ).astype(np.int64)
+    term_codes, unique_terms = pd.factorize(contract_terms(positions.maturity), sort=True)
+    unique_terms = np.asarray(unique_terms, dtype=np.int64)
+    profile_codes = np.where(
+        behavioral_codes >= 0, behavioral_codes, len(behavioral) + term_codes
+    ).astype(np.int64)
+
+    # Behavioral profiles: one dense unit vector each, zeros dropped.
+    dense = [profiles[product].unit_runoff(horizon) for product in behavioral]
+    behavioral_months = [np.flatnonzero(flows) for flows in dense]
+    behavioral_weights = [flows[months] for flows, months in zip(dense, behavioral_months)]
+
+    # Straight-line profiles, built for all distinct terms at once.
+    counts = np.minimum(unique_terms, horizon)
+    line_months = _concat_ranges(np.zeros(len(counts), dtype=np.int64), counts)
+    line_weights = np.repeat(1.0 / np.maximum(unique_terms, 1), counts)
+    # Terms beyond the horizon put their remaining balance in its last month.
+    line_weights[np.cumsum(counts) - 1] += (unique_terms - counts) / np.maximum(unique_terms, 1)
+
+    lengths = np.concatenate([[len(months) for months in behavioral_months], counts])
+    return RunoffMatrix(
+        amount=np.asarray(positions.amount, dtype=float),
+        profile_codes=profile_codes,
+        indptr=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+        months=np.concatenate([*behavioral_months, line_months]).astype(np.int64),
+        weights=np.concatenate([*behavioral_weights, line_weights]),
+        horizon=horizon,
+    )
@@ -1,44 +1,65 @@
-import json
-import os
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
-import streamlit as st
 
-SCENARIO_FILE = "saved_scenarios.json"
-KEY_TENORS = [1, 2, 5, 10, 30]
-BASE_YIELD = [2.0, 2.1, 2.4, 2.8, 3.2]
+from data_loader import memoize_for_frame
+from result_cache import get_result_cache, result_key
+from revaluation import build_dv01_ladder
+from yield_curve import BASE_CURVE, BASE_YIELD, KEY_TENORS, ShiftedCurve
 
-
-def _load_saved_scenarios():
-    if "saved_scenarios" not in st.session_state:
-        if os.path.exists(SCENARIO_FILE):
-            with open(SCENARIO_FILE, "r", encoding="utf-8") as handle:
-                st.session_state.saved_scenarios = json.load(handle)
-        else:
-            st.session_state.saved_scenarios = []
-    for scenario in st.session_state.saved_scenarios:
-        scenario.setdefault("favorite", False)
+# Years at which the continuous base and shocked curves are charted.
+CHART_TENORS = np.linspace(0.25, 30, 120)
 
 
-def _persist_scenarios():
-    with open(SCENARIO_FILE, "w", encoding="utf-8") as handle:
-        json.dump(st.session_state.saved_scenarios, handle, indent=2)
+def shocked_curve(
+    curve_shape: str, shift_bps: int = 0, custom_shocks: list | None = None
+) -> ShiftedCurve:
+    """The scenario as a view of ``BASE_CURVE``, shifted by key-rate shocks in bps."""
+    if curve_shape == "Parallel Shift":
+        return BASE_CURVE.shifted(shift_bps / 100)
+    steps = np.arange(len(KEY_TENORS)) * 10
+    if curve_shape == "Bear Steepener":
+        shocks = steps
+    elif curve_shape == "Bull Steepener":
+        shocks = -steps
+    else:
+        shocks = np.asarray(custom_shocks or [0] * len(KEY_TENORS), dtype=float)
+    return BASE_CURVE.shifted(shocks / 100, KEY_TENORS)
 
 
 def build_shocked_curve(curve_shape: str, shift_bps: int = 0, custom_shocks: list | None = None):
-    if curve_shape == "Parallel Shift":
-        return [y + shift_bps / 100 for y in BASE_YIELD]
-    if curve_shape == "Bear Steepener":
-        return [y + (i * 10) / 100 for i, y in enumerate(BASE_YIELD)]
-    if curve_shape == "Bull Steepener":
-        return [y - (i * 10) / 100 for i, y in enumerate(BASE_YIELD)]
-    shocks = custom_shocks or [0] * len(BASE_YIELD)
-    return [base + delta / 100 for base, delta in zip(BASE_YIELD, shocks)]
+    """Shocked zero rates (percent) at ``KEY_TENORS``."""
+    return shocked_curve(curve_shape, shift_bps, custom_shocks).zero_rates(KEY_TENORS).tolist()
+
+
+def dv01_ladder(balance_sheet, trades=None, fx_market=None) -> pd.DataFrame:
+    """
+    Key-rate DV01 ladder of *balance_sheet* and the validated trade book *trades*.
+
+    Cached in memory per dataset and trade book, and on disk in the result
+    cache, so it survives restarts.
+    """
+    assumptions = {"trades": trades, "fx_market": fx_market}
+    return memoize_for_frame(
+        balance_sheet,
+        f"dv01_ladder:{result_key('dv01_ladder', None, **assumptions)}",
+        lambda: get_result_cache().fetch(
+            "dv01_ladder",
+            balance_sheet,
+            lambda: build_dv01_ladder(balance_sheet, trades, fx_market),
+            **assumptions,
+        ),
+    )
+
+
+def scenario_builder(balance_sheet):
+    import plotly.graph_objs as go
+    import streamlit as st
 
+    from derivatives_book import session_trades
+    from scenario_store import get_scenario_store
 
-def scenario_builder():
     st.header("Interest Rate Scenario Builder")
     st.markdown(
         "Define and customize yield curve scenarios. "
@@ -85,21 +106,16 @@ def scenario_builder():
                     )
                 )
 
-        assumed_dv01 = st.number_input(
-            "Assumed DV01 ($ per 1M per bp)",
-            min_value=0,
-            value=50,
-            help="Estimate the dollar value of a one basis point move per $1M notional",
-        )
         submitted = st.form_submit_button("Calculate & Preview")
 
+    store = get_scenario_store()
     if not submitted:
         st.info("Fill the form and click 'Calculate & Preview' to see results.")
-        _load_saved_scenarios()
-        _render_saved_scenarios()
+        _render_saved_scenarios(store)
         return None
 
-    shocked_yield = build_shocked_curve(curve_shape, shift, custom_shocks)
+    scenario_curve = shocked_curve(curve_shape, shift, custom_shocks)
+    shocked_yield = scenario_curve.zero_rates(KEY_TENORS).tolist()
 
     curve_df = pd.DataFrame(
         {
@@ -121,17 +137,31 @@ def scenario_builder():
     )
 
     fig = go.Figure()
-    fig.add_trace(
-        go.Scatter(x=KEY_TENORS, y=BASE_YIELD, name="Base Curve", mode="lines+markers")
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=KEY_TENORS,
-            y=shocked_yield,
-            name="Shocked Curve",
-            mode="lines+markers",
+    for name, curve, nodes, color in (
+        ("Base Curve", BASE_CURVE, BASE_YIELD, "#636efa"),
+        ("Shocked Curve", scenario_curve, shocked_yield, "#ef553b"),
+    ):
+        fig.add_trace(
+            go.Scatter(
+                x=CHART_TENORS,
+                y=curve.zero_rates(CHART_TENORS),
+                name=name,
+                mode="lines",
+                line_color=color,
+                legendgroup=name,
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=KEY_TENORS,
+                y=nodes,
+                name=name,
+                mode="markers",
+                marker_color=color,
+                legendgroup=name,
+                showlegend=False,
+            )
         )
-    )
     fig.update_layout(
         title=f"Yield Curve: {scenario_name}",
         xaxis_title="Years",
@@ -144,13 +174,38 @@ def scenario_builder():
     curve_bp_shift = [
         round((new - old) * 100, 1) for new, old in zip(shocked_yield, BASE_YIELD)
     ]
-    impact_df = pd.DataFrame({"Tenor (Yrs)": KEY_TENORS, "Δ (bps)": curve_bp_shift})
+    # The same trade book the derivatives and IRR pages value and hedge with.
+    try:
+        ladder = dv01_ladder(balance_sheet, *session_trades())
+    except ValueError as exc:
+        st.warning(f"Derivatives left out of the DV01 ladder: {exc}")
+        ladder = dv01_ladder(balance_sheet)
+    impact_df = ladder.reset_index().rename(columns={"Tenor (Years)": "Tenor (Yrs)"})
+    impact_df.insert(1, "Δ (bps)", curve_bp_shift)
+    impact_df["Δ MTM ($)"] = impact_df["Total DV01 ($)"] * impact_df["Δ (bps)"]
 
     st.subheader("Impact Summary")
-    st.table(impact_df.style.format({"Δ (bps)": "{:+}"}))
+    st.table(
+        impact_df.style.format(
+            {
+                "Δ (bps)": "{:+}",
+                "Balance Sheet DV01 ($)": "${:,.0f}",
+                "Derivatives DV01 ($)": "${:,.0f}",
+                "Total DV01 ($)": "${:,.0f}",
+                "Δ MTM ($)": "${:,.0f}",
+            }
+        )
+    )
 
-    total_dv01 = sum(bp * assumed_dv01 for bp in curve_bp_shift)
-    st.metric("Total Δ MTM Estimate ($ per 1M)", f"{total_dv01:,.0f}")
+    # A shock's first-order impact is its bp vector dotted with the cached ladder.
+    shock = impact_df["Δ (bps)"].to_numpy()
+    balance_sheet_dv01 = float(ladder["Balance Sheet DV01 ($)"].to_numpy() @ shock)
+    derivatives_dv01 = float(ladder["Derivatives DV01 ($)"].to_numpy() @ shock)
+    total_dv01 = balance_sheet_dv01 + derivatives_dv01
+    col_bs, col_der, col_total = st.columns(3)
+    col_bs.metric("Balance Sheet Δ MTM ($)", f"{balance_sheet_dv01:,.0f}")
+    col_der.metric("Derivatives Δ MTM ($)", f"{derivatives_dv01:,.0f}")
+    col_total.metric("Total Δ MTM ($)", f"{total_dv01:,.0f}")
 
     scenario_output = {
         "name": scenario_name,
@@ -164,70 +219,83 @@ def scenario_builder():
         "favorite": False,
     }
 
-    _load_saved_scenarios()
-
     st.markdown("---")
     st.subheader("Manage Saved Scenarios")
 
     col1, col2 = st.columns([1, 1])
     if col1.button("Save Scenario", disabled=not scenario_name.strip()):
-        names = [s["name"] for s in st.session_state.saved_scenarios]
-        if scenario_name in names:
-            st.warning("Scenario with this name already exists.")
+        try:
+            store.save(scenario_output)
+        except ValueError as exc:
+            st.warning(str(exc))
         else:
-            st.session_state.saved_scenarios.append(scenario_output)
-            _persist_scenarios()
             st.success(f"Saved scenario '{scenario_name}'.")
 
-    if st.session_state.saved_scenarios:
-        export_df = pd.DataFrame(st.session_state.saved_scenarios)
+    if len(store):
         col2.download_button(
             label="Download CSV of Scenarios",
-            data=export_df.to_csv(index=False),
+            data=store.export_frame().to_csv(index=False),
             file_name="scenarios_export.csv",
             mime="text/csv",
         )
     else:
         col2.info("No saved scenarios to export.")
 
-    _render_saved_scenarios()
+    _render_saved_scenarios(store)
 
     st.markdown("---")
     st.caption("Scenario builder developed for ALM & Risk Quant portfolio showcasing.")
     return scenario_output
 
 
-def _render_saved_scenarios():
-    if not st.session_state.get("saved_scenarios"):
+def _render_saved_scenarios(store):
+    import streamlit as st
+
+    from scenario_store import DEFAULT_PAGE_SIZE
+
+    if not len(store):
         st.info("No scenarios saved yet. Use the form above to create one.")
         return
 
     st.subheader("Saved Scenarios List")
-    df_scenarios = pd.DataFrame(st.session_state.saved_scenarios)
-    df_scenarios["timestamp"] = pd.to_datetime(df_scenarios["timestamp"]).dt.strftime(
-        "%Y-%m-%d %H:%M:%S"
+    col_search, col_favorites, col_page = st.columns([2, 1, 1])
+    search = col_search.text_input("Search by name", key="scenario_search")
+    favorites_only = col_favorites.checkbox("Favorites only", key="scenario_favorites_only")
+    total = store.count(search, favorites_only)
+    pages = max((total + DEFAULT_PAGE_SIZE - 1) // DEFAULT_PAGE_SIZE, 1)
+    page = col_page.number_input(f"Page (of {pages})", 1, pages, 1, key="scenario_page")
+    listing = store.list_page(page - 1, DEFAULT_PAGE_SIZE, search, favorites_only)
+    if listing.empty:
+        st.info("No saved scenarios match the filter.")
+        return
+
+    df_display = pd.DataFrame(
+        {
+            "Name": listing["name"],
+            "Type": listing["type"],
+            "ΔMTM ($)": listing["dv01_estimate"],
+            "Created At": pd.to_datetime(listing["timestamp"], format="ISO8601").dt.strftime(
+                "%Y-%m-%d %H:%M:%S"
+            ),
+            "⭐": listing["favorite"].map({True: "⭐", False: ""}),
+        }
     )
-    df_scenarios["Favorite"] = df_scenarios["favorite"].apply(lambda x: "⭐" if x else "")
-    df_display = df_scenarios[["name", "type", "dv01_estimate", "timestamp", "Favorite"]]
-    df_display.columns = ["Name", "Type", "ΔMTM ($)", "Created At", "⭐"]
-    df_display = df_display.sort_values(by=["⭐", "Created At"], ascending=[False, False])
-    st.dataframe(df_display, use_container_width=True)
+    st.dataframe(df_display, use_container_width=True, hide_index=True)
+    st.caption(f"{total:,} scenarios, favorites first, newest first.")
 
-    for i, scenario in enumerate(st.session_state.saved_scenarios):
+    for scenario in listing.itertuples(index=False):
         col1, col2, _ = st.columns([1, 1, 1])
         with col1:
-            if st.button(f"Delete '{scenario['name']}'", key=f"del_{i}"):
-                del st.session_state.saved_scenarios[i]
-                _persist_scenarios()
-                st.success(f"Deleted scenario '{scenario['name']}'.")
+            if st.button(f"Delete '{scenario.name}'", key=f"del_{scenario.id}"):
+                store.delete(scenario.id)
+                st.success(f"Deleted scenario '{scenario.name}'.")
                 st.rerun()
         with col2:
             label = (
-                f"Unmark Favorite '{scenario['name']}'"
-                if scenario["favorite"]
-                else f"Mark Favorite '{scenario['name']}'"
+                f"Unmark Favorite '{scenario.name}'"
+                if scenario.favorite
+                else f"Mark Favorite '{scenario.name}'"
             )
-            if st.button(label, key=f"fav_{i}"):
-                st.session_state.saved_scenarios[i]["favorite"] = not scenario["favorite"]
-                _persist_scenarios()
+            if st.button(label, key=f"fav_{scenario.id}"):
+                store.set_favorite(scenario.id, not scenario.favorite)
                 st.rerun()
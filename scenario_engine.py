@@ -0,0 +1,246 @@
+"""Process-pool execution of large IRR scenario grids."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from irr import SCENARIO_RESULT_COLUMNS, calc_scenarios
+from positions import PositionStore, as_positions
+from revaluation import net_cash_flows
+from yield_curve import KEY_TENORS
+
+SHORT_DECAY_YEARS = 4.0
+
+
+def _short_weight(tenors: np.ndarray) -> np.ndarray:
+    return np.exp(-tenors / SHORT_DECAY_YEARS)
+
+
+# Tenor profiles of a 1bp shock, following the Basel IRRBB shock shapes.
+CURVE_SHAPES: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "Parallel": np.ones_like,
+    "Short Rate": _short_weight,
+    "Long Rate": lambda t: 1.0 - _short_weight(t),
+    "Steepener": lambda t: -0.65 * _short_weight(t) + 0.9 * (1.0 - _short_weight(t)),
+    "Flattener": lambda t: 0.8 * _short_weight(t) - 0.6 * (1.0 - _short_weight(t)),
+}
+
+DEFAULT_MAGNITUDES_BPS = [-300, -200, -100, 100, 200, 300]
+DEFAULT_SENSITIVITY_MULTIPLIERS = [0.5, 1.0, 1.5]
+DEFAULT_CHUNK_SCENARIOS = 64
+SHARED_ARRAYS = ("product_codes", "type_codes", "amount", "rate", "duration", "maturity")
+
+
+@dataclass(frozen=True)
+class ScenarioGrid:
+    """Scenario definitions plus their scenarios × tenors shift matrix (percent)."""
+
+    definitions: pd.DataFrame
+    shifts_pct: np.ndarray
+    tenors: tuple[float, ...]
+
+    def __len__(self) -> int:
+        return len(self.definitions)
+
+
+def build_scenario_grid(
+    curve_shapes=None,
+    magnitudes_bps=None,
+    sensitivity_multipliers=None,
+    tenors=None,
+) -> ScenarioGrid:
+    """Cross curve shapes, shock magnitudes and balance-sensitivity multipliers."""
+    curve_shapes = list(curve_shapes or CURVE_SHAPES)
+    magnitudes_bps = list(magnitudes_bps or DEFAULT_MAGNITUDES_BPS)
+    sensitivity_multipliers = list(sensitivity_multipliers or DEFAULT_SENSITIVITY_MULTIPLIERS)
+    tenor_array = np.asarray(tenors or KEY_TENORS, dtype=float)
+
+    rows, shifts = [], []
+    for shape in curve_shapes:
+        profile = CURVE_SHAPES[shape](tenor_array)
+        for magnitude in magnitudes_bps:
+            for multiplier in sensitivity_multipliers:
+                rows.append(
+                    {
+                        "Scenario": f"{shape} {magnitude:+d}bps ×{multiplier:g}",
+                        "Curve Shape": shape,
+                        "Shock (bps)": magnitude,
+                        "Sensitivity Multiplier": multiplier,
+                    }
+                )
+                shifts.append(profile * magnitude / 100)
+
+    return ScenarioGrid(
+        definitions=pd.DataFrame(rows),
+        shifts_pct=np.array(shifts).reshape(len(rows), len(tenor_array)),
+        tenors=tuple(tenor_array),
+    )
+
+
+class SharedPositionFiles:
+    """
+    Position arrays spilled once to ``.npy`` files that workers memory-map.
+
+    Workers receive only the directory name and the product label table, so
+    nothing proportional to the book is pickled per task; the OS page cache
+    shares the array pages between all processes.
+    """
+
+    def __init__(self, positions: PositionStore):
+        self._directory = tempfile.TemporaryDirectory(prefix="alm-positions-")
+        for name in SHARED_ARRAYS:
+            np.save(Path(self._directory.name) / f"{name}.npy", getattr(positions, name))
+        self.handle = {
+            "directory": self._directory.name,
+            "product_labels": list(positions.product_labels),
+        }
+
+    def close(self) -> None:
+        self._directory.cleanup()
+
+    def __enter__(self) -> "SharedPositionFiles":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_shared_positions(handle: dict) -> PositionStore:
+    directory = Path(handle["directory"])
+    arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in SHARED_ARRAYS}
+    return PositionStore(product_labels=np.array(handle["product_labels"], dtype=object), **arrays)
+
+
+_WORKER_POSITIONS: PositionStore | None = None
+_WORKER_CASH_FLOWS: np.ndarray | None = None
+
+
+def _init_worker(handle: dict, cash_flows: np.ndarray | None) -> None:
+    global _WORKER_POSITIONS, _WORKER_CASH_FLOWS
+    _WORKER_POSITIONS = load_shared_positions(handle)
+    _WORKER_CASH_FLOWS = cash_flows
+
+
+def _evaluate_chunk(
+    positions, cash_flows, shifts_pct, tenors, balance_sensitivity, multiplier, eve_method
+) -> np.ndarray:
+    scaled = {product: value * multiplier for product, value in balance_sensitivity.items()}
+    batch = calc_scenarios(
+        positions,
+        shifts_pct,
+        scaled,
+        tenors=tenors,
+        eve_method=eve_method,
+        cash_flows=cash_flows,
+    )
+    return batch[["NII ($)", "EVE ($)"]].to_numpy()
+
+
+def _evaluate_chunk_in_worker(*args) -> np.ndarray:
+    return _evaluate_chunk(_WORKER_POSITIONS, _WORKER_CASH_FLOWS, *args)
+
+
+def _chunk_tasks(grid: ScenarioGrid, chunk_size: int):
+    multipliers = grid.definitions["Sensitivity Multiplier"].to_numpy()
+    for multiplier in pd.unique(multipliers):
+        rows = np.flatnonzero(multipliers == multiplier)
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start : start + chunk_size], float(multiplier)
+
+
+def run_scenario_grid(
+    balance_sheet,
+    grid: ScenarioGrid,
+    balance_sensitivity: dict,
+    eve_method: str = "duration",
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SCENARIOS,
+    progress: Callable[[int, int], None] | None = None,
+    mp_context=None,
+) -> pd.DataFrame:
+    """
+    Evaluate every scenario in *grid* and return the ``irr.show`` table shape.
+
+    Chunks of scenarios sharing a sensitivity multiplier are farmed out to a
+    process pool whose workers memory-map the position arrays. Grids that
+    fit in one chunk, or ``max_workers=1``, run in-process. *progress* is
+    called with ``(scenarios_done, scenarios_total)`` as chunks finish.
+    ``Δ`` columns are relative to the zero-shift, unscaled base; *eve_method*
+    is passed through to ``irr.calc_scenarios``. Full revaluation nets the
+    book's cash flows once here and hands the vector to every chunk.
+    """
+    positions = as_positions(balance_sheet)
+    # The netted flows are one value per month, so workers get a copy at start-up.
+    cash_flows = net_cash_flows(positions) if eve_method == "full" else None
+    tasks = list(_chunk_tasks(grid, chunk_size))
+    max_workers = max_workers or os.cpu_count() or 1
+    results = np.empty((len(grid), 2))
+    done = 0
+
+    def _record(rows, values):
+        nonlocal done
+        results[rows] = values
+        done += len(rows)
+        if progress is not None:
+            progress(done, len(grid))
+
+    if max_workers == 1 or len(tasks) <= 1:
+        for rows, multiplier in tasks:
+            _record(
+                rows,
+                _evaluate_chunk(
+                    positions,
+                    cash_flows,
+                    grid.shifts_pct[rows],
+                    grid.tenors,
+                    balance_sensitivity,
+                    multiplier,
+                    eve_method,
+                ),
+            )
+    else:
+        context = mp_context or multiprocessing.get_context("spawn")
+        with SharedPositionFiles(positions) as shared, ProcessPoolExecutor(
+            max_workers=min(max_workers, len(tasks)),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(shared.handle, cash_flows),
+        ) as pool:
+            futures = {
+                pool.submit(
+                    _evaluate_chunk_in_worker,
+                    grid.shifts_pct[rows],
+                    grid.tenors,
+                    balance_sensitivity,
+                    multiplier,
+                    eve_method,
+                ): rows
+                for rows, multiplier in tasks
+            }
+            for future in as_completed(futures):
+                _record(futures[future], future.result())
+
+    base_shift = np.zeros((1, len(grid.tenors)))
+    base_nii, base_eve = _evaluate_chunk(
+        positions, cash_flows, base_shift, grid.tenors, balance_sensitivity, 1.0, eve_method
+    )[0]
+    result_df = pd.DataFrame(
+        {
+            "Rate Shift (%)": grid.definitions["Shock (bps)"].to_numpy() / 100,
+            "NII ($)": results[:, 0],
+            "Δ NII ($)": results[:, 0] - base_nii,
+            "EVE ($)": results[:, 1],
+            "Δ EVE ($)": results[:, 1] - base_eve,
+        },
+        index=pd.Index(grid.definitions["Scenario"], name="Scenario"),
+    )
+    return result_df[SCENARIO_RESULT_COLUMNS]
@@ -0,0 +1,255 @@
+"""
+SQLite-backed store of saved rate scenarios.
+
+Scenarios live one per row in a WAL-mode database, so saves, deletes and
+favorite toggles touch a single row and concurrent dashboard sessions
+never overwrite each other. Name, timestamp and favorite columns are
+indexed for the paginated, favorites-first listing; the curves and any
+other fields are kept as a JSON payload. Scenarios saved by older
+versions in ``saved_scenarios.json`` can be imported once:
+
+    python scenario_store.py saved_scenarios.json --db saved_scenarios.db
+
+Both files default to the app directory, whatever the working directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent
+# Anchored to the app directory, not the working directory; ALM_SCENARIO_DB overrides it.
+DEFAULT_SCENARIO_DB = Path(os.environ.get("ALM_SCENARIO_DB", APP_DIR / "saved_scenarios.db"))
+LEGACY_SCENARIO_FILE = APP_DIR / "saved_scenarios.json"
+DEFAULT_PAGE_SIZE = 25
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# Fields stored in their own columns; everything else goes in the payload.
+SCENARIO_COLUMNS = ["name", "type", "dv01_estimate", "timestamp", "favorite"]
+LISTING_COLUMNS = ["id", *SCENARIO_COLUMNS]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL DEFAULT '',
+    dv01_estimate REAL,
+    timestamp TEXT NOT NULL,
+    favorite INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS scenarios_timestamp ON scenarios (timestamp);
+CREATE INDEX IF NOT EXISTS scenarios_favorite_timestamp ON scenarios (favorite, timestamp);
+"""
+
+
+def _scenario_row(scenario: dict) -> tuple:
+    name = str(scenario.get("name", "")).strip()
+    if not name:
+        raise ValueError("A saved scenario needs a name.")
+    if not scenario.get("timestamp"):
+        raise ValueError(f"Scenario '{name}' has no timestamp.")
+    payload = {key: value for key, value in scenario.items() if key not in SCENARIO_COLUMNS}
+    dv01 = scenario.get("dv01_estimate")
+    return (
+        name,
+        str(scenario.get("type", "")),
+        None if dv01 is None else float(dv01),
+        str(scenario["timestamp"]),
+        int(bool(scenario.get("favorite", False))),
+        json.dumps(payload),
+    )
+
+
+class ScenarioStore:
+    """
+    Saved scenarios in the SQLite database at *path*.
+
+    Every call opens a short-lived connection, so one store can be shared
+    by all sessions and threads; SQLite's WAL journal lets readers proceed
+    while a writer commits, and writers wait up to
+    ``BUSY_TIMEOUT_SECONDS`` for each other instead of failing.
+    """
+
+    def __init__(self, path=DEFAULT_SCENARIO_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # closing() releases the connection; the inner block commits or rolls back.
+        with closing(sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS)) as conn:
+            with conn:
+                yield conn
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def count(self, search: str = "", favorites_only: bool = False) -> int:
+        where, params = self._filters(search, favorites_only)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM scenarios{where}", params).fetchone()[0]
+
+    @staticmethod
+    def _filters(search: str, favorites_only: bool) -> tuple[str, list]:
+        clauses, params = [], []
+        if search:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if favorites_only:
+            clauses.append("favorite = 1")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def save(self, scenario: dict) -> int:
+        """Insert *scenario* and return its id; raises ``ValueError`` if the name is taken."""
+        row = _scenario_row(scenario)
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO scenarios "
+                    "(name, type, dv01_estimate, timestamp, favorite, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Scenario with the name '{row[0]}' already exists.") from None
+
+    def delete(self, scenario_id: int) -> bool:
+        """Delete one scenario; returns whether it still existed."""
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM scenarios WHERE id = ?", (int(scenario_id),))
+            return cursor.rowcount > 0
+
+    def set_favorite(self, scenario_id: int, favorite: bool) -> bool:
+        with self._connect() as conn:
+            return (
+                conn.execute(
+                    "UPDATE scenarios SET favorite = ? WHERE id = ?",
+                    (int(bool(favorite)), int(scenario_id)),
+                ).rowcount
+                > 0
+            )
+
+    def get(self, scenario_id: int) -> dict | None:
+        """The full scenario (columns plus payload), or ``None`` if it was deleted."""
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(SCENARIO_COLUMNS)}, payload FROM scenarios WHERE id = ?",
+                (int(scenario_id),),
+            ).fetchone()
+        if row is None:
+            return None
+        scenario = dict(zip(SCENARIO_COLUMNS, row[:-1]))
+        scenario["favorite"] = bool(scenario["favorite"])
+        return {**scenario, **json.loads(row[-1])}
+
+    def list_page(
+        self,
+        page: int = 0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        search: str = "",
+        favorites_only: bool = False,
+    ) -> pd.DataFrame:
+        """
+        One page of ``LISTING_COLUMNS``, favorites first and newest first.
+
+        Only the requested rows are read, through the favorite/timestamp
+        index, so the cost of a page does not grow with the store.
+        """
+        where, params = self._filters(search, favorites_only)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(LISTING_COLUMNS)} FROM scenarios{where} "
+                "ORDER BY favorite DESC, timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                [*params, int(page_size), int(page) * int(page_size)],
+            ).fetchall()
+        listing = pd.DataFrame(rows, columns=LISTING_COLUMNS)
+        listing["favorite"] = listing["favorite"].astype(bool)
+        return listing
+
+    def export_frame(self) -> pd.DataFrame:
+        """Every scenario with its payload fields as columns, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(SCENARIO_COLUMNS)}, payload FROM scenarios "
+                "ORDER BY timestamp, id"
+            ).fetchall()
+        return pd.DataFrame(
+            [
+                {**dict(zip(SCENARIO_COLUMNS, row[:-1])), **json.loads(row[-1])}
+                for row in rows
+            ]
+        )
+
+    def import_scenarios(self, scenarios) -> int:
+        """Insert *scenarios* in one transaction, skipping names already saved; returns count."""
+        rows = [_scenario_row(scenario) for scenario in scenarios]
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO scenarios "
+                "(name, type, dv01_estimate, timestamp, favorite, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def import_json(self, path=LEGACY_SCENARIO_FILE) -> int:
+        """Import a ``saved_scenarios.json`` list written by earlier versions."""
+        with open(path, "r", encoding="utf-8") as handle:
+            scenarios = json.load(handle)
+        if not isinstance(scenarios, list):
+            raise ValueError(f"{path} does not contain a list of scenarios.")
+        return self.import_scenarios(scenarios)
+
+
+_STORE: ScenarioStore | None = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_scenario_store() -> ScenarioStore:
+    """
+    Return the process-wide store at ``DEFAULT_SCENARIO_DB``.
+
+    On first use, an existing ``LEGACY_SCENARIO_FILE`` is imported into an
+    empty database.
+    """
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            store = ScenarioStore(DEFAULT_SCENARIO_DB)
+            if len(store) == 0 and Path(LEGACY_SCENARIO_FILE).exists():
+                store.import_json(LEGACY_SCENARIO_FILE)
+            _STORE = store
+        return _STORE
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Import saved_scenarios.json into the SQLite scenario store."
+    )
+    parser.add_argument("json_file", nargs="?", default=LEGACY_SCENARIO_FILE)
+    parser.add_argument("--db", default=DEFAULT_SCENARIO_DB)
+    args = parser.parse_args(argv)
+    store = ScenarioStore(args.db)
+    imported = store.import_json(args.json_file)
+    print(f"Imported {imported:,} scenarios into {args.db} ({len(store):,} in total).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,23 +3,95 @@
 from __future__ import annotations
 
 import io
+import json
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
+import data_loader
+import derivatives_pricing
+import revaluation
+import scenario_engine
+from alm_batch import main as batch_main
 from alm_utils import (
+    DAYS_PER_MONTH,
+    MATURITY_BINS_STANDARD,
     assign_maturity_bucket,
+    balance_sheet_stats,
     calculate_duration_gap,
     estimate_eve_change,
+    estimate_eve_change_from_stats,
+    liquidity_ladder,
     summarize_balance_sheet,
+    validate_balance_sheet,
     weighted_average,
 )
-from ftp import build_ftp_table, map_ftp_rate
-from irr import calc_eve, calc_nii
+from cash_flow_gap import build_cash_flow_gap_table, build_runoff_gap_table
+from cash_flows import cash_flow_matrix, iter_cash_flow_blocks
+from data_loader import (
+    BalanceSheetCache,
+    Dataset,
+    dataset_positions,
+    load_balance_sheet,
+    load_dataset,
+    read_balance_sheet,
+    validate_balance_sheet_file,
+)
+from derivatives_book import SAMPLE_DERIVATIVES, build_derivatives_book
+from derivatives_pricing import (
+    DEFAULT_FX_MARKET,
+    TRADE_INSTRUMENTS,
+    black,
+    discount_factors,
+    norm_cdf,
+    price_trades,
+    trade_schedules,
+    validate_trades,
+)
+from ftp import FTPCurve, build_ftp_table, map_ftp_rate
+from incremental import IncrementalAnalytics
+from irr import (
+    DEFAULT_SCENARIOS,
+    build_scenario_table,
+    calc_eve,
+    calc_nii,
+    calc_scenarios,
+    hedged_scenario_table,
+)
+from liquidity_gap import build_liquidity_gap_table
+from monte_carlo import run_monte_carlo, simulate_rate_paths
+from nii_projection import annual_nii_summary, project_nii
+from positions import PositionStore, as_positions
+from result_cache import ResultCache, result_key
+from revaluation import (
+    build_dv01_ladder,
+    curve_discount_factors,
+    full_revaluation_eve,
+    trade_key_rate_dv01,
+)
+from runoff import CoreVolatileSplit, ExponentialDecay, decay_tables_from_frame, runoff_matrix
 from scenario_builder import build_shocked_curve
+from scenario_engine import build_scenario_grid, run_scenario_grid
+from scenario_store import ScenarioStore
+from yield_curve import BASE_CURVE, BASE_YIELD, CURVE_METHODS, KEY_TENORS, YieldCurve
 
 SAMPLE_CSV = Path(__file__).resolve().parents[1] / "data" / "sample_balance_sheet.csv"
+PAR_TENORS = np.array([0.5, 1, 2, 5, 10, 30])
+PAR_RATES = np.array([1.8, 2.0, 2.1, 2.4, 2.8, 3.2])
+SAVINGS_SENSITIVITY = {"Savings Account": 0.4}
+INCREMENTAL_SCENARIOS = {"+100bps": 1.0, "-100bps": -1.0}
+NII_SCENARIOS = {"Base": 0.0, "+200bps": 2.0}
+GRID_SENSITIVITY = {"Fixed Mortgage": -0.5, "Savings Deposit": 0.4}
+CUSTOM_BINS, CUSTOM_LABELS = [0, 12, 36, float("inf")], ["<1Y", "1-3Y", ">3Y"]
 
 
 @pytest.fixture
@@ -27,6 +99,30 @@ def sample_balance_sheet() -> pd.DataFrame:
     return pd.read_csv(SAMPLE_CSV)
 
 
+@pytest.fixture
+def large_trade_book() -> pd.DataFrame:
+    """10,000 validated trades cycling through every instrument, side and FX currency."""
+    n = 10_000
+    step = np.arange(n)
+    instruments = np.resize(TRADE_INSTRUMENTS, n)
+    fx = instruments == "FX Forward"
+    return validate_trades(
+        pd.DataFrame(
+            {
+                "Instrument": instruments,
+                "Side": np.resize(["Long", "Short", "Short", "Long", "Long"], n),
+                "Notional ($)": 1e5 * (1 + step % 97),
+                # Swaption expiries (up to 35 months) always fall before maturity.
+                "Maturity (Months)": 42 + step % 79,
+                "Expiry (Months)": step % 36,
+                "Strike": np.where(fx, 1.1, 1.0 + step % 41 / 10),
+                "Volatility (%)": 10.0 + step % 31,
+                "Currency": np.where(fx, np.resize(["EUR", "GBP", "CAD"], n), ""),
+            }
+        )
+    )
+
+
 def test_weighted_average_basic():
     values = pd.Series([1.0, 3.0])
     weights = pd.Series([1.0, 1.0])
@@ -69,12 +165,46 @@ def test_estimate_eve_change_sign():
     assert estimate_eve_change(1.5, 10_000_000, 100) == pytest.approx(-150_000)
 
 
+def test_balance_sheet_stats_are_additive_and_feed_every_kpi(sample_balance_sheet):
+    head, tail = sample_balance_sheet.iloc[:4], sample_balance_sheet.iloc[4:]
+    stats = balance_sheet_stats(head) + balance_sheet_stats(tail)
+    assert stats == pytest.approx(balance_sheet_stats(sample_balance_sheet))
+    assert summarize_balance_sheet(stats) == summarize_balance_sheet(sample_balance_sheet)
+
+    metrics = calculate_duration_gap(stats)
+    assert metrics == calculate_duration_gap(sample_balance_sheet)
+    assert estimate_eve_change_from_stats(stats, 100) == pytest.approx(
+        estimate_eve_change(metrics["duration_gap"], metrics["total_assets"], 100)
+    )
+
+
 def test_map_ftp_rate_boundaries():
     assert map_ftp_rate(12) == 1.0
     assert map_ftp_rate(13) == 1.5
     assert map_ftp_rate(200) == 3.5
 
 
+def test_ftp_curve_step_mode_matches_scalar_lookup():
+    months = np.linspace(0, 200, 801)
+    curve = {6: 0.5, 18: 1.25, 48: 2.75}
+    expected = []
+    for m in months:
+        expected.append(next((r for t, r in sorted(curve.items()) if m <= t), max(curve.values())))
+    assert FTPCurve(curve)(months).tolist() == expected
+    assert FTPCurve()(months).tolist() == [map_ftp_rate(m) for m in months]
+
+
+def test_ftp_curve_interpolation_modes_hit_nodes_without_overshoot():
+    curve = {12: 1.0, 24: 3.0, 36: 2.0, 60: 2.5}
+    for mode in ("linear", "monotone"):
+        ftp_curve = FTPCurve(curve, mode=mode)
+        assert ftp_curve(list(curve)) == pytest.approx(list(curve.values()))
+        assert ftp_curve([0, 500]) == pytest.approx([1.0, 2.5])
+        between = ftp_curve(np.linspace(12, 60, 500))
+        assert between.max() <= 3.0 + 1e-9 and between.min() >= 1.0 - 1e-9
+    assert FTPCurve(curve, mode="linear")(18) == pytest.approx(2.0)
+
+
 def test_build_ftp_table(sample_balance_sheet):
     ftp_df = build_ftp_table(sample_balance_sheet)
     assert "FTP Rate (%)" in ftp_df.columns
@@ -82,6 +212,15 @@ def test_build_ftp_table(sample_balance_sheet):
     assert len(ftp_df) == len(sample_balance_sheet)
 
 
+def test_build_ftp_table_shares_the_input_columns(sample_balance_sheet):
+    # Holds on every pandas version without enabling copy-on-write globally.
+    ftp_df = build_ftp_table(sample_balance_sheet)
+    for column in ("Amount ($)", "Rate (%)", "Maturity (Months)"):
+        assert np.shares_memory(
+            ftp_df[column].to_numpy(), sample_balance_sheet[column].to_numpy()
+        )
+
+
 def test_calc_nii_zero_shift(sample_balance_sheet):
     sensitivity = {product: 0.0 for product in sample_balance_sheet["Product"]}
     nii = calc_nii(sample_balance_sheet, 0.0, sensitivity)
@@ -100,14 +239,46 @@ def test_calc_eve_duration_shock(sample_balance_sheet):
     assert up < base
 
 
+def test_calc_nii_matches_row_wise_sensitivity(sample_balance_sheet):
+    sensitivity = {"Fixed Mortgage": -0.01, "Time Deposits": 0.004}
+    shift = 1.25
+    rows = sample_balance_sheet
+    adj = rows["Amount ($)"] * (1 + rows["Product"].map(sensitivity).fillna(0.0) * shift)
+    interest = adj * (rows["Rate (%)"] + shift) / 100
+    expected = interest[rows["Type"] == "Asset"].sum() - interest[rows["Type"] == "Liability"].sum()
+    assert calc_nii(sample_balance_sheet, shift, sensitivity) == pytest.approx(expected)
+
+
+def test_calc_scenarios_batch_matches_wrappers(sample_balance_sheet):
+    sensitivity = {"HELOC": 0.005, "Savings Account": 0.002}
+    shifts = [-1.0, 0.0, 0.5, 2.0]
+    batch = calc_scenarios(sample_balance_sheet, shifts, sensitivity)
+    for shift, (nii, eve) in zip(shifts, batch.itertuples(index=False)):
+        assert nii == pytest.approx(calc_nii(sample_balance_sheet, shift, sensitivity))
+        assert eve == pytest.approx(calc_eve(sample_balance_sheet, shift))
+
+
+def test_calc_scenarios_flat_tenor_matrix_equals_parallel(sample_balance_sheet):
+    sensitivity = {"Fixed Mortgage": -0.01}
+    tenors = [1, 2, 5, 10, 30]
+    matrix = [[0.5] * len(tenors), [-1.0] * len(tenors)]
+    by_tenor = calc_scenarios(sample_balance_sheet, matrix, sensitivity, tenors=tenors)
+    parallel = calc_scenarios(sample_balance_sheet, [0.5, -1.0], sensitivity)
+    pd.testing.assert_frame_equal(by_tenor, parallel)
+
+
+def test_build_scenario_table_deltas_against_zero_shift(sample_balance_sheet):
+    table = build_scenario_table(sample_balance_sheet, {"Flat": 0.0, "Up": 1.0}, {})
+    assert table.loc["Flat", "Δ NII ($)"] == pytest.approx(0.0)
+    assert table.loc["Up", "Δ EVE ($)"] < 0
+
+
 def test_build_shocked_curve_parallel():
     shocked = build_shocked_curve("Parallel Shift", shift_bps=100)
     assert shocked == pytest.approx([3.0, 3.1, 3.4, 3.8, 4.2])
 
 
 def test_validate_balance_sheet_rejects_bad_type():
-    from alm_utils import validate_balance_sheet
-
     bad = pd.read_csv(
         io.StringIO(
             "Product,Type,Amount ($),Rate (%),Duration (Years),Maturity (Months)\n"
@@ -116,3 +287,992 @@ def test_validate_balance_sheet_rejects_bad_type():
     )
     with pytest.raises(ValueError, match="Asset' or 'Liability"):
         validate_balance_sheet(bad)
+
+
+def test_load_dataset_caches_by_content_fingerprint():
+    cache = BalanceSheetCache()
+    raw = SAMPLE_CSV.read_bytes()
+    first = load_dataset(raw, cache=cache)
+    second = load_dataset(io.BytesIO(raw), cache=cache)
+    assert second is first
+    assert isinstance(first.frame["Type"].dtype, pd.CategoricalDtype)
+    assert first.frame["Amount ($)"].sum() == pytest.approx(31_200_000)
+
+
+def test_balance_sheet_cache_evicts_least_recently_used_by_bytes():
+    cache = BalanceSheetCache(max_bytes=250)
+    frame = pd.DataFrame()
+    for key in ("a", "b", "c"):
+        cache.put(Dataset(fingerprint=key, frame=frame, nbytes=100))
+        cache.get("a")
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.total_bytes == 200
+
+
+def test_load_dataset_remembers_validation_failures():
+    cache = BalanceSheetCache()
+    bad = b"Product,Type,Amount ($),Rate (%),Duration (Years),Maturity (Months)\nX,Equity,1,1,1,1\n"
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Asset' or 'Liability"):
+            load_dataset(bad, cache=cache)
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("writer", ["to_parquet", "to_feather"])
+def test_read_balance_sheet_columnar_projects_required_columns(sample_balance_sheet, writer):
+    pytest.importorskip("pyarrow")
+    buffer = io.BytesIO()
+    getattr(sample_balance_sheet.assign(Desk="ALM"), writer)(buffer)
+    df = read_balance_sheet(buffer.getvalue())
+    assert list(df.columns) == list(sample_balance_sheet.columns)
+    assert isinstance(df["Product"].dtype, pd.CategoricalDtype)
+    assert df["Amount ($)"].sum() == pytest.approx(31_200_000)
+
+
+def test_validate_balance_sheet_keeps_numeric_dtypes_and_coerces_text(sample_balance_sheet):
+    validated = validate_balance_sheet(sample_balance_sheet)
+    assert validated["Maturity (Months)"].dtype == sample_balance_sheet["Maturity (Months)"].dtype
+
+    as_text = sample_balance_sheet.astype({"Rate (%)": str})
+    coerced = validate_balance_sheet(as_text)
+    assert pd.api.types.is_float_dtype(coerced["Rate (%)"])
+    assert as_text["Rate (%)"].dtype != coerced["Rate (%)"].dtype
+
+
+def test_validate_balance_sheet_file_reports_rows_across_chunks():
+    csv = (
+        "Product,Type,Amount ($),Rate (%),Duration (Years),Maturity (Months)\n"
+        "A,Asset,100,5,2,12\n"
+        "B,Equity,100,5,2,12\n"
+        "C,Liability,-5,1,1,6\n"
+        "D,Liability,50,abc,1,6\n"
+        "E,Equity,10,1,1,1\n"
+    ).encode()
+    report = validate_balance_sheet_file(csv, chunk_rows=2, max_examples=1)
+    assert not report.ok
+    assert report.rows == 5
+    assert report.counts["invalid_type"] == 2
+    assert report.violations["invalid_type"] == [1]
+    assert report.violations["negative_amount"] == [2]
+    assert report.violations["non_numeric"] == [3]
+    with pytest.raises(ValueError, match="first at rows 1, ..."):
+        report.raise_for_errors()
+
+
+def test_validate_balance_sheet_file_kpis_match_in_memory_summary(sample_balance_sheet):
+    report = validate_balance_sheet_file(SAMPLE_CSV, chunk_rows=4, collect=True)
+    assert report.ok
+    assert len(report.frame) == len(sample_balance_sheet)
+    expected = summarize_balance_sheet(sample_balance_sheet)
+    assert report.summary() == pytest.approx(expected)
+
+
+def test_validate_balance_sheet_file_collects_compacted_chunks(sample_balance_sheet):
+    report = validate_balance_sheet_file(SAMPLE_CSV, chunk_rows=4, collect=True)
+    # Chunks see different products; the collected column still holds one category set.
+    assert isinstance(report.frame["Product"].dtype, pd.CategoricalDtype)
+    assert list(report.frame["Product"].cat.categories) == sorted(
+        sample_balance_sheet["Product"].unique()
+    )
+    pd.testing.assert_frame_equal(
+        report.frame.astype({"Product": str, "Type": str}),
+        sample_balance_sheet,
+        check_dtype=False,
+    )
+
+
+def test_validate_balance_sheet_file_stops_collecting_after_errors(monkeypatch):
+    compacted = []
+    compact = data_loader.compact_balance_sheet
+    monkeypatch.setattr(
+        data_loader, "compact_balance_sheet", lambda chunk: compacted.append(1) or compact(chunk)
+    )
+    csv = (
+        "Product,Type,Amount ($),Rate (%),Duration (Years),Maturity (Months)\n"
+        "A,Asset,100,5,2,12\n"
+        "B,Equity,100,5,2,12\n"
+        "C,Asset,100,5,2,12\n"
+    ).encode()
+    report = validate_balance_sheet_file(csv, chunk_rows=1, collect=True)
+    assert not report.ok
+    assert report.rows == 3
+    # Only the chunk before the first invalid row was compacted.
+    assert len(compacted) == 1
+    assert report.frame is None
+
+
+def test_position_store_round_trips_the_frame(sample_balance_sheet):
+    store = PositionStore.from_frame(sample_balance_sheet)
+    assert len(store) == len(sample_balance_sheet)
+    assert store.product_codes.dtype == "int8"
+    assert not store.amount.flags.writeable
+    pd.testing.assert_frame_equal(
+        store.to_frame().astype({"Product": str, "Type": str}),
+        sample_balance_sheet.astype({"Product": str, "Type": str}),
+        check_dtype=False,
+    )
+
+
+def test_position_store_feeds_the_analytics(sample_balance_sheet):
+    store = PositionStore.from_frame(sample_balance_sheet)
+    assert summarize_balance_sheet(store) == summarize_balance_sheet(sample_balance_sheet)
+    sensitivity = {"Fixed Mortgage": -0.01}
+    assert calc_nii(store, 1.0, sensitivity) == pytest.approx(
+        calc_nii(sample_balance_sheet, 1.0, sensitivity)
+    )
+    assert build_ftp_table(store)["FTP Net ($)"].sum() == pytest.approx(
+        build_ftp_table(sample_balance_sheet)["FTP Net ($)"].sum()
+    )
+
+
+def test_position_store_float32_halves_numeric_footprint(sample_balance_sheet):
+    wide = PositionStore.from_frame(sample_balance_sheet)
+    narrow = PositionStore.from_frame(sample_balance_sheet, float32=True)
+    assert narrow.amount.dtype == "float32"
+    assert narrow.amount.nbytes * 2 == wide.amount.nbytes
+    assert narrow.stats.asset_amount == pytest.approx(wide.stats.asset_amount)
+
+
+def test_build_liquidity_gap_table_matches_masked_groupby(sample_balance_sheet):
+    gap_df = build_liquidity_gap_table(sample_balance_sheet)
+    buckets = assign_maturity_bucket(sample_balance_sheet["Maturity (Months)"])
+    assets = sample_balance_sheet["Type"] == "Asset"
+    expected = sample_balance_sheet.loc[assets, "Amount ($)"].groupby(
+        buckets[assets], observed=False
+    ).sum()
+    assert gap_df["Inflows ($)"].to_numpy() == pytest.approx(expected.to_numpy())
+    assert list(gap_df.index.astype(str)) == list(expected.index.astype(str))
+    assert gap_df["Cumulative Gap ($)"].iloc[-1] == pytest.approx(5_600_000)
+
+
+def test_build_cash_flow_gap_table_spreads_balances_monthly(sample_balance_sheet):
+    table = build_cash_flow_gap_table(sample_balance_sheet)
+    flows = sample_balance_sheet["Amount ($)"] / sample_balance_sheet["Maturity (Months)"]
+    signed = flows.where(sample_balance_sheet["Type"] == "Asset", -flows)
+    assert table["Net Cash Flow ($)"].sum() == pytest.approx(signed.sum())
+
+
+def test_calc_layer_does_not_copy_the_book_per_scenario():
+    rows = 100_000
+    rng = np.random.default_rng(0)
+    book = pd.DataFrame(
+        {
+            "Product": pd.Categorical(rng.choice(["Loan", "Deposit"], rows)),
+            "Type": pd.Categorical(rng.choice(["Asset", "Liability"], rows)),
+            "Amount ($)": rng.uniform(1, 1e6, rows),
+            "Rate (%)": rng.uniform(0, 6, rows),
+            "Duration (Years)": rng.uniform(0, 10, rows),
+            "Maturity (Months)": rng.integers(0, 360, rows).astype(float),
+        }
+    )
+    positions = PositionStore.from_frame(book)
+
+    def peak_bytes(scenarios: int) -> int:
+        tracemalloc.start()
+        build_liquidity_gap_table(positions)
+        build_cash_flow_gap_table(positions)
+        calc_scenarios(positions, np.linspace(-2, 2, scenarios), {"Loan": -0.01})
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    few, many = peak_bytes(6), peak_bytes(600)
+    book_bytes = book.memory_usage(deep=True).sum()
+    # Working memory is a few derived columns, independent of scenario count.
+    assert many < few * 1.5
+    assert many < 2 * book_bytes
+
+
+def test_cash_flow_schedules_amortize_to_par(sample_balance_sheet):
+    principal, interest = cash_flow_matrix(sample_balance_sheet)
+    assert principal.sum(axis=1) == pytest.approx(sample_balance_sheet["Amount ($)"].to_numpy())
+
+    # Fixed Mortgage is level-pay: constant annuity over its 60-month term.
+    payments = principal[0, :60] + interest[0, :60]
+    r = 4.0 / 1200
+    annuity = 5_500_000 * r / (1 - (1 + r) ** -60)
+    assert payments == pytest.approx(np.full(60, annuity))
+    # Commercial Loan is linear; HELOC is a bullet at month 12.
+    assert principal[2, :36] == pytest.approx(np.full(36, 4_200_000 / 36))
+    assert np.count_nonzero(principal[1]) == 1 and principal[1, 11] == 2_700_000
+
+
+def test_cash_flow_blocks_are_independent_of_block_size(sample_balance_sheet):
+    dense_principal, _ = cash_flow_matrix(sample_balance_sheet)
+    rebuilt = np.zeros_like(dense_principal)
+    for rows, months, principal, _ in iter_cash_flow_blocks(sample_balance_sheet, max_cells=7):
+        rebuilt[rows, months[0] - 1 : months[-1]] = principal
+    assert rebuilt == pytest.approx(dense_principal)
+
+
+def test_cash_flow_ftp_prices_amortizers_below_bullet_maturity(sample_balance_sheet):
+    maturity_ftp = build_ftp_table(sample_balance_sheet)
+    matched_ftp = build_ftp_table(sample_balance_sheet, method="cash_flow")
+    by_product = matched_ftp.set_index("Product")["FTP Rate (%)"]
+    bullets = ~sample_balance_sheet["Product"].isin(["Fixed Mortgage", "Commercial Loan"])
+    assert matched_ftp.loc[bullets, "FTP Rate (%)"].tolist() == (
+        maturity_ftp.loc[bullets, "FTP Rate (%)"].tolist()
+    )
+    assert by_product["Fixed Mortgage"] < maturity_ftp.loc[0, "FTP Rate (%)"]
+    assert by_product["Commercial Loan"] < maturity_ftp.loc[2, "FTP Rate (%)"]
+
+
+def test_scenario_grid_pool_matches_serial_run(sample_balance_sheet):
+    grid = build_scenario_grid(["Parallel", "Steepener"], [-100, 200], [0.5, 1.0])
+    serial = run_scenario_grid(sample_balance_sheet, grid, GRID_SENSITIVITY, max_workers=1)
+    calls = []
+    pooled = run_scenario_grid(
+        sample_balance_sheet,
+        grid,
+        GRID_SENSITIVITY,
+        max_workers=2,
+        chunk_size=2,
+        progress=lambda done, total: calls.append((done, total)),
+    )
+    pd.testing.assert_frame_equal(serial, pooled)
+    assert calls[-1] == (8, 8)
+
+
+def test_scenario_grid_parallel_rows_match_the_scenario_table(sample_balance_sheet):
+    grid = build_scenario_grid(["Parallel"], [200], [1.0])
+    rows = run_scenario_grid(sample_balance_sheet, grid, GRID_SENSITIVITY, max_workers=1)
+    parallel = build_scenario_table(
+        sample_balance_sheet, {"Parallel +200bps ×1": 2.0}, GRID_SENSITIVITY
+    )
+    assert rows.loc["Parallel +200bps ×1", "NII ($)"] == pytest.approx(
+        parallel.loc["Parallel +200bps ×1", "NII ($)"]
+    )
+    assert list(rows.columns) == list(parallel.columns)
+
+
+def test_full_revaluation_grid_nets_cash_flows_once(sample_balance_sheet, monkeypatch):
+    grid = build_scenario_grid(["Parallel", "Steepener"], [-100, 200], [0.5, 1.0])
+    calls = []
+    net_cash_flows = revaluation.net_cash_flows
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return net_cash_flows(*args, **kwargs)
+
+    monkeypatch.setattr(revaluation, "net_cash_flows", counting)
+    monkeypatch.setattr(scenario_engine, "net_cash_flows", counting)
+    grid_df = run_scenario_grid(
+        sample_balance_sheet, grid, {}, eve_method="full", max_workers=1, chunk_size=2
+    )
+    # Four chunks plus the base row share one cash-flow pass.
+    assert len(calls) == 1
+    direct = calc_scenarios(
+        sample_balance_sheet, grid.shifts_pct, {}, tenors=grid.tenors, eve_method="full"
+    )
+    assert grid_df["EVE ($)"].to_numpy() == pytest.approx(direct["EVE ($)"].to_numpy())
+
+
+def test_full_revaluation_eve_discounts_each_position_cash_flow(sample_balance_sheet):
+    principal, interest = cash_flow_matrix(sample_balance_sheet)
+    signs = np.where(sample_balance_sheet["Type"] == "Asset", 1.0, -1.0)
+    discount = curve_discount_factors([0.0, 2.0], principal.shape[1])
+    expected = ((principal + interest) * signs[:, None]).sum(axis=0) @ discount.T
+
+    batch = calc_scenarios(sample_balance_sheet, [0.0, 2.0], {}, eve_method="full")
+    assert batch["EVE ($)"].to_numpy() == pytest.approx(expected)
+
+
+def test_full_revaluation_eve_is_convex(sample_balance_sheet):
+    batch = calc_scenarios(sample_balance_sheet, [0.0, 2.0, -2.0], {}, eve_method="full")
+    base, up, down = batch["EVE ($)"]
+    # The rally gains more than the sell-off loses.
+    assert down - base > base - up > 0
+    assert calc_eve(sample_balance_sheet, 2.0, eve_method="full") == pytest.approx(up)
+
+
+def test_calc_scenarios_rejects_an_unknown_eve_method(sample_balance_sheet):
+    with pytest.raises(ValueError):
+        calc_scenarios(sample_balance_sheet, [0.0], {}, eve_method="convexity")
+
+
+def test_dv01_ladder_sums_to_parallel_dv01(sample_balance_sheet):
+    trades = validate_trades(pd.DataFrame(SAMPLE_DERIVATIVES))
+    ladder = build_dv01_ladder(sample_balance_sheet, trades)
+    base, bumped = full_revaluation_eve(sample_balance_sheet, [0.0, 0.01])
+    assert ladder["Balance Sheet DV01 ($)"].sum() == pytest.approx(bumped - base, rel=1e-3)
+    parallel = price_trades(trades, 0.01)["MTM ($)"].sum() - price_trades(trades)["MTM ($)"].sum()
+    assert ladder["Derivatives DV01 ($)"].sum() == pytest.approx(parallel, rel=5e-3)
+    assert (ladder["Total DV01 ($)"] == ladder.iloc[:, :2].sum(axis=1)).all()
+
+
+def test_trade_key_rate_dv01_signs_and_tenors(sample_balance_sheet):
+    trades = validate_trades(pd.DataFrame(SAMPLE_DERIVATIVES))
+    # The receive-fixed swap gains as rates fall; the cap and payer swaption as they rise.
+    swap, cap, payer = (trade_key_rate_dv01(trades.iloc[[row]]).sum() for row in range(3))
+    assert swap < 0 < cap and payer > 0
+    # No trade runs past seven years.
+    ladder = build_dv01_ladder(sample_balance_sheet, trades)
+    assert ladder.loc[30, "Derivatives DV01 ($)"] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_dv01_ladder_without_trades_has_no_derivatives_dv01(sample_balance_sheet):
+    assert (build_dv01_ladder(sample_balance_sheet)["Derivatives DV01 ($)"] == 0).all()
+
+
+def test_hull_white_paths_move_the_short_end_most():
+    paths = simulate_rate_paths(2_000, 24, model="hull_white", seed=1)
+    assert paths.shape == (2_000, 24, 5)
+    # Hull-White loadings decay with tenor.
+    assert paths[:, -1, 0].std() > paths[:, -1, -1].std()
+
+
+def test_monte_carlo_pool_reproduces_the_serial_run(sample_balance_sheet):
+    sensitivity = {"Savings Account": 0.4}
+    serial = run_monte_carlo(sample_balance_sheet, sensitivity, 3_000, 12, seed=5, chunk_paths=700)
+    pooled = run_monte_carlo(
+        sample_balance_sheet, sensitivity, 3_000, 12, seed=5, chunk_paths=700, max_workers=2
+    )
+    assert np.array_equal(serial.nii, pooled.nii) and np.array_equal(serial.eve, pooled.eve)
+
+
+def test_monte_carlo_summary_orders_tail_losses(sample_balance_sheet):
+    result = run_monte_carlo(sample_balance_sheet, {"Savings Account": 0.4}, 3_000, 12, seed=5)
+    summary = result.summary()
+    assert list(summary.index) == ["NII", "EVE"]
+    assert (summary["ES 99% ($)"] >= summary["VaR 99% ($)"]).all()
+    assert (summary["VaR 99% ($)"] >= summary["VaR 95% ($)"]).all()
+
+
+def test_nii_projection_base_matches_static_nii(sample_balance_sheet):
+    projection = project_nii(sample_balance_sheet, NII_SCENARIOS, SAVINGS_SENSITIVITY, 24)
+    static_base = calc_nii(sample_balance_sheet, 0.0, SAVINGS_SENSITIVITY) / 12
+    assert projection["Base"].to_numpy() == pytest.approx(static_base)
+    assert list(annual_nii_summary(projection, "Base").index) == ["Year 1", "Year 2"]
+
+
+def test_nii_projection_reprices_positions_only_when_they_roll(sample_balance_sheet):
+    projection = project_nii(sample_balance_sheet, NII_SCENARIOS, SAVINGS_SENSITIVITY, 24)
+    # Only Fed Funds Purchased (3 months) rolls inside the first quarter.
+    fed_funds = sample_balance_sheet.loc[
+        sample_balance_sheet["Product"] == "Fed Funds Purchased", "Amount ($)"
+    ].iloc[0]
+    jump = projection["+200bps"].iloc[3] - projection["+200bps"].iloc[2]
+    assert jump == pytest.approx(-fed_funds * 2.0 / 1200)
+
+
+def test_monthly_rolling_book_converges_to_static_shocked_nii(sample_balance_sheet):
+    monthly = sample_balance_sheet.assign(**{"Maturity (Months)": 1})
+    rolled = project_nii(monthly, NII_SCENARIOS, SAVINGS_SENSITIVITY, horizon_months=12)
+    assert rolled["+200bps"].iloc[1:].to_numpy() == pytest.approx(
+        calc_nii(monthly, 2.0, SAVINGS_SENSITIVITY) / 12
+    )
+
+
+@pytest.fixture
+def edited_analytics(sample_balance_sheet) -> IncrementalAnalytics:
+    """Analytics warmed on the sample book, then edited twice and re-sensitised."""
+    analytics = IncrementalAnalytics(sample_balance_sheet, SAVINGS_SENSITIVITY)
+    analytics.liquidity_gap_table()
+    analytics.scenario_table(INCREMENTAL_SCENARIOS)
+    analytics.kpis()
+    analytics.update_row(0, {"Amount ($)": 1_000_000, "Maturity (Months)": 4})
+    analytics.update_row(8, {"Product": "Repo Funding", "Rate (%)": 4.5})
+    analytics.set_sensitivity("Repo Funding", 0.25)
+    return analytics
+
+
+def test_incremental_analytics_match_full_recompute_before_edits(sample_balance_sheet):
+    analytics = IncrementalAnalytics(sample_balance_sheet, SAVINGS_SENSITIVITY)
+    pd.testing.assert_frame_equal(
+        analytics.liquidity_gap_table(), build_liquidity_gap_table(sample_balance_sheet)
+    )
+
+
+def test_incremental_analytics_keep_unedited_columns_shared(edited_analytics):
+    snapshot = edited_analytics.positions()
+    assert np.shares_memory(snapshot.duration, edited_analytics._base.duration)
+    assert edited_analytics._edits["amount"] == {0: 1_000_000.0}
+
+
+def test_incremental_analytics_match_full_recompute_after_edits(edited_analytics):
+    edited = edited_analytics.positions().to_frame()
+    pd.testing.assert_frame_equal(
+        edited_analytics.liquidity_gap_table(), build_liquidity_gap_table(edited)
+    )
+    pd.testing.assert_frame_equal(
+        edited_analytics.cash_flow_gap_table(), build_cash_flow_gap_table(edited)
+    )
+    assert edited_analytics.kpis() == pytest.approx(summarize_balance_sheet(edited))
+    pd.testing.assert_frame_equal(
+        edited_analytics.scenario_table(INCREMENTAL_SCENARIOS),
+        build_scenario_table(
+            edited, INCREMENTAL_SCENARIOS, {**SAVINGS_SENSITIVITY, "Repo Funding": 0.25}
+        ),
+    )
+
+
+def test_incremental_analytics_absorb_edits_as_deltas(edited_analytics):
+    edited_analytics.liquidity_gap_table()
+    edited_analytics.kpis()
+    edited_analytics.scenario_table(INCREMENTAL_SCENARIOS)
+    # Only the cheap product-level moments are rebuilt after the edits.
+    assert edited_analytics.recomputed["liquidity_gap"] == 1
+    assert edited_analytics.recomputed["stats"] == 1
+    assert edited_analytics.recomputed["product_moments"] == 1
+    assert edited_analytics.recomputed["scenario_moments"] == 2
+
+
+def test_bucket_index_is_cached_per_scheme(sample_balance_sheet):
+    positions = as_positions(sample_balance_sheet)
+    assert positions.bucket_slots() is positions.bucket_slots()
+    build_liquidity_gap_table(positions, bins=CUSTOM_BINS, labels=CUSTOM_LABELS)
+    assert positions.bucket_slots(CUSTOM_BINS) is positions.bucket_slots(CUSTOM_BINS)
+
+
+def test_bucket_index_matches_pd_cut(sample_balance_sheet):
+    custom = build_liquidity_gap_table(
+        as_positions(sample_balance_sheet), bins=CUSTOM_BINS, labels=CUSTOM_LABELS
+    )
+    buckets = assign_maturity_bucket(
+        sample_balance_sheet["Maturity (Months)"], bins=CUSTOM_BINS, labels=CUSTOM_LABELS
+    )
+    expected = (
+        sample_balance_sheet.groupby([buckets, "Type"], observed=False)["Amount ($)"]
+        .sum()
+        .unstack("Type")
+    )
+    assert custom["Inflows ($)"].tolist() == expected["Asset"].tolist()
+    assert custom["Outflows ($)"].tolist() == expected["Liability"].tolist()
+
+
+def test_liquidity_gap_rejects_labels_that_do_not_match_the_bins(sample_balance_sheet):
+    with pytest.raises(ValueError):
+        build_liquidity_gap_table(
+            as_positions(sample_balance_sheet), bins=CUSTOM_BINS, labels=["<1Y"]
+        )
+
+
+def test_daily_liquidity_ladder_runs_from_days_to_years():
+    ladder = liquidity_ladder(daily_days=90, weekly_until_months=12)
+    assert len(ladder) > 100
+    assert ladder.labels[:2] == ("Day 1", "Day 2") and ladder.labels[-4:] == (
+        "1-2Y",
+        "2-3Y",
+        "3-5Y",
+        ">5Y",
+    )
+
+
+def test_daily_liquidity_ladder_buckets_day_level_maturities(sample_balance_sheet):
+    ladder = liquidity_ladder(daily_days=90, weekly_until_months=12)
+    book = sample_balance_sheet.assign(
+        **{"Maturity (Months)": np.array([1, 2, 3, 7, 8, 45, 100, 400, 800]) / DAYS_PER_MONTH}
+    )
+    gap = build_liquidity_gap_table(book, bins=ladder.bins, labels=ladder.labels)
+    assets = book.loc[book["Type"] == "Asset", "Amount ($)"]
+    assert gap["Inflows ($)"].sum() == pytest.approx(assets.sum())
+    assert gap.loc["Day 1", "Inflows ($)"] == book.loc[0, "Amount ($)"]
+    assert gap.loc["Days 98-104", "Outflows ($)"] == book.loc[6, "Amount ($)"]
+
+
+@pytest.mark.parametrize(
+    ("daily_days", "weekly_months", "last_day_labels"),
+    [
+        (60, 1, ("Day 59", "Day 60", "1.97-3M")),
+        (30, 0, ("Day 29", "Day 30", "1-3M")),
+        (365, 24, ("Days 716-722", "Days 723-730", "2-3Y")),
+    ],
+)
+def test_custom_liquidity_ladder_edges(daily_days, weekly_months, last_day_labels):
+    ladder = liquidity_ladder(daily_days, weekly_months)
+    assert ladder.labels[:2] == ("Day 1", "Day 2")
+    assert ladder.labels[daily_days - 1] == f"Day {daily_days}"
+    start = ladder.labels.index(last_day_labels[0])
+    assert ladder.labels[start : start + 3] == last_day_labels
+
+    # Every day-level bucket spans at least a day, weekly ones at most 12 days.
+    days = np.diff(ladder.bins) * DAYS_PER_MONTH
+    day_level = np.array(ladder.bins[1:]) <= max(daily_days / DAYS_PER_MONTH, weekly_months)
+    assert (days[day_level] >= 1 - 1e-9).all() and (days[day_level] < 12).all()
+    assert ladder.bins[-4:] == tuple(float(edge) for edge in MATURITY_BINS_STANDARD[-4:])
+
+
+@pytest.fixture
+def runoff_profiles() -> dict:
+    return {
+        "Core Checking": CoreVolatileSplit(core_share=0.6, core_months=24),
+        "Savings Account": ExponentialDecay(monthly_rate=0.05),
+        **decay_tables_from_frame(
+            pd.DataFrame(
+                {"Product": ["Time Deposits"] * 2, "Month": [1, 3], "Runoff (%)": [40, 20]}
+            )
+        ),
+    }
+
+
+def test_behavioral_runoff_matrix_is_sparse_and_conserves_balances(
+    sample_balance_sheet, runoff_profiles
+):
+    matrix = runoff_matrix(sample_balance_sheet, runoff_profiles, horizon=400)
+    dense = matrix.to_dense()
+    assert dense.shape == (9, 400) and matrix.nbytes < dense.nbytes
+    assert dense.sum(axis=1) == pytest.approx(sample_balance_sheet["Amount ($)"].to_numpy())
+    assert matrix.monthly_totals() == pytest.approx(dense.sum(axis=0))
+
+
+def test_behavioral_runoff_follows_each_profile_shape(sample_balance_sheet, runoff_profiles):
+    dense = runoff_matrix(sample_balance_sheet, runoff_profiles, horizon=400).to_dense()
+    checking, savings, time_deposits = 4, 5, 6
+    assert dense[checking, 0] == pytest.approx(3_500_000 * (0.4 + 0.6 / 24))
+    assert dense[checking, 24:].sum() == 0
+    assert dense[savings, 1] / dense[savings, 0] == pytest.approx(0.95)
+    assert dense[time_deposits, :4] == pytest.approx(4_000_000 * np.array([0.4, 0, 0.2, 0.4]))
+    # Contractual positions keep straight-line runoff over their term.
+    assert dense[0, :60] == pytest.approx(np.full(60, 5_500_000 / 60))
+
+
+def test_runoff_gap_table_runs_off_every_liability(sample_balance_sheet, runoff_profiles):
+    gap = build_runoff_gap_table(sample_balance_sheet, runoff_profiles, horizon=400)
+    liabilities = sample_balance_sheet["Type"] == "Liability"
+    months = np.array([1, 2, 3, 6, 12, 12, 24, 60, 280])
+    assert gap["Monthly Outflows ($)"].to_numpy() @ months == pytest.approx(
+        sample_balance_sheet.loc[liabilities, "Amount ($)"].sum()
+    )
+
+
+def test_batch_cli_writes_every_table_per_book(tmp_path):
+    books = []
+    for name in ("north", "south"):
+        books.append(tmp_path / f"{name}.csv")
+        books[-1].write_bytes(SAMPLE_CSV.read_bytes())
+    output = tmp_path / "out"
+
+    assert batch_main([*map(str, books), "-o", str(output), "--format", "csv", "-j", "1"]) == 0
+    sample = pd.read_csv(SAMPLE_CSV)
+    for book in books:
+        tables = {path.stem for path in (output / book.stem).iterdir()}
+        assert tables == {"liquidity_gap", "cash_flow_gap", "ftp", "irr_scenarios", "duration_gap"}
+    gap = pd.read_csv(output / "north" / "liquidity_gap.csv")
+    assert gap["Inflows ($)"].tolist() == build_liquidity_gap_table(sample)["Inflows ($)"].tolist()
+    scenarios = pd.read_csv(output / "south" / "irr_scenarios.csv", index_col="Scenario")
+    assert list(scenarios.index) == list(DEFAULT_SCENARIOS)
+
+
+def test_batch_cli_fails_an_invalid_book(tmp_path):
+    bad = tmp_path / "broken.csv"
+    bad.write_text("Product,Type\nHELOC,Asset\n")
+    assert batch_main([str(bad), "-o", str(tmp_path / "out"), "-j", "1"]) == 1
+
+
+def test_batch_cli_imports_without_streamlit():
+    loaded = subprocess.run(
+        [sys.executable, "-c", "import sys, alm_batch; print(sorted(sys.modules))"],
+        cwd=SAMPLE_CSV.parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert "'streamlit'" not in loaded and "'plotly'" not in loaded
+
+
+def test_calculation_layer_imports_without_ui_packages():
+    root = SAMPLE_CSV.parents[1]
+    # Every module except the Streamlit entry point, including the page modules.
+    modules = sorted(path.stem for path in root.glob("*.py") if path.stem != "ALM_Dashboard")
+    assert {"irr", "ftp", "liquidity_gap", "duration_gap", "derivatives_book"} <= set(modules)
+    loaded = subprocess.run(
+        [sys.executable, "-c", f"import sys, {', '.join(modules)}; print(sorted(sys.modules))"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert "'streamlit'" not in loaded and "'plotly'" not in loaded
+
+
+def test_norm_cdf_matches_erf():
+    grid = np.linspace(-6, 6, 241)
+    exact = [0.5 * (1 + math.erf(x / math.sqrt(2))) for x in grid]
+    assert np.abs(norm_cdf(grid) - exact).max() < 1e-7
+
+
+@pytest.fixture
+def five_year_trade() -> dict:
+    return {"Side": "Long", "Notional ($)": 1_000_000, "Maturity (Months)": 60}
+
+
+def test_swap_struck_at_par_is_worth_nothing(five_year_trade):
+    times = np.arange(1, 21) / 4
+    annuity = discount_factors(times).sum() / 4
+    par_rate = (1 - discount_factors(5.0)) / annuity * 100
+    trades = validate_trades(
+        pd.DataFrame([{**five_year_trade, "Instrument": "Swap", "Strike": par_rate}])
+    )
+    assert price_trades(trades)["MTM ($)"].iloc[0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_cap_minus_floor_is_the_pay_fixed_swap(five_year_trade):
+    option = {**five_year_trade, "Strike": 3.0, "Volatility (%)": 20.0}
+    trades = validate_trades(
+        pd.DataFrame(
+            [
+                {**option, "Instrument": "Cap"},
+                {**option, "Instrument": "Floor"},
+                {**five_year_trade, "Instrument": "Swap", "Strike": 3.0},
+            ]
+        )
+    )
+    priced = price_trades(trades)
+    cap, floor, swap = priced["MTM ($)"].to_numpy()
+    assert cap - floor == pytest.approx(-swap, rel=1e-9)
+    assert priced["DV01 ($)"].iloc[0] > 0 > priced["DV01 ($)"].iloc[2]
+
+
+def test_black_vega_matches_a_finite_difference():
+    value, _, vega = black(0.03, 0.03, 0.2, 2.0, True)
+    bumped, _, _ = black(0.03, 0.03, 0.2 + 1e-6, 2.0, True)
+    assert vega == pytest.approx((bumped - value) / 1e-6, rel=1e-4)
+
+
+def test_validate_trades_rejects_unknown_instruments(five_year_trade):
+    with pytest.raises(ValueError, match="unknown instrument"):
+        validate_trades(pd.DataFrame([{**five_year_trade, "Instrument": "Bond", "Strike": 1.0}]))
+
+
+def test_price_trades_handles_a_large_book(large_trade_book):
+    # Timing lives in benchmarks/pricing_benchmark.py; here a large book only has to price.
+    priced = price_trades(large_trade_book)
+    assert len(priced) == 10_000
+    assert np.isfinite(priced[["MTM ($)", "DV01 ($)", "Vega ($)"]].to_numpy()).all()
+
+
+def test_validate_trades_requires_a_priceable_fx_currency():
+    fx_forward = {
+        "Instrument": "FX Forward",
+        "Side": "Long",
+        "Notional ($)": 1_000_000,
+        "Maturity (Months)": 6,
+        "Strike": 1.1,
+    }
+    with pytest.raises(ValueError, match="FX forward needs a currency"):
+        validate_trades(pd.DataFrame([fx_forward]))
+    with pytest.raises(ValueError, match="no FX market data for currency"):
+        validate_trades(pd.DataFrame([{**fx_forward, "Currency": "JPY"}]), DEFAULT_FX_MARKET)
+    # Rate trades carry no currency and pass against any FX market.
+    swap = {**fx_forward, "Instrument": "Swap", "Strike": 3.0}
+    assert validate_trades(pd.DataFrame([swap]), DEFAULT_FX_MARKET)["Currency"].iloc[0] == ""
+
+
+def test_hedged_scenario_table_adds_the_book_mtm_change(sample_balance_sheet):
+    trades = validate_trades(pd.DataFrame(SAMPLE_DERIVATIVES))
+    table = hedged_scenario_table(
+        build_scenario_table(sample_balance_sheet, DEFAULT_SCENARIOS, {"Savings Account": 0.4}),
+        trades,
+    )
+    for measure in ("NII", "EVE"):
+        assert (
+            table[f"Hedged Δ {measure} ($)"]
+            == table[f"Δ {measure} ($)"] + table[f"Hedge Δ {measure} ($)"]
+        ).all()
+    assert table.loc["Base", "Hedge Δ EVE ($)"] == pytest.approx(0.0, abs=1e-6)
+    # The hedge ΔEVE is the book's MTM change on the shifted curve.
+    shocked = build_derivatives_book(rate_shift_pct=1.0)["MTM ($)"].sum()
+    assert table.loc["+100bps Shock", "Hedge Δ EVE ($)"] == pytest.approx(
+        shocked - build_derivatives_book()["MTM ($)"].sum()
+    )
+    # Receive-fixed swaps earn less as floating rates rise.
+    assert table.loc["+100bps Shock", "Hedge Δ NII ($)"] < 0
+
+
+def test_hedged_scenario_grid_prices_each_distinct_curve_once(sample_balance_sheet, monkeypatch):
+    trades = validate_trades(pd.DataFrame(SAMPLE_DERIVATIVES))
+    grid = build_scenario_grid(["Parallel", "Steepener"], [-100, 100], [0.5, 1.0, 1.5])
+    grid_df = run_scenario_grid(
+        sample_balance_sheet, grid, {"Savings Account": 0.4}, max_workers=1
+    )
+    calls = []
+    rate_values = derivatives_pricing._rate_values
+    monkeypatch.setattr(
+        derivatives_pricing, "trade_schedules", lambda *_: pytest.fail("schedules rebuilt")
+    )
+    monkeypatch.setattr(
+        derivatives_pricing,
+        "_rate_values",
+        lambda *args: calls.append(1) or rate_values(*args),
+    )
+    hedged = hedged_scenario_table(
+        grid_df, trades, grid.shifts_pct, grid.tenors, schedules=trade_schedules(trades)
+    )
+    assert len(calls) == 1 + 4
+    by_curve = hedged.groupby(["Rate Shift (%)", grid.definitions["Curve Shape"].to_numpy()])
+    assert (by_curve["Hedge Δ EVE ($)"].nunique() == 1).all()
+    assert np.isfinite(hedged["Hedged Δ NII ($)"]).all()
+
+
+@pytest.fixture
+def scenario_table_compute(sample_balance_sheet):
+    """A scenario-table computation that records each call in ``compute.calls``."""
+
+    def compute():
+        compute.calls.append(1)
+        return build_scenario_table(
+            sample_balance_sheet, DEFAULT_SCENARIOS, {"Savings Account": 0.4}
+        )
+
+    compute.calls = []
+    return compute
+
+
+def test_result_cache_reuses_tables_across_instances(
+    sample_balance_sheet, scenario_table_compute, tmp_path
+):
+    cache = ResultCache(tmp_path / "cache")
+    first = cache.fetch(
+        "irr", sample_balance_sheet, scenario_table_compute, scenarios=DEFAULT_SCENARIOS
+    )
+    # A new instance over the same directory stands in for a restart.
+    restarted = ResultCache(tmp_path / "cache")
+    again = restarted.fetch(
+        "irr", sample_balance_sheet, scenario_table_compute, scenarios=DEFAULT_SCENARIOS
+    )
+    pd.testing.assert_frame_equal(first, again)
+    assert len(scenario_table_compute.calls) == 1
+    assert (cache.hits, cache.misses, restarted.hits, restarted.misses) == (0, 1, 1, 0)
+
+
+def test_result_key_follows_content_and_assumptions(sample_balance_sheet):
+    sensitivity = {"Savings Account": 0.4}
+    positions = dataset_positions(load_balance_sheet(SAMPLE_CSV))
+    assert positions.fingerprint == dataset_positions(sample_balance_sheet).fingerprint
+    assert result_key("irr", positions, s=sensitivity) == result_key(
+        "irr", dataset_positions(sample_balance_sheet), s=dict(sensitivity)
+    )
+    assert result_key("irr", positions, s=sensitivity) != result_key(
+        "irr", positions, s={"Savings Account": 0.5}
+    )
+    edited = sample_balance_sheet.assign(**{"Rate (%)": sample_balance_sheet["Rate (%)"] + 0.01})
+    assert result_key("irr", edited) != result_key("irr", sample_balance_sheet)
+
+
+def test_result_cache_evicts_least_recently_used_results(
+    sample_balance_sheet, scenario_table_compute, tmp_path
+):
+    cache = ResultCache(tmp_path / "cache")
+    cache.fetch("irr", sample_balance_sheet, scenario_table_compute, scenario=0)
+    bounded = ResultCache(tmp_path / "cache", max_bytes=int(cache.total_bytes * 2.5))
+    for scenario in range(4):
+        bounded.fetch("irr", sample_balance_sheet, scenario_table_compute, scenario=scenario)
+    assert len(bounded) == 2
+    assert bounded.total_bytes <= bounded.max_bytes
+    assert result_key("irr", sample_balance_sheet, scenario=3) in bounded
+
+
+def test_default_result_cache_ignores_the_working_directory(tmp_path):
+    code = "import result_cache; print(result_cache.DEFAULT_RESULT_CACHE_DIR)"
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+    env.pop("ALM_RESULT_CACHE_DIR", None)
+
+    def default_dir(**overrides):
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=tmp_path,
+            env={**env, **overrides},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    root = Path(__file__).resolve().parents[1]
+    assert Path(default_dir()) == root / ".alm_cache" / "results"
+    assert default_dir(ALM_RESULT_CACHE_DIR=str(tmp_path / "c")) == str(tmp_path / "c")
+    assert not (tmp_path / ".alm_cache").exists()
+
+
+def test_batch_cli_reuses_cached_tables(tmp_path, capsys):
+    args = [str(SAMPLE_CSV), "-o", str(tmp_path / "out"), "--cache-dir", str(tmp_path / "cache")]
+    assert batch_main(args) == 0
+    assert batch_main(args) == 0
+    assert batch_main([*args, "--eve-method", "full"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split("(")[-1] for line in lines] == [
+        "0 of 5 tables cached)",
+        "5 of 5 tables cached)",
+        "4 of 5 tables cached)",
+    ]
+
+
+def test_batch_cli_reports_invalid_runs_without_a_traceback(tmp_path, capsys):
+    twin = tmp_path / "other"
+    twin.mkdir()
+    (twin / SAMPLE_CSV.name).write_bytes(SAMPLE_CSV.read_bytes())
+    assert batch_main([str(SAMPLE_CSV), str(twin / SAMPLE_CSV.name), "-o", str(tmp_path)]) == 2
+    assert "share an output directory name" in capsys.readouterr().err
+
+
+@pytest.fixture
+def legacy_scenarios() -> list[dict]:
+    """300 saved scenarios in the legacy JSON layout; every 50th is a favorite."""
+    return [
+        {
+            "name": f"Legacy {i}",
+            "type": "Parallel Shift",
+            "shocked_curve": [2.0 + i / 100],
+            "dv01_estimate": float(i),
+            "timestamp": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}",
+            "favorite": i % 50 == 0,
+        }
+        for i in range(300)
+    ]
+
+
+@pytest.fixture
+def scenario_store(tmp_path, legacy_scenarios) -> ScenarioStore:
+    json_path = tmp_path / "saved_scenarios.json"
+    json_path.write_text(json.dumps(legacy_scenarios), encoding="utf-8")
+    store = ScenarioStore(tmp_path / "scenarios.db")
+    store.import_json(json_path)
+    return store
+
+
+def test_scenario_store_imports_legacy_json_once(tmp_path, legacy_scenarios):
+    json_path = tmp_path / "saved_scenarios.json"
+    json_path.write_text(json.dumps(legacy_scenarios), encoding="utf-8")
+    store = ScenarioStore(tmp_path / "scenarios.db")
+    assert store.import_json(json_path) == 300
+    # Re-importing skips names that are already saved.
+    assert store.import_json(json_path) == 0
+
+
+def test_scenario_store_pages_favorites_first_then_newest(scenario_store):
+    first = scenario_store.list_page(0, page_size=25)
+    assert len(first) == 25
+    assert first["favorite"].iloc[:6].all() and not first["favorite"].iloc[6]
+    assert first["name"].iloc[0] == "Legacy 250"
+    assert first["name"].iloc[-1] == "Legacy 281"
+    last = scenario_store.list_page(11, page_size=25)
+    assert len(last) == 25 and last["name"].iloc[-1] == "Legacy 1"
+    assert scenario_store.list_page(12, page_size=25).empty
+
+
+def test_scenario_store_counts_by_name_and_favorite(scenario_store):
+    assert scenario_store.count("Legacy 1_") == 0 and scenario_store.count("Legacy 29") == 11
+    assert scenario_store.count(favorites_only=True) == 6
+
+
+def test_scenario_store_updates_and_deletes_single_rows(scenario_store, legacy_scenarios):
+    scenario_id = int(scenario_store.list_page(0, page_size=25)["id"].iloc[-1])
+    assert scenario_store.set_favorite(scenario_id, True)
+    assert scenario_store.get(scenario_id)["favorite"] is True
+    saved = scenario_store.get(scenario_id)
+    assert saved["shocked_curve"] == legacy_scenarios[281]["shocked_curve"]
+    assert scenario_store.delete(scenario_id) and scenario_store.get(scenario_id) is None
+    with pytest.raises(ValueError, match="already exists"):
+        scenario_store.save(legacy_scenarios[0])
+
+
+def test_scenario_store_keeps_every_concurrent_write(scenario_store):
+    def save_many(worker):
+        for i in range(20):
+            scenario_store.save({"name": f"W{worker}-{i}", "timestamp": "2026-01-01T00:00:00"})
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(save_many, range(4)))
+    assert len(scenario_store) == 300 + 80
+
+
+def test_scenario_store_uses_wal_and_the_listing_index(scenario_store, tmp_path):
+    with sqlite3.connect(tmp_path / "scenarios.db") as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM scenarios "
+            "ORDER BY favorite DESC, timestamp DESC, id DESC LIMIT 25"
+        ).fetchall()
+    assert "scenarios_favorite_timestamp" in str(plan)
+
+
+@pytest.mark.parametrize("method", CURVE_METHODS)
+def test_bootstrapped_curve_reprices_par_rates(method):
+    curve = YieldCurve.bootstrap(PAR_TENORS, PAR_RATES, method, frequency=2)
+    assert curve.par_rates(PAR_TENORS, frequency=2) == pytest.approx(PAR_RATES, abs=1e-9)
+    assert YieldCurve(PAR_TENORS, curve.rates, method).zero_rates(PAR_TENORS) == pytest.approx(
+        curve.rates
+    )
+
+
+def test_yield_curve_rejects_unknown_interpolation_method():
+    with pytest.raises(ValueError, match="Unknown curve interpolation method"):
+        YieldCurve(PAR_TENORS, PAR_RATES, "quadratic")
+
+
+def test_ftp_table_accepts_an_overnight_curve_node(sample_balance_sheet):
+    overnight = build_ftp_table(
+        sample_balance_sheet, {0: 0.5, 12: 1.0}, mode="linear", method="maturity"
+    )
+    maturities = sample_balance_sheet["Maturity (Months)"].to_numpy()
+    assert overnight["FTP Rate (%)"].to_numpy() == pytest.approx(
+        np.interp(maturities, [0, 12], [0.5, 1.0])
+    )
+
+
+def test_log_linear_discount_factors_give_flat_forwards_between_nodes():
+    log_linear = YieldCurve(PAR_TENORS, PAR_RATES, "log_linear_df")
+    forwards = log_linear.forward_rates([2.0, 2.5, 4.0], [2.5, 4.0, 5.0])
+    assert forwards == pytest.approx(np.full(3, forwards[0]))
+
+
+def test_cubic_spline_curve_is_natural():
+    # Through (1, 2), (2, 3), (3, 2) the natural spline has curvature -3 at the middle node.
+    spline = YieldCurve([1, 2, 3], [2.0, 3.0, 2.0], "cubic_spline")
+    assert spline.zero_rates([1.5, 2.5]) == pytest.approx([2.6875, 2.6875])
+
+
+def test_cubic_spline_evaluates_a_million_times_in_one_call():
+    times = np.random.default_rng(3).uniform(0, 40, 1_000_000)
+    rates = YieldCurve(PAR_TENORS, PAR_RATES, "cubic_spline").zero_rates(times)
+    assert rates.shape == times.shape and np.isfinite(rates).all()
+
+
+def test_monotone_ftp_curve_keeps_its_pchip_rates():
+    # Reference values from the FTP module's own PCHIP curve before the shared curve.
+    assert FTPCurve(mode="monotone")([0, 6, 18, 30, 48, 72, 100, 150]) == pytest.approx(
+        [1.0, 1.0, 1.25, 1.76923077, 2.27403846, 2.76182432, 3.25351277, 3.5]
+    )
+    overnight_curve = FTPCurve({0: 0.5, 3: 0.9, 12: 1.0, 60: 2.2}, mode="monotone")
+    assert overnight_curve([1, 2, 6, 30]) == pytest.approx(
+        [0.67123641, 0.82210245, 0.94833744, 1.32432609]
+    )
+
+
+def test_shifted_base_curve_discounts_every_scenario_in_one_call():
+    shifts = np.array([[1.0, 0.5, 0.0, -0.5, -1.0], [0.0, 0.0, 0.0, 0.0, 0.0]])
+    view = BASE_CURVE.shifted(shifts, KEY_TENORS)
+    grid = np.arange(1, 361) / 12
+    base_zeros = np.interp(grid, KEY_TENORS, BASE_YIELD)
+    zeros = np.array([base_zeros + np.interp(grid, KEY_TENORS, row) for row in shifts])
+    expected = np.exp(-grid * np.log1p(zeros / 100))
+    assert view.discount_factors(grid) == pytest.approx(expected, rel=1e-12)
+    assert curve_discount_factors(shifts, 360, KEY_TENORS) == pytest.approx(expected, rel=1e-12)
+    assert view.zero_rates(KEY_TENORS)[0] == pytest.approx(BASE_CURVE.rates + shifts[0])
+
+
+def test_scalar_shift_moves_every_base_zero_rate():
+    assert BASE_CURVE.shifted(1.0).zero_rates(KEY_TENORS) == pytest.approx(
+        BASE_CURVE.rates + 1.0
+    )
+
+
+def test_scenario_store_paths_ignore_the_working_directory(tmp_path):
+    root = Path(__file__).resolve().parents[1]
+    code = "import scenario_store as s; print(s.DEFAULT_SCENARIO_DB); print(s.LEGACY_SCENARIO_FILE)"
+    env = {**os.environ, "PYTHONPATH": str(root)}
+    env.pop("ALM_SCENARIO_DB", None)
+
+    def paths(**overrides):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=tmp_path,
+            env={**env, **overrides},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        return [Path(line) for line in output.splitlines()]
+
+    assert paths() == [root / "saved_scenarios.db", root / "saved_scenarios.json"]
+    assert paths(ALM_SCENARIO_DB=str(tmp_path / "s.db"))[0] == tmp_path / "s.db"
+    assert not (tmp_path / "saved_scenarios.db").exists()
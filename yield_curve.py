@@ -0,0 +1,297 @@
+"""
+Continuous zero curves shared by the pricing, revaluation and FTP modules.
+
+A :class:`YieldCurve` holds annually compounded zero rates (percent) at
+node tenors (years) and evaluates rates and discount factors at any array
+of times in one call. Interpolation coefficients are computed once when
+the curve is built. Scenario curves are :class:`ShiftedCurve` views that
+add a parallel or key-rate shift to a base curve at evaluation time, so
+nothing is copied or rebuilt per scenario.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+CURVE_METHODS = ["linear", "log_linear_df", "cubic_spline", "monotone"]
+
+KEY_TENORS = [1, 2, 5, 10, 30]
+BASE_YIELD = [2.0, 2.1, 2.4, 2.8, 3.2]
+
+BOOTSTRAP_TOLERANCE = 1e-10
+BOOTSTRAP_MAX_ITERATIONS = 50
+
+
+def pchip_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Fritsch–Carlson node slopes for shape-preserving cubic interpolation."""
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    if len(x) == 2:
+        return np.array([delta[0], delta[0]])
+
+    slopes = np.zeros_like(y)
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    same_sign = delta[:-1] * delta[1:] > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+    slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    def _end_slope(h0, h1, d0, d1):
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        if np.sign(slope) != np.sign(d0):
+            return 0.0
+        if np.sign(d0) != np.sign(d1) and abs(slope) > abs(3 * d0):
+            return 3 * d0
+        return slope
+
+    slopes[0] = _end_slope(h[0], h[1], delta[0], delta[1])
+    slopes[-1] = _end_slope(h[-1], h[-2], delta[-1], delta[-2])
+    return slopes
+
+
+def _hermite_coefficients(x, y, slopes) -> tuple[np.ndarray, ...]:
+    """Per-segment power-basis coefficients ``(a, b, c, d)`` of the cubic Hermite interpolant."""
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    c = (3 * delta - 2 * slopes[:-1] - slopes[1:]) / h
+    d = (slopes[:-1] + slopes[1:] - 2 * delta) / h**2
+    return y[:-1], slopes[:-1], c, d
+
+
+def _natural_spline_slopes(x, y) -> np.ndarray:
+    """Node slopes of the natural cubic spline (zero curvature at both ends)."""
+    n = len(x)
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    # Tridiagonal system for the second derivatives; the ends are fixed at zero.
+    system = np.zeros((n, n))
+    rhs = np.zeros(n)
+    system[0, 0] = system[-1, -1] = 1.0
+    for i in range(1, n - 1):
+        system[i, i - 1 : i + 2] = h[i - 1], 2 * (h[i - 1] + h[i]), h[i]
+        rhs[i] = 6 * (delta[i] - delta[i - 1])
+    curvature = np.linalg.solve(system, rhs)
+    slopes = np.empty(n)
+    slopes[:-1] = delta - h * (2 * curvature[:-1] + curvature[1:]) / 6
+    slopes[-1] = delta[-1] + h[-1] * (curvature[-2] + 2 * curvature[-1]) / 6
+    return slopes
+
+
+def tenor_weights(maturity_years, tenors) -> np.ndarray:
+    """Linear interpolation weights (positions × tenors) with flat extrapolation."""
+    tenors = np.asarray(tenors, dtype=float)
+    maturity_years = np.asarray(maturity_years, dtype=float)
+    weights = np.zeros((len(maturity_years), len(tenors)))
+    if len(tenors) == 1:
+        weights[:, 0] = 1.0
+        return weights
+
+    clipped = np.clip(maturity_years, tenors[0], tenors[-1])
+    upper = np.clip(np.searchsorted(tenors, clipped, side="left"), 1, len(tenors) - 1)
+    lower = upper - 1
+    frac = (clipped - tenors[lower]) / (tenors[upper] - tenors[lower])
+    rows = np.arange(len(maturity_years))
+    weights[rows, lower] = 1.0 - frac
+    weights[rows, upper] += frac
+    return weights
+
+
+def _as_times(times) -> np.ndarray:
+    return np.maximum(np.asarray(times, dtype=float), 0.0)
+
+
+class Curve(ABC):
+    """
+    Rates, discount factors, forwards and par rates derived from ``zero_rates``.
+
+    Rates are annually compounded and in percent; times are in years.
+    Subclasses only define :meth:`zero_rates`.
+    """
+
+    @abstractmethod
+    def zero_rates(self, times) -> np.ndarray:
+        """Annually compounded zero rates (percent) at *times* (years)."""
+
+    def discount_factors(self, times) -> np.ndarray:
+        times = _as_times(times)
+        return np.exp(-times * np.log1p(self.zero_rates(times) / 100))
+
+    def forward_rates(self, start, end) -> np.ndarray:
+        """Annually compounded forward rates (percent) between *start* and *end*."""
+        start, end = _as_times(start), _as_times(end)
+        ratio = self.discount_factors(start) / self.discount_factors(end)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            forward = np.expm1(np.log(ratio) / (end - start)) * 100
+        return np.where(end > start, forward, self.zero_rates(start))
+
+    def par_rates(self, maturities, frequency: int = 1) -> np.ndarray:
+        """
+        Par coupon rates (percent) of bullet bonds or swaps maturing at *maturities*.
+
+        Coupons are paid *frequency* times a year, with a short final stub
+        ending at the maturity.
+        """
+        maturities = np.atleast_1d(np.asarray(maturities, dtype=float))
+        periods = np.maximum(np.ceil(maturities * frequency - 1e-9), 1).astype(np.int64)
+        steps = np.arange(1, int(periods.max()) + 1)
+        times = np.minimum(steps / frequency, maturities[:, None])
+        accrual = np.diff(times, prepend=0.0, axis=1)
+        discount = self.discount_factors(times)
+        annuity = (accrual * discount).sum(axis=-1)
+        return (1 - self.discount_factors(maturities)) / annuity * 100
+
+    def shifted(self, shift_pct, tenors=None) -> "ShiftedCurve":
+        """A view of this curve moved by *shift_pct* (see :class:`ShiftedCurve`)."""
+        return ShiftedCurve(self, shift_pct, tenors)
+
+
+class YieldCurve(Curve):
+    """
+    Zero curve through ``(tenors, zero_rates)`` nodes.
+
+    ``linear`` and ``cubic_spline`` (natural) interpolate zero rates,
+    ``monotone`` uses a shape-preserving Fritsch–Carlson cubic, and
+    ``log_linear_df`` interpolates log discount factors (piecewise flat
+    forwards) from a unit discount factor at time zero. Zero rates are held
+    flat beyond the end tenors. The zero-rate methods accept an overnight
+    node at tenor 0, as FTP curves often have.
+    """
+
+    def __init__(self, tenors=None, zero_rates=None, method: str = "linear"):
+        if method not in CURVE_METHODS:
+            raise ValueError(f"Unknown curve interpolation method: {method}")
+        tenors = np.asarray(KEY_TENORS if tenors is None else tenors, dtype=float)
+        rates = np.asarray(BASE_YIELD if zero_rates is None else zero_rates, dtype=float)
+        if tenors.ndim != 1 or tenors.shape != rates.shape or len(tenors) == 0:
+            raise ValueError("A curve needs one zero rate per tenor.")
+        order = np.argsort(tenors)
+        self.tenors, self.rates = tenors[order], rates[order]
+        if (np.diff(self.tenors) <= 0).any() or self.tenors[0] < 0:
+            raise ValueError("Curve tenors must be non-negative and distinct.")
+        # Log discount factors are anchored at time zero, so a zero tenor adds nothing there.
+        if method == "log_linear_df" and self.tenors[0] == 0:
+            raise ValueError("log_linear_df curve tenors must be positive.")
+        self.method = method
+
+        # Cubic methods keep power-basis coefficients per segment.
+        slopes = None
+        if method == "cubic_spline" and len(self.tenors) > 2:
+            slopes = _natural_spline_slopes(self.tenors, self.rates)
+        elif method == "monotone" and len(self.tenors) > 1:
+            slopes = pchip_slopes(self.tenors, self.rates)
+        self._coefficients = (
+            None if slopes is None else _hermite_coefficients(self.tenors, self.rates, slopes)
+        )
+        # Log discount factors at the nodes, anchored at 0 for time zero.
+        self._log_tenors = np.concatenate([[0.0], self.tenors])
+        self._log_discount = np.concatenate([[0.0], -self.tenors * np.log1p(self.rates / 100)])
+
+    def __repr__(self) -> str:
+        return f"YieldCurve({len(self.tenors)} tenors, method={self.method!r})"
+
+    @classmethod
+    def bootstrap(
+        cls, tenors, par_rates, method: str = "linear", frequency: int = 1
+    ) -> "YieldCurve":
+        """
+        Zero curve that reprices par bonds/swaps at *tenors* to *par_rates*.
+
+        All nodes are solved together by Newton's method, so the result is
+        exact for every interpolation method, including splines whose
+        segments depend on later nodes.
+        """
+        tenors = np.asarray(tenors, dtype=float)
+        par = np.asarray(par_rates, dtype=float)
+        zeros = par.copy()
+        bump = 1e-6
+        for _ in range(BOOTSTRAP_MAX_ITERATIONS):
+            residual = cls(tenors, zeros, method).par_rates(tenors, frequency) - par
+            if np.abs(residual).max() < BOOTSTRAP_TOLERANCE:
+                return cls(tenors, zeros, method)
+            jacobian = np.column_stack(
+                [
+                    (
+                        cls(tenors, zeros + bump * np.eye(len(zeros))[node], method).par_rates(
+                            tenors, frequency
+                        )
+                        - par
+                        - residual
+                    )
+                    / bump
+                    for node in range(len(zeros))
+                ]
+            )
+            zeros = zeros - np.linalg.solve(jacobian, residual)
+        raise ValueError("Par rates could not be bootstrapped into a zero curve.")
+
+    def zero_rates(self, times) -> np.ndarray:
+        times = _as_times(times)
+        if self.method == "log_linear_df":
+            log_discount = self._log_discounts(times)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rates = np.expm1(-log_discount / times) * 100
+            return np.where(times > 0, rates, self.rates[0])
+        if self._coefficients is None:
+            return np.interp(times, self.tenors, self.rates)
+
+        clipped = np.clip(times, self.tenors[0], self.tenors[-1])
+        segment = np.clip(
+            np.searchsorted(self.tenors, clipped, side="right") - 1, 0, len(self.tenors) - 2
+        )
+        dx = clipped - self.tenors[segment]
+        a, b, c, d = (coefficient[segment] for coefficient in self._coefficients)
+        return a + dx * (b + dx * (c + dx * d))
+
+    def _log_discounts(self, times: np.ndarray) -> np.ndarray:
+        # Beyond the last tenor the last zero rate is held, as for the other methods.
+        inside = np.interp(times, self._log_tenors, self._log_discount)
+        beyond = -times * np.log1p(self.rates[-1] / 100)
+        return np.where(times > self.tenors[-1], beyond, inside)
+
+    def discount_factors(self, times) -> np.ndarray:
+        times = _as_times(times)
+        if self.method == "log_linear_df":
+            return np.exp(self._log_discounts(times))
+        return super().discount_factors(times)
+
+
+class ShiftedCurve(Curve):
+    """
+    A base curve plus a shift in percent, applied when the curve is evaluated.
+
+    With *tenors* ``None`` the shift is parallel; an array of shifts gives
+    one scenario per element. With *tenors*, the last axis of *shift_pct*
+    holds key-rate shifts at those tenors (interpolated linearly between
+    them, flat outside) and any leading axes are scenarios. Evaluating at
+    ``times`` returns ``scenario shape + times.shape``.
+    """
+
+    def __init__(self, base: Curve, shift_pct, tenors=None):
+        self.base = base
+        self.shift = np.asarray(shift_pct, dtype=float)
+        self.tenors = None if tenors is None else np.asarray(tenors, dtype=float)
+        if self.tenors is not None and (
+            self.shift.ndim == 0 or self.shift.shape[-1] != len(self.tenors)
+        ):
+            raise ValueError("A key-rate shift needs one value per tenor.")
+
+    def __repr__(self) -> str:
+        return f"ShiftedCurve({self.base!r}, shift shape {self.shift.shape})"
+
+    def shift_at(self, times) -> np.ndarray:
+        """The shift (percent) applied at *times*."""
+        times = _as_times(times)
+        if self.tenors is None:
+            return self.shift.reshape(self.shift.shape + (1,) * times.ndim)
+        weights = tenor_weights(times.ravel(), self.tenors)
+        return (self.shift @ weights.T).reshape(self.shift.shape[:-1] + times.shape)
+
+    def zero_rates(self, times) -> np.ndarray:
+        times = _as_times(times)
+        return self.base.zero_rates(times) + self.shift_at(times)
+
+
+BASE_CURVE = YieldCurve(KEY_TENORS, BASE_YIELD)